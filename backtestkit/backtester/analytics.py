@@ -0,0 +1,211 @@
+# backtester/analytics.py — Rolling and regime-sliced performance analytics
+
+import datetime
+import math
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtester.metrics import METRIC_NAMES, PERIODS_PER_YEAR, metrics_from_arrays, snapshot_columns
+
+# Named slices for sliced_metrics: pandas period frequency of each
+SLICE_PERIODS = {"month": "M", "week": "W", "session": "D"}
+
+ROLLING_COLUMNS = ("sharpe_ratio", "drawdown", "win_rate", "trades")
+
+
+def rolling_metrics(result, timestamps: pd.DatetimeIndex, window: int,
+                    initial_capital: float) -> pd.DataFrame:
+    """Rolling metrics over the last `window` candles, one row per candle.
+
+    All columns are computed in O(n) with array operations: window sums
+    come from cumulative sums, the window peak from a van Herk/Gil-Werman
+    sliding maximum (block prefix/suffix maxima). The first window - 1
+    rows are NaN, as with pandas' rolling().
+
+    Columns (ROLLING_COLUMNS):
+        sharpe_ratio: Annualized Sharpe of the window's per-candle returns.
+        drawdown: Drawdown of the candle's equity from the window's peak.
+        win_rate: Share of winning trades among those closed in the window
+            (NaN when none closed).
+        trades: Number of trades closed in the window.
+
+    Args:
+        result: BacktestResult with "all", "on_change" or "events" snapshots.
+        timestamps: Index of the simulated candles (e.g. data.index).
+        window: Window length in candles (e.g. 1440 for one day of M1 candles).
+        initial_capital: Starting capital (equity before the first candle).
+
+    Returns:
+        DataFrame indexed by `timestamps`.
+    """
+    if window < 2:
+        raise ValueError("window must be >= 2")
+    equity, _, returns = _candle_curves(result, len(timestamps), initial_capital)
+    n = len(equity)
+    exits, pnl = _closed_trades(result)
+
+    # Window sums of returns shifted by their mean, which keeps the
+    # sum-of-squares difference well conditioned
+    shift = float(returns.mean()) if n else 0.0
+    shifted = returns - shift
+    total = _window_sums(shifted, window)
+    squares = _window_sums(shifted * shifted, window)
+    moving = _window_sums((returns != 0.0).astype(np.float64), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (squares - total * total / window) / (window - 1)
+        sharpe = (shift + total / window) / np.sqrt(variance) * math.sqrt(PERIODS_PER_YEAR)
+    sharpe[(moving == 0.0) | (variance <= 0.0)] = 0.0
+
+    peak = _sliding_max(equity, window)
+    drawdown = (peak - equity[window - 1:]) / peak
+
+    trades = _window_sums(np.bincount(exits, minlength=n).astype(np.float64), window)
+    wins = _window_sums(np.bincount(exits[pnl > 0], minlength=n).astype(np.float64), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        win_rate = wins / trades
+
+    columns = {name: np.full(n, np.nan) for name in ROLLING_COLUMNS}
+    for name, values in zip(ROLLING_COLUMNS, (sharpe, drawdown, win_rate, trades)):
+        columns[name][window - 1:] = values
+    return pd.DataFrame(columns, index=timestamps)
+
+
+def sliced_metrics(result, timestamps: pd.DatetimeIndex, initial_capital: float,
+                   by: Union[str, np.ndarray, pd.Index] = "month",
+                   session_start: Union[str, datetime.time, None] = None,
+                   tz: Optional[str] = None) -> pd.DataFrame:
+    """Spec §11 metrics for each slice of the candles (month, session, ...).
+
+    Each slice is evaluated as its own backtest: its candles' per-candle
+    returns compounded from 1.0 (so drawdowns start at the slice's first
+    peak), its exposure, and the trades that closed in it (avg_trade is
+    their mean PnL). Slices need not be contiguous: labels such as
+    timestamps.hour slice by time of day.
+
+    Args:
+        result: BacktestResult with "all", "on_change" or "events" snapshots.
+        timestamps: Index of the simulated candles (e.g. data.index).
+        initial_capital: Starting capital (equity before the first candle).
+        by: "month", "week", "session", or one label per candle.
+        session_start: Wall-clock time sessions open at ("18:00" for
+            futures trading from 18:00 to 17:00 the next day). Candles from
+            then on count towards the next day's session, so a session that
+            crosses midnight stays one slice; months and weeks follow the
+            same trading days. Default: midnight, i.e. calendar days.
+        tz: Time zone of session_start (e.g. "America/New_York"); naive
+            timestamps are taken as UTC. Default: the index's own wall-clock
+            time.
+
+    Returns:
+        DataFrame with one row per label (sorted) and METRIC_NAMES columns.
+    """
+    equity, position_size, returns = _candle_curves(result, len(timestamps), initial_capital)
+    exits, pnl = _closed_trades(result)
+
+    if isinstance(by, str):
+        if by not in SLICE_PERIODS:
+            raise ValueError(f"Unknown slice: {by!r} (expected one of {tuple(SLICE_PERIODS)})")
+        name = by
+        by = _trading_days(timestamps, session_start, tz).to_period(SLICE_PERIODS[name])
+    else:
+        name = getattr(by, "name", None) or "slice"
+        if len(by) != len(timestamps):
+            raise ValueError("by must hold one label per candle")
+    codes, labels = pd.factorize(by, sort=True)
+
+    # Candles and closed trades of each slice, in time order
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    trade_codes = codes[exits]
+    trade_order = np.argsort(trade_codes, kind="stable")
+    trade_bounds = np.searchsorted(trade_codes[trade_order], np.arange(len(labels) + 1))
+
+    rows = []
+    for k in range(len(labels)):
+        candles = order[bounds[k]:bounds[k + 1]]
+        slice_pnl = pnl[trade_order[trade_bounds[k]:trade_bounds[k + 1]]]
+        curve = np.cumprod(1.0 + returns[candles])
+        metrics = metrics_from_arrays(
+            initial_capital=1.0,
+            final_equity=float(curve[-1]),
+            candles=len(candles),
+            trade_pnl=slice_pnl,
+            index=np.arange(len(candles)),
+            equity=curve,
+            position_size=position_size[candles],
+        )
+        rows.append([metrics[metric] for metric in METRIC_NAMES])
+    return pd.DataFrame(rows, index=pd.Index(labels, name=name), columns=list(METRIC_NAMES))
+
+
+def _trading_days(timestamps: pd.DatetimeIndex, session_start: Union[str, datetime.time, None],
+                  tz: Optional[str]) -> pd.DatetimeIndex:
+    """Naive wall-clock timestamps moved so each session falls on the date it closes."""
+    if tz is not None:
+        timestamps = (timestamps.tz_localize("UTC") if timestamps.tz is None else timestamps).tz_convert(tz)
+    local = timestamps.tz_localize(None) if timestamps.tz is not None else timestamps
+    if session_start is None:
+        return local
+    if isinstance(session_start, str):
+        session_start = datetime.time.fromisoformat(session_start)
+    start = pd.Timedelta(hours=session_start.hour, minutes=session_start.minute,
+                         seconds=session_start.second)
+    return local + (pd.Timedelta("1D") - start) if start else local
+
+
+def _candle_curves(result, n: int, initial_capital: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-candle equity, position size and return, forward-filling decimated snapshots."""
+    snapshots = snapshot_columns(result)
+    if result.candles and result.candles != n:
+        raise ValueError(f"Result covers {result.candles} candles, timestamps {n}")
+    index = snapshots["index"]
+    if not len(index):
+        if n:
+            raise ValueError("Analytics need snapshots (snapshot_mode 'all', 'on_change' or 'events')")
+        return np.empty(0), np.empty(0), np.empty(0)
+    rows = np.searchsorted(index, index[0] + np.arange(n), side="right") - 1
+    equity = snapshots["equity"][rows]
+    previous = np.empty(n)
+    previous[0] = initial_capital
+    previous[1:] = equity[:-1]
+    return equity, snapshots["position_size"][rows], equity / previous - 1.0
+
+
+def _closed_trades(result) -> Tuple[np.ndarray, np.ndarray]:
+    """Exit candle (counted from the first snapshot row) and PnL of every closed trade."""
+    ledger = result.ledger
+    if ledger is not None:
+        closed = ledger.column("exit_reason") != 0
+        exits, pnl = ledger.column("exit_index")[closed], ledger.column("pnl")[closed]
+    else:
+        trades = [t for t in result.trades if t.exit_reason is not None]
+        exits = np.array([t.exit_index for t in trades], dtype=np.int64)
+        pnl = np.array([t.pnl for t in trades], dtype=np.float64)
+    index = snapshot_columns(result)["index"]
+    first = int(index[0]) if len(index) else 0
+    return exits.astype(np.int64) - first, pnl
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sums of values[i - window + 1:i + 1] for i >= window - 1."""
+    sums = np.cumsum(values)
+    sums[window:] -= sums[:-window].copy()
+    return sums[window - 1:]
+
+
+def _sliding_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Maxima of values[i - window + 1:i + 1] for i >= window - 1 (van Herk/Gil-Werman).
+
+    In blocks of `window` entries, every window spans the suffix of one
+    block and the prefix of the next, so its maximum is the larger of one
+    suffix maximum and one prefix maximum.
+    """
+    n = len(values)
+    if n < window:
+        return np.empty(0)
+    blocks = np.concatenate([values, np.full(-n % window, -np.inf)]).reshape(-1, window)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()[:n]
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()[:n]
+    return np.maximum(suffix[:n - window + 1], prefix[window - 1:])
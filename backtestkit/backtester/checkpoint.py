@@ -0,0 +1,111 @@
+# backtester/checkpoint.py — Engine state saved after a run, for resuming on appended data
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from common.models import ExecutionMode
+from strategies.signals import SignalBatch
+
+PORTFOLIO_FIELDS = ("cash", "position_size", "avg_entry_price", "realized_pnl", "unrealized_pnl")
+_SIGNAL_FIELDS = ("timestamp_index", "signal_type", "stop_loss_level", "take_profit_level", "size")
+
+_FORMAT_VERSION = 2
+
+
+@dataclass
+class EngineCheckpoint:
+    """Complete BacktestEngine state after its last candle.
+
+    Created by BacktestEngine.checkpoint(); passing it as `resume_from` to a
+    new engine over the same candles plus appended ones continues the
+    simulation at `next_index` and gives the same result as a full re-run.
+
+    Attributes:
+        next_index: Number of candles processed (first candle of the resumed run).
+        last_timestamp: Epoch nanoseconds of candle next_index - 1, checked on resume.
+        mode, initial_capital: Settings the resumed engine must match.
+        snapshot_mode, snapshot_every: Snapshot recording settings, carried over.
+        portfolio: Portfolio fields (PORTFOLIO_FIELDS).
+        positions: Open position units as PositionBook.columns().
+        trades: All trade records (open and closed) as TradeLedger.columns().
+        pending: Signals of candle next_index - 1, executed at the resumed run's first candle.
+        snapshots: Kept snapshot rows as SnapshotStore.columns().
+        snapshot_last_row: Last offered snapshot row (running state of "on_change").
+        first_index: Candle index where the checkpointed runs started.
+        metrics: Running metric state as MetricAccumulator.state().
+        events: CashEventLog.columns() for snapshot_mode "events" (else empty).
+    """
+    next_index: int
+    last_timestamp: int
+    mode: ExecutionMode
+    initial_capital: float
+    snapshot_mode: str
+    snapshot_every: int
+    portfolio: Dict[str, float]
+    positions: Dict[str, np.ndarray]
+    trades: Dict[str, np.ndarray]
+    pending: SignalBatch
+    snapshots: Dict[str, np.ndarray]
+    snapshot_last_row: Optional[Tuple[float, ...]] = None
+    first_index: int = 0
+    metrics: Optional[Dict[str, float]] = None
+    events: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def save(self, path: str):
+        """Write the checkpoint to one .npz file (no pickled objects)."""
+        meta = {
+            "version": _FORMAT_VERSION,
+            "next_index": self.next_index,
+            "last_timestamp": self.last_timestamp,
+            "mode": self.mode.value,
+            "initial_capital": self.initial_capital,
+            "snapshot_mode": self.snapshot_mode,
+            "snapshot_every": self.snapshot_every,
+            "portfolio": self.portfolio,
+            "snapshot_last_row": self.snapshot_last_row,
+            "first_index": self.first_index,
+            "metrics": self.metrics,
+        }
+        arrays = {"meta": np.array(json.dumps(meta))}
+        for prefix, columns in (("positions", self.positions), ("trades", self.trades),
+                                ("snapshots", self.snapshots), ("events", self.events)):
+            arrays.update({f"{prefix}.{name}": values for name, values in columns.items()})
+        arrays.update({f"pending.{name}": getattr(self.pending, name) for name in _SIGNAL_FIELDS})
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "EngineCheckpoint":
+        """Read a checkpoint written by save()."""
+        with np.load(path, allow_pickle=False) as npz:
+            meta = json.loads(str(npz["meta"]))
+            if meta["version"] != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version: {meta['version']}")
+            groups: Dict[str, Dict[str, np.ndarray]] = {
+                "positions": {}, "trades": {}, "snapshots": {}, "pending": {}, "events": {}}
+            for key in npz.files:
+                if key != "meta":
+                    prefix, name = key.split(".", 1)
+                    groups[prefix][name] = npz[key]
+
+        last_row = meta["snapshot_last_row"]
+        return cls(
+            next_index=meta["next_index"],
+            last_timestamp=meta["last_timestamp"],
+            mode=ExecutionMode(meta["mode"]),
+            initial_capital=meta["initial_capital"],
+            snapshot_mode=meta["snapshot_mode"],
+            snapshot_every=meta["snapshot_every"],
+            portfolio=meta["portfolio"],
+            positions=groups["positions"],
+            trades=groups["trades"],
+            pending=SignalBatch(*(groups["pending"][name] for name in _SIGNAL_FIELDS)),
+            snapshots=groups["snapshots"],
+            snapshot_last_row=None if last_row is None else tuple(last_row),
+            first_index=meta["first_index"],
+            metrics=meta["metrics"],
+            events=groups["events"],
+        )
@@ -1,50 +1,53 @@
 # backtester/engine.py — Main backtest loop (Phase 6)
 
+import math
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from backtester.checkpoint import EngineCheckpoint, PORTFOLIO_FIELDS
+from backtester.equity_curve import CashEventLog, EquityCurve
+from backtester.ledger import Trade, TradeLedger
+from backtester.metrics import MetricAccumulator
+from backtester.multires import MultiResolutionScanner
 from backtester.portfolio import Portfolio
-from backtester.sl_tp import PositionUnit, check_sl_tp
+from backtester.range_index import RangeMinMaxIndex
+from backtester.position_book import PositionBook
+from backtester.sl_tp import PositionUnit
+# Snapshot was defined here before snapshots.py; re-exported for existing imports
+from backtester.snapshots import Snapshot, SnapshotStore  # noqa: F401
+from backtester.trade_stats import trade_path_stats
 from backtester.execution_modes import resolve_entry_price, calculate_fee
-from common.models import ExecutionMode, SignalType
-from strategies.signals import Signal
+from common.market_data import MarketData, column, timestamps
+from common.models import ExecutionMode
+from strategies.signals import Signal, SignalBatch
 
 
-@dataclass
-class Trade:
-    """A completed (or still-open) trade record."""
-    direction: str
-    entry_price: float
-    entry_index: int
-    size: float
-    sl: float
-    tp: float
-    exit_price: Optional[float] = None
-    exit_index: Optional[int] = None
-    exit_reason: Optional[str] = None  # "SL", "TP", "CLOSE", or None if still open
-    pnl: Optional[float] = None
+ENGINE_CORES = ("columnar", "pandas", "event")
+SL_TP_SCANS = ("vectorized", "range_index", "hierarchical")
 
+# Candles converted to Python floats per block in the columnar loop
+_BLOCK_SIZE = 65536
 
-@dataclass
-class Snapshot:
-    """Per-candle state snapshot."""
-    index: int
-    cash: float
-    position_size: float
-    unrealized_pnl: float
-    equity: float
+# Initial and maximum window for the event core's vectorized SL/TP scan
+_SCAN_MIN_WINDOW = 256
+_SCAN_MAX_WINDOW = 65536
 
 
 @dataclass
 class BacktestResult:
     """Result returned by the engine after running the simulation."""
     trades: List[Trade] = field(default_factory=list)
-    snapshots: List[Snapshot] = field(default_factory=list)
+    snapshots: SnapshotStore = field(default_factory=SnapshotStore)
     final_equity: float = 0.0
     realized_pnl: float = 0.0
     unrealized_pnl: float = 0.0
+    ledger: Optional[TradeLedger] = None
+    candles: int = 0  # candles simulated (since the first checkpointed run when resumed)
+    metrics: Optional[Dict[str, float]] = None  # spec §11 metrics from the running accumulators
+    equity_curve: Optional[EquityCurve] = None  # snapshot_mode "events": snapshots rebuilt on demand
 
 
 class BacktestEngine:
@@ -58,46 +61,187 @@ class BacktestEngine:
         5. Record state snapshot
 
     Critical invariant: signals at candle i are stored, then executed at candle i+1 open.
+
+    Signals can be given as a list of Signal objects or as a SignalBatch; lists
+    are converted to a batch once and the loops read the batch arrays directly.
+
+    Cores:
+        "columnar" (default): open/high/low/close/spread are extracted once into
+            contiguous float64 arrays and the loop runs on plain Python floats.
+        "pandas": reference loop reading every candle through DataFrame.iloc.
+        "event": only visits candles where something can happen (a pending
+            signal executes or an SL/TP level can be touched) and fills the
+            snapshots of the idle spans in between with array operations.
+    All cores produce bit-identical results (except result.metrics' Sharpe
+    ratio, which agrees to rounding; see MetricAccumulator).
+
+    SL/TP scans (how the event core finds the next candle reaching a level):
+        "vectorized" (default): array comparisons over growing windows.
+        "range_index": logarithmic lookup in a RangeMinMaxIndex over low/high.
+        "hierarchical": checks 60/15/5-min resampled bars first and only reads
+            1-min candles inside bars whose range crosses a level.
+    Every scan returns the same candle, so results do not depend on the choice.
+
+    Snapshot modes (which candles are kept in result.snapshots):
+        "all" (default), "every_n" (every `snapshot_every`-th candle),
+        "on_change" (candles where cash/position/unrealized/equity changed),
+        "none", "events". See SnapshotStore. Every candle also goes to a
+        MetricAccumulator, so result.metrics holds the full metric set in
+        every snapshot mode.
+        "events" records nothing per candle: the engine logs the candles
+        where cash or the position changed (CashEventLog) and
+        result.equity_curve rebuilds any range of snapshots from them and
+        the close/spread arrays, bit-identical to "all". The accumulator is
+        then fed from the rebuilt curve at the end of run().
+
+    data can be a DataFrame or a MarketData; the "pandas" core materializes
+    a MarketData as a DataFrame, the other cores only read its arrays.
+
+    Checkpoint/resume: after run(), checkpoint() captures the full state
+    (portfolio, open units, trades, signals pending for the next candle,
+    snapshot store). An engine built with resume_from=checkpoint over the
+    same candles plus appended ones starts at the checkpoint's next_index,
+    so only the new candles are simulated; the result is identical to a
+    full run over all the data. The resumed engine takes its signals at
+    candle indexes >= next_index from `signals` (earlier ones were already
+    processed; the pending ones come from the checkpoint), so a strategy
+    can simply be re-run on the extended data.
+
+    index_offset gives the candle index of data's first row, for data that
+    continues earlier candles (e.g. only the candles appended after a
+    checkpoint, or one block of a StreamingEngine). Signal indexes and the
+    indexes in trades and snapshots are then absolute, counted from the
+    start of the whole series.
     """
 
     def __init__(
         self,
-        data: pd.DataFrame,
-        signals: List[Signal],
+        data: Union[pd.DataFrame, MarketData],
+        signals: Union[List[Signal], SignalBatch],
         mode: ExecutionMode,
         initial_capital: float,
         verbosity: str = "silent",
+        core: str = "columnar",
+        sl_tp_scan: str = "vectorized",
+        snapshot_mode: str = "all",
+        snapshot_every: int = 1,
+        resume_from: Optional[EngineCheckpoint] = None,
+        index_offset: int = 0,
     ):
+        if core not in ENGINE_CORES:
+            raise ValueError(f"Unknown engine core: {core!r} (expected one of {ENGINE_CORES})")
+        if sl_tp_scan not in SL_TP_SCANS:
+            raise ValueError(f"Unknown SL/TP scan: {sl_tp_scan!r} (expected one of {SL_TP_SCANS})")
+
+        if core == "pandas" and isinstance(data, MarketData):
+            data = data.to_frame()
         self.data = data
         self.signals = signals
         self.mode = mode
         self.initial_capital = initial_capital
         self.verbosity = verbosity
+        self.core = core
+        self.sl_tp_scan = sl_tp_scan
+        self.index_offset = index_offset
+        self._resumed = resume_from is not None
 
-        self.portfolio = Portfolio(initial_capital=initial_capital, mode=mode)
-        self.position_units: List[PositionUnit] = []
-        self.trades: List[Trade] = []
-        self.snapshots: List[Snapshot] = []
+        if not isinstance(signals, SignalBatch):
+            signals = SignalBatch.from_signals(signals)
 
-        # Build signal lookup: index -> list of signals at that index
-        self._signal_map: dict[int, List[Signal]] = {}
-        for sig in signals:
-            self._signal_map.setdefault(sig.timestamp_index, []).append(sig)
+        self.portfolio = Portfolio(initial_capital=initial_capital, mode=mode)
+        # Per-candle recording (snapshots and metric accumulator) in the loops
+        self._per_candle = snapshot_mode != "events"
+        self.events = None
+        if resume_from is None:
+            # Local row where the simulation starts, and timestamp of the candle before it
+            self._start = 0
+            self._first_index = index_offset
+            self._previous_timestamp = 0
+            self.book = PositionBook()
+            self.ledger = TradeLedger()
+            self.accumulator = MetricAccumulator(initial_capital)
+            if not self._per_candle:
+                self.events = CashEventLog(initial_capital)
+            self.snapshots = SnapshotStore(
+                mode=snapshot_mode,
+                every=snapshot_every,
+                capacity=_snapshot_capacity(len(data), snapshot_mode, snapshot_every),
+                start_index=index_offset,
+            )
+        else:
+            self._check_resumable(resume_from, snapshot_mode, snapshot_every)
+            self._start = resume_from.next_index - index_offset
+            self._first_index = resume_from.first_index
+            self._previous_timestamp = resume_from.last_timestamp
+            for name in PORTFOLIO_FIELDS:
+                setattr(self.portfolio, name, resume_from.portfolio[name])
+            self.book = PositionBook.from_columns(resume_from.positions)
+            self.ledger = TradeLedger.from_columns(resume_from.trades)
+            self.accumulator = MetricAccumulator.from_state(initial_capital, resume_from.metrics)
+            if not self._per_candle:
+                self.events = CashEventLog.from_columns(initial_capital, resume_from.events)
+            self.snapshots = SnapshotStore.from_columns(
+                resume_from.snapshots, mode=snapshot_mode, every=snapshot_every,
+                next_index=resume_from.next_index, last_row=resume_from.snapshot_last_row,
+                capacity=_snapshot_capacity(len(data) - self._start, snapshot_mode, snapshot_every),
+            )
+            # Checkpointed pending signals, then the new candles' signals
+            signals = _concat_batches(resume_from.pending,
+                                      _select(signals, signals.timestamp_index >= resume_from.next_index))
+        self._next_index = index_offset + self._start
+
+        # Signals grouped by candle: rows offsets[k]:offsets[k + 1] of the
+        # batch belong to candle signal_candles[k]
+        self.signal_batch = signals
+        self._signal_candles, self._signal_offsets = signals.groups()
+        self._signal_candles = self._signal_candles - index_offset  # local rows
+
+        # Columnar candle data, extracted once
+        self._open = _column(data, "open")
+        self._high = _column(data, "high")
+        self._low = _column(data, "low")
+        self._close = _column(data, "close")
+        self._spread = _column(data, "spread")
+        self._touch_index = None  # RangeMinMaxIndex / MultiResolutionScanner, built on demand
 
     def run(self) -> BacktestResult:
         """Run the backtest simulation and return results."""
-        if len(self.data) == 0:
-            return BacktestResult(
-                trades=[],
-                snapshots=[],
-                final_equity=self.initial_capital,
-                realized_pnl=0.0,
-                unrealized_pnl=0.0,
-            )
+        equity_curve = None
+        if self.events is not None:
+            equity_curve = EquityCurve(self.events, self._close, self._spread,
+                                       self.index_offset, self._first_index)
+        if self._start < len(self.data):
+            if self.core == "pandas":
+                self._run_pandas()
+            elif self.core == "event":
+                self._run_event()
+            else:
+                self._run_columnar()
+            if equity_curve is not None:
+                for columns in equity_curve.iter_columns(start=self._next_index, rows=_BLOCK_SIZE):
+                    self.accumulator.extend(columns["equity"], columns["position_size"])
+            self._previous_timestamp = _timestamp_at(self.data, len(self.data) - 1)
+        self._start = len(self.data)
+        self._next_index = self.index_offset + len(self.data)
+
+        return BacktestResult(
+            trades=self.ledger.to_trades(),
+            snapshots=self.snapshots,
+            final_equity=self.portfolio.equity,
+            realized_pnl=self.portfolio.realized_pnl,
+            unrealized_pnl=self.portfolio.unrealized_pnl,
+            ledger=self.ledger,
+            candles=self._next_index - self._first_index,
+            metrics=self.accumulator.metrics(self.portfolio.equity),
+            equity_curve=equity_curve,
+        )
 
-        pending_signals: List[Signal] = []
+    def _run_pandas(self):
+        """Reference loop: one DataFrame row lookup per candle."""
+        group_at = {c: k for k, c in enumerate(self._signal_candles.tolist())}
+        pending_group = self._resumed_pending_group()
 
-        for i in range(len(self.data)):
+        for i in range(self._start, len(self.data)):
             candle = self.data.iloc[i]
             candle_dict = {
                 "open": candle["open"],
@@ -114,53 +258,319 @@ class BacktestEngine:
             self._check_and_execute_sl_tp(candle_dict, i)
 
             # Step 3: Execute pending signals (from previous candle)
-            # Sort: CLOSE signals first, then directional entries
-            close_signals = [s for s in pending_signals if s.signal_type == SignalType.CLOSE]
-            entry_signals = [s for s in pending_signals if s.signal_type != SignalType.CLOSE]
-
-            for sig in close_signals:
-                self._execute_close_signal(sig, candle_dict, i)
-
-            for sig in entry_signals:
-                self._execute_entry_signal(sig, candle_dict, i)
-
-            pending_signals = []
+            if pending_group is not None:
+                self._execute_pending(pending_group, candle_dict, i)
+            pending_group = None
 
             # Step 4: Collect all signals at this candle index
-            if i in self._signal_map:
-                pending_signals = list(self._signal_map[i])
+            if i in group_at:
+                pending_group = group_at[i]
 
             # Step 5: Record snapshot
-            self.snapshots.append(Snapshot(
-                index=i,
-                cash=self.portfolio.cash,
-                position_size=self.portfolio.position_size,
-                unrealized_pnl=self.portfolio.unrealized_pnl,
-                equity=self.portfolio.equity,
-            ))
+            if self._per_candle:
+                self.snapshots.append(
+                    self.portfolio.cash,
+                    self.portfolio.position_size,
+                    self.portfolio.unrealized_pnl,
+                    self.portfolio.equity,
+                )
+                self.accumulator.append(self.portfolio.equity, self.portfolio.position_size)
+            else:
+                self._record_event(i)
+
+    def _run_columnar(self):
+        """Array-driven loop: same five steps, no per-candle DataFrame access.
+
+        Columns are converted to Python floats one block at a time so the hot
+        loop does plain scalar arithmetic while memory stays bounded. A candle
+        dict is only built when a signal is pending or the candle reaches the
+        position book's SL/TP touch levels. Snapshot values are collected in
+        per-block lists and handed to the snapshot store and the metric
+        accumulator once per block.
+        """
+        portfolio = self.portfolio
+        snapshots = self.snapshots
+        accumulator = self.accumulator
+        record = self._per_candle
+        signal_candles = self._signal_candles
+        pending_group = self._resumed_pending_group()
+        book = self.book
+        touch_low, touch_high = book.touch_levels()
+        n = len(self.data)
+
+        for start in range(self._start, n, _BLOCK_SIZE):
+            stop = min(start + _BLOCK_SIZE, n)
+            block = zip(
+                range(start, stop),
+                self._open[start:stop].tolist(),
+                self._high[start:stop].tolist(),
+                self._low[start:stop].tolist(),
+                self._close[start:stop].tolist(),
+                self._spread[start:stop].tolist(),
+            )
+            # Signal candles in this block, with a sentinel past its end
+            first_group = int(np.searchsorted(signal_candles, start))
+            block_candles = signal_candles[
+                first_group:np.searchsorted(signal_candles, stop)].tolist()
+            block_candles.append(stop)
+            next_group = first_group
+            next_signal = block_candles[0]
+            cash_col, position_col, unrealized_col, equity_col = [], [], [], []
+            for i, open_, high, low, close, spread in block:
+                # Step 1: Update unrealized PnL
+                portfolio.update_unrealized(close, spread)
+
+                if pending_group is not None or low <= touch_low or high >= touch_high:
+                    candle = {"open": open_, "high": high, "low": low,
+                              "close": close, "spread": spread}
+
+                    # Step 2: Check and execute SL/TP
+                    if len(book):
+                        self._check_and_execute_sl_tp(candle, i)
+
+                    # Step 3: Execute pending signals (from previous candle)
+                    if pending_group is not None:
+                        self._execute_pending(pending_group, candle, i)
+                        pending_group = None
+
+                    touch_low, touch_high = book.touch_levels()
+                    if not record:
+                        self._record_event(i)
+
+                # Step 4: Collect all signals at this candle index
+                if i == next_signal:
+                    pending_group = next_group
+                    next_group += 1
+                    next_signal = block_candles[next_group - first_group]
+
+                # Step 5: Record snapshot
+                if record:
+                    cash_col.append(portfolio.cash)
+                    position_col.append(portfolio.position_size)
+                    unrealized_col.append(portfolio.unrealized_pnl)
+                    equity_col.append(portfolio.equity)
+
+            if not record:
+                continue
+            position_col = np.array(position_col)
+            equity_col = np.array(equity_col)
+            snapshots.extend(cash_col, position_col, unrealized_col, equity_col)
+            accumulator.extend(equity_col, position_col)
+
+    def _run_event(self):
+        """Event-driven loop: jump between candles where the state can change.
+
+        Event candles are the execution candles of signals (index + 1) and the
+        first candle at or after the current one whose low/high reaches an
+        SL/TP touch level of the open units. Event candles go through the
+        regular five steps; between them cash and position are constant, so
+        unrealized PnL and equity for the span are computed as arrays.
+        """
+        n = len(self.data)
+        portfolio = self.portfolio
+        if self._touch_index is None:
+            if self.sl_tp_scan == "range_index":
+                self._touch_index = RangeMinMaxIndex(self._low, self._high)
+            elif self.sl_tp_scan == "hierarchical":
+                self._touch_index = MultiResolutionScanner(self.data)
+        snapshots = self.snapshots
+
+        # Signal groups that execute within the data, and their execution candles
+        first = self._start - 1 if self._resumed else 0
+        executable = (self._signal_candles >= first) & (self._signal_candles < n - 1)
+        groups = np.flatnonzero(executable)
+        execution_candles = np.append(self._signal_candles[groups] + 1, n)
+        next_signal = 0
+
+        book = self.book
+        touch_low, touch_high = book.touch_levels()
+        i = self._start
+        while i < n:
+            stop = int(execution_candles[next_signal])
+            if i < stop:
+                # Idle span [i, touch): no signal executes, no level is reached
+                touch = self._first_sl_tp_touch(i, stop, touch_low, touch_high)
+                if touch > i:
+                    self._fill_idle_span(i, touch)
+                    i = touch
+                    if i == stop and i == n:
+                        break
 
-        return BacktestResult(
-            trades=self.trades,
-            snapshots=self.snapshots,
-            final_equity=self.portfolio.equity,
-            realized_pnl=self.portfolio.realized_pnl,
-            unrealized_pnl=self.portfolio.unrealized_pnl,
+            # Event candle: the regular five steps
+            candle = {
+                "open": float(self._open[i]),
+                "high": float(self._high[i]),
+                "low": float(self._low[i]),
+                "close": float(self._close[i]),
+                "spread": float(self._spread[i]),
+            }
+            portfolio.update_unrealized(candle["close"], candle["spread"])
+            if len(book):
+                self._check_and_execute_sl_tp(candle, i)
+            if i == stop:
+                self._execute_pending(int(groups[next_signal]), candle, i)
+                next_signal += 1
+            touch_low, touch_high = book.touch_levels()
+
+            if self._per_candle:
+                snapshots.append(portfolio.cash, portfolio.position_size,
+                                 portfolio.unrealized_pnl, portfolio.equity)
+                self.accumulator.append(portfolio.equity, portfolio.position_size)
+            else:
+                self._record_event(i)
+            i += 1
+
+    def checkpoint(self) -> EngineCheckpoint:
+        """Capture the engine state after run() (see the class docstring)."""
+        n = self._next_index
+        return EngineCheckpoint(
+            next_index=n,
+            last_timestamp=self._previous_timestamp,
+            first_index=self._first_index,
+            mode=self.mode,
+            initial_capital=self.initial_capital,
+            snapshot_mode=self.snapshots.mode,
+            snapshot_every=self.snapshots.every,
+            portfolio={name: float(getattr(self.portfolio, name)) for name in PORTFOLIO_FIELDS},
+            positions=self.book.columns(),
+            trades={name: values.copy() for name, values in self.ledger.columns().items()},
+            pending=_select(self.signal_batch, self.signal_batch.timestamp_index == n - 1),
+            snapshots={name: values.copy() for name, values in self.snapshots.columns().items()},
+            snapshot_last_row=self.snapshots.last_row,
+            metrics=self.accumulator.state(),
+            events={} if self.events is None else
+            {name: values.copy() for name, values in self.events.columns().items()},
         )
 
-    def _check_and_execute_sl_tp(self, candle: dict, candle_index: int):
-        """Check SL/TP for each position unit and execute if triggered."""
-        units_to_remove = []
+    def trade_path_stats(self) -> Dict[str, np.ndarray]:
+        """Trade columns with MAE/MFE, time-to-MFE and bars held (see trade_stats.trade_path_stats).
+
+        Reuses the engine's RangeMinMaxIndex when the "range_index" scan built one.
+        """
+        index = self._touch_index if isinstance(self._touch_index, RangeMinMaxIndex) else None
+        return trade_path_stats(self.ledger, self.data, index, self.index_offset)
+
+    def _check_resumable(self, checkpoint: EngineCheckpoint, snapshot_mode: str, snapshot_every: int):
+        if (checkpoint.mode, checkpoint.initial_capital) != (self.mode, self.initial_capital):
+            raise ValueError("Checkpoint was taken with a different mode or initial capital")
+        if (checkpoint.snapshot_mode, checkpoint.snapshot_every) != (snapshot_mode, snapshot_every):
+            raise ValueError("Checkpoint was taken with different snapshot settings")
+        start = checkpoint.next_index - self.index_offset
+        if start < 0:
+            raise ValueError(f"Data starts at candle {self.index_offset}, "
+                             f"after the checkpoint's next candle {checkpoint.next_index}")
+        if start > len(self.data):
+            raise ValueError(f"Checkpoint covers {checkpoint.next_index} candles "
+                             f"but data ends at candle {self.index_offset + len(self.data)}")
+        if start and _timestamp_at(self.data, start - 1) != checkpoint.last_timestamp:
+            raise ValueError("Data does not match the checkpoint: "
+                             f"candle {checkpoint.next_index - 1} has a different timestamp")
+        if not start and checkpoint.next_index and len(self.data) \
+                and _timestamp_at(self.data, 0) <= checkpoint.last_timestamp:
+            raise ValueError("Data does not continue the checkpoint: first timestamp is not "
+                             "after the checkpoint's last candle")
+
+    def _record_event(self, candle_index: int):
+        """Log the portfolio state after a candle whose executions may have changed it."""
+        portfolio = self.portfolio
+        self.events.record(self.index_offset + candle_index, portfolio.cash,
+                           portfolio.position_size, portfolio.avg_entry_price)
+
+    def _resumed_pending_group(self) -> Optional[int]:
+        """Group of the signals pending from the checkpoint (candle start - 1), if any."""
+        if not self._resumed:
+            return None
+        k = int(np.searchsorted(self._signal_candles, self._start - 1))
+        if k < len(self._signal_candles) and self._signal_candles[k] == self._start - 1:
+            return k
+        return None
+
+    def _first_sl_tp_touch(self, start: int, stop: int,
+                           touch_low: float, touch_high: float) -> int:
+        """Return the first index in [start, stop) whose candle reaches a touch level.
+
+        Uses the configured touch index when there is one; otherwise scans with growing
+        windows so a touch right after entry costs little and a long quiet
+        holding period is covered in a few array passes.
+        Returns stop when no candle in the range reaches either level.
+        """
+        if touch_low == -math.inf and touch_high == math.inf:
+            return stop
+        if self._touch_index is not None:
+            return self._touch_index.first_touch(start, touch_low, touch_high, stop)
+        window = _SCAN_MIN_WINDOW
+        while start < stop:
+            end = min(start + window, stop)
+            hits = np.flatnonzero(
+                (self._low[start:end] <= touch_low) | (self._high[start:end] >= touch_high)
+            )
+            if hits.size:
+                return start + int(hits[0])
+            start = end
+            window = min(window * 2, _SCAN_MAX_WINDOW)
+        return stop
+
+    def _fill_idle_span(self, start: int, stop: int):
+        """Record snapshots for candles [start, stop) where only prices move.
+
+        Mirrors Portfolio.update_unrealized element-wise (same operations in
+        the same order), then leaves the portfolio marked to the last candle.
+        """
+        portfolio = self.portfolio
+        if not self._per_candle:
+            portfolio.update_unrealized(float(self._close[stop - 1]), float(self._spread[stop - 1]))
+            return
+        size = portfolio.position_size
+        avg_entry = portfolio.avg_entry_price
+        mid = self._close[start:stop]
+        spread = self._spread[start:stop]
+
+        if size == 0.0:
+            unrealized = np.zeros(stop - start)
+        elif size > 0:  # LONG: marked at bid
+            unrealized = (mid - spread / 2.0 - avg_entry) * size
+        else:  # SHORT: marked at ask
+            unrealized = (avg_entry - (mid + spread / 2.0)) * abs(size)
+
+        equity = (portfolio.cash + portfolio.position_notional) + unrealized
+        self.snapshots.extend(portfolio.cash, size, unrealized, equity)
+        self.accumulator.extend(equity, size)
+        portfolio.update_unrealized(float(self._close[stop - 1]), float(self._spread[stop - 1]))
+
+    def _execute_pending(self, group: int, candle: dict, candle_index: int):
+        """Execute the signals of one candle group: CLOSE signals first, then directional entries.
+
+        The batch is already sorted that way within each candle.
+        """
+        batch = self.signal_batch
+        rows = slice(int(self._signal_offsets[group]), int(self._signal_offsets[group + 1]))
+        for code, sl, tp, size in zip(batch.signal_type[rows].tolist(),
+                                      batch.stop_loss_level[rows].tolist(),
+                                      batch.take_profit_level[rows].tolist(),
+                                      batch.size[rows].tolist()):
+            if code == 0:
+                self._execute_close_signal(size, candle, candle_index)
+            else:
+                direction = "LONG" if code == 1 else "SHORT"
+                self._execute_entry_signal(direction, sl, tp, size, candle, candle_index)
+
+    @property
+    def position_units(self) -> List[PositionUnit]:
+        """Open position units, materialized from the position book."""
+        return self.book.units()
 
-        for unit in self.position_units:
-            result = check_sl_tp(unit, candle, self.mode)
-            if result.triggered is not None:
-                # Close this unit at the SL/TP exit price
-                self._close_unit_at_price(unit, result.exit_price, candle["spread"],
-                                          candle_index, result.triggered)
-                units_to_remove.append(unit)
+    def _check_and_execute_sl_tp(self, candle: dict, candle_index: int):
+        """Check SL/TP for all position units at once and execute the triggered ones."""
+        slots, is_sl, exit_prices = self.book.evaluate(
+            candle["high"], candle["low"], candle["spread"], self.mode)
+        if len(slots) == 0:
+            return
 
-        for unit in units_to_remove:
-            self.position_units.remove(unit)
+        # Close triggered units in entry order at their SL/TP exit prices
+        for slot, sl_hit, exit_price in zip(slots.tolist(), is_sl.tolist(), exit_prices.tolist()):
+            self._close_unit_at_price(self.book.unit(slot), exit_price, candle["spread"],
+                                      candle_index, "SL" if sl_hit else "TP")
+        self.book.remove(slots)
 
     def _close_unit_at_price(self, unit: PositionUnit, exit_price: float,
                               spread: float, candle_index: int, reason: str):
@@ -192,39 +602,14 @@ class BacktestEngine:
             self.portfolio.position_size = 0.0
             self.portfolio.avg_entry_price = 0.0
 
-        # Record the trade
-        # Find the matching open trade record, or create one
-        open_trade = None
-        for t in self.trades:
-            if (t.exit_price is None and t.direction == unit.direction
-                    and t.entry_price == unit.entry_price and t.size == unit.size):
-                open_trade = t
-                break
-
-        if open_trade:
-            open_trade.exit_price = exit_price
-            open_trade.exit_index = candle_index
-            open_trade.exit_reason = reason
-            open_trade.pnl = pnl
-        else:
-            # Create a complete trade record
-            self.trades.append(Trade(
-                direction=unit.direction,
-                entry_price=unit.entry_price,
-                entry_index=candle_index,
-                size=unit.size,
-                sl=unit.sl,
-                tp=unit.tp,
-                exit_price=exit_price,
-                exit_index=candle_index,
-                exit_reason=reason,
-                pnl=pnl,
-            ))
+        # Record the exit on the unit's own trade
+        self.ledger.close(unit.trade_id, exit_price, self.index_offset + candle_index, reason, pnl)
+        self.accumulator.record_trade(pnl)
 
         self._log_sl_tp(unit, exit_price, pnl, reason, candle_index)
 
-    def _execute_close_signal(self, sig: Signal, candle: dict, candle_index: int):
-        """Execute a CLOSE signal."""
+    def _execute_close_signal(self, size: float, candle: dict, candle_index: int):
+        """Execute a CLOSE signal closing `size` of the position."""
         if self.portfolio.position_size == 0.0:
             return
 
@@ -239,7 +624,7 @@ class BacktestEngine:
         actual_exit = resolve_exit_price(exit_mid, spread, direction, self.mode)
 
         # Calculate PnL before closing
-        units_to_close = abs(self.portfolio.position_size) * sig.size
+        units_to_close = abs(self.portfolio.position_size) * size
         if direction == "LONG":
             pnl = (actual_exit - self.portfolio.avg_entry_price) * units_to_close
         else:
@@ -250,42 +635,29 @@ class BacktestEngine:
         pnl -= fee
 
         # Use portfolio.close_position for accounting
-        self.portfolio.close_position(exit_price=exit_mid, spread=spread, size=sig.size)
+        self.portfolio.close_position(exit_price=exit_mid, spread=spread, size=size)
 
         # Close out position units proportionally
-        if sig.size >= 1.0:
+        if size >= 1.0:
             # Full close: record trades for all units, clear units
-            for unit in self.position_units:
-                # Find matching open trade
-                for t in self.trades:
-                    if (t.exit_price is None and t.direction == unit.direction
-                            and t.entry_price == unit.entry_price and t.size == unit.size):
-                        unit_pnl = self._calc_unit_pnl(unit, actual_exit)
-                        t.exit_price = actual_exit
-                        t.exit_index = candle_index
-                        t.exit_reason = "CLOSE"
-                        t.pnl = unit_pnl
-                        break
-            self.position_units.clear()
+            for unit in self.book.units():
+                unit_pnl = self._calc_unit_pnl(unit, actual_exit)
+                self.ledger.close(unit.trade_id, actual_exit, self.index_offset + candle_index,
+                                  "CLOSE", unit_pnl)
+                self.accumulator.record_trade(unit_pnl)
+            self.book.clear()
         else:
             # Partial close: reduce each unit proportionally
-            new_units = []
-            for unit in self.position_units:
-                closed_size = unit.size * sig.size
-                remaining_size = unit.size - closed_size
-                if remaining_size > 1e-12:
-                    unit.size = remaining_size
-                    new_units.append(unit)
-            self.position_units = new_units
+            self.book.reduce(size)
 
         self._log_close(direction, units_to_close, actual_exit, pnl, candle_index)
 
-    def _execute_entry_signal(self, sig: Signal, candle: dict, candle_index: int):
-        """Execute a LONG or SHORT entry signal."""
+    def _execute_entry_signal(self, direction: str, sl: float, tp: float, size: float,
+                              candle: dict, candle_index: int):
+        """Execute a LONG or SHORT entry with the given SL/TP levels and allocation fraction."""
         if self.portfolio.cash <= 0:
             return
 
-        direction = "LONG" if sig.signal_type == SignalType.LONG else "SHORT"
         entry_mid = candle["open"]
         spread = candle["spread"]
 
@@ -293,7 +665,7 @@ class BacktestEngine:
         actual_entry = resolve_entry_price(entry_mid, spread, direction, self.mode)
 
         # Calculate allocation
-        allocation = self.portfolio.cash * sig.size
+        allocation = self.portfolio.cash * size
         fee = calculate_fee(allocation, self.mode)
         effective_allocation = allocation - fee
         if effective_allocation <= 0:
@@ -304,28 +676,28 @@ class BacktestEngine:
         # Open through portfolio (handles stacking, weighted average, cash deduction)
         self.portfolio.open_position(
             entry_price=entry_mid, spread=spread,
-            direction=direction, size=sig.size,
+            direction=direction, size=size,
         )
 
-        # Create a PositionUnit with the signal's SL/TP levels
-        unit = PositionUnit(
+        # Record trade (open, no exit yet)
+        trade_id = self.ledger.open(
             direction=direction,
             entry_price=actual_entry,
+            entry_index=self.index_offset + candle_index,
             size=new_units,
-            sl=sig.stop_loss_level,
-            tp=sig.take_profit_level,
+            sl=sl,
+            tp=tp,
         )
-        self.position_units.append(unit)
 
-        # Record trade (open, no exit yet)
-        self.trades.append(Trade(
+        # Add a position unit with the signal's SL/TP levels, linked to its trade
+        self.book.add(
             direction=direction,
             entry_price=actual_entry,
-            entry_index=candle_index,
             size=new_units,
-            sl=sig.stop_loss_level,
-            tp=sig.take_profit_level,
-        ))
+            sl=sl,
+            tp=tp,
+            trade_id=trade_id,
+        )
 
         self._log_entry(direction, new_units, actual_entry, entry_mid, spread, candle_index)
 
@@ -363,3 +735,35 @@ class BacktestEngine:
         timestamp = self.data.index[candle_index]
         label = "STOP LOSS" if reason == "SL" else "TAKE PROFIT"
         print(f"[{timestamp}] {label} hit at {exit_price:.2f} — closed {unit.size:.2f} units, PnL: {pnl:+.2f}")
+
+
+def _snapshot_capacity(n: int, mode: str, every: int) -> int:
+    """Rows to preallocate in the snapshot store for `n` candles."""
+    if mode == "all":
+        return n
+    if mode == "every_n" and every >= 1:
+        return n // every + 1
+    return 1024
+
+
+def _column(data: Union[pd.DataFrame, MarketData], name: str) -> np.ndarray:
+    """Return a DataFrame/MarketData column as a contiguous float64 array."""
+    return column(data, name)
+
+
+def _timestamp_at(data: Union[pd.DataFrame, MarketData], row: int) -> int:
+    """Epoch nanoseconds of one candle."""
+    if isinstance(data, MarketData):
+        return int(data.timestamp[row])
+    return int(timestamps(data.iloc[row:row + 1])[0])
+
+
+def _select(batch: SignalBatch, rows: np.ndarray) -> SignalBatch:
+    return SignalBatch(batch.timestamp_index[rows], batch.signal_type[rows],
+                       batch.stop_loss_level[rows], batch.take_profit_level[rows], batch.size[rows])
+
+
+def _concat_batches(first: SignalBatch, second: SignalBatch) -> SignalBatch:
+    return SignalBatch(*(np.concatenate([getattr(first, name), getattr(second, name)])
+                         for name in ("timestamp_index", "signal_type", "stop_loss_level",
+                                      "take_profit_level", "size")))
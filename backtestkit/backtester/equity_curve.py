@@ -0,0 +1,188 @@
+# backtester/equity_curve.py — Equity curves rebuilt on demand from cash-change events
+
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+_FIELDS = ("cash", "position_size", "avg_entry_price")
+
+
+class CashEventLog:
+    """Columnar log of the candles where cash or the position changed.
+
+    Each row holds the candle index and the portfolio's cash, position size
+    and average entry price after that candle's executions. Between two
+    rows only prices move, so these rows plus the close/spread arrays
+    determine every per-candle snapshot (see EquityCurve). A run stores one
+    row per execution candle instead of one snapshot per candle.
+
+    Args:
+        initial_capital: Cash before the first event.
+        capacity: Initial number of rows; grows by doubling.
+    """
+
+    def __init__(self, initial_capital: float, capacity: int = 256):
+        self.initial_capital = initial_capital
+        self._index = np.empty(max(capacity, 1), dtype=np.int64)
+        self._columns = {name: np.empty(max(capacity, 1)) for name in _FIELDS}
+        self._count = 0
+        self._last = (initial_capital, 0.0, 0.0)
+
+    @classmethod
+    def from_columns(cls, initial_capital: float, columns: Dict[str, np.ndarray]) -> "CashEventLog":
+        """Rebuild a log from columns()."""
+        count = len(columns["index"])
+        log = cls(initial_capital, capacity=count)
+        log._index[:count] = columns["index"]
+        for name in _FIELDS:
+            log._columns[name][:count] = columns[name]
+        log._count = count
+        if count:
+            log._last = tuple(float(columns[name][-1]) for name in _FIELDS)
+        return log
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, index: int, cash: float, position_size: float, avg_entry_price: float):
+        """Record the state after candle `index` if it differs from the last one. O(1)."""
+        state = (cash, position_size, avg_entry_price)
+        if state == self._last:
+            return
+        self._last = state
+        if self._count == len(self._index):
+            self._grow()
+        row = self._count
+        self._index[row] = index
+        self._columns["cash"][row] = cash
+        self._columns["position_size"][row] = position_size
+        self._columns["avg_entry_price"][row] = avg_entry_price
+        self._count += 1
+
+    def drain(self) -> Dict[str, np.ndarray]:
+        """Remove all rows but the last and return them (copies, as columns()).
+
+        The last row is kept: later candles start from its state, so an
+        EquityCurve over them still rebuilds exactly.
+        """
+        keep = max(self._count - 1, 0)
+        rows = {name: values[:keep].copy() for name, values in self.columns().items()}
+        if keep:
+            self._index[0] = self._index[keep]
+            for values in self._columns.values():
+                values[0] = values[keep]
+            self._count = 1
+        return rows
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return read-only views of "index" and every field column."""
+        views = {"index": self._index[:self._count],
+                 **{name: values[:self._count] for name, values in self._columns.items()}}
+        for view in views.values():
+            view.flags.writeable = False
+        return views
+
+    def _grow(self):
+        capacity = 2 * len(self._index)
+        index = np.empty(capacity, dtype=np.int64)
+        index[:self._count] = self._index[:self._count]
+        self._index = index
+        for name, values in self._columns.items():
+            grown = np.empty(capacity)
+            grown[:self._count] = values[:self._count]
+            self._columns[name] = grown
+
+
+class EquityCurve:
+    """Per-candle snapshots reconstructed from a CashEventLog and candle prices.
+
+    For candle j, cash and position come from the last event at or before
+    j; unrealized PnL marks the position held before j's executions (the
+    last event before j) to close[j] with the bid/ask rules of
+    Portfolio.update_unrealized, as the engine does in step 1. Operations
+    match the engine's element for element, so the values are bit-identical
+    to recorded snapshots. Any sub-range and step is computed vectorized
+    on demand, with no per-candle state kept.
+
+    Args:
+        events: Cash-change events of the run (absolute candle indexes).
+        close, spread: Candle close and spread arrays.
+        index_offset: Candle index of the arrays' first row.
+        first_index: First candle covered (default: index_offset).
+    """
+
+    def __init__(self, events: CashEventLog, close: np.ndarray, spread: np.ndarray,
+                 index_offset: int = 0, first_index: Optional[int] = None):
+        self.events = events
+        self._close = close
+        self._spread = spread
+        self.index_offset = index_offset
+        self.first_index = index_offset if first_index is None else max(first_index, index_offset)
+
+    def __len__(self) -> int:
+        return self.index_offset + len(self._close) - self.first_index
+
+    def columns(self, start: Optional[int] = None, stop: Optional[int] = None,
+                step: int = 1) -> Dict[str, np.ndarray]:
+        """Snapshot columns for candles range(start, stop, step), as SnapshotStore.columns().
+
+        start/stop are absolute candle indexes (default: the whole curve).
+        """
+        end = self.index_offset + len(self._close)
+        start = self.first_index if start is None else max(start, self.first_index)
+        stop = end if stop is None else min(stop, end)
+        candles = np.arange(start, stop, step, dtype=np.int64)
+
+        # Event arrays with the initial state in front, at an index before any candle
+        log = self.events.columns()
+        index = np.concatenate(([np.iinfo(np.int64).min], log["index"]))
+        cash = np.concatenate(([self.events.initial_capital], log["cash"]))
+        size = np.concatenate(([0.0], log["position_size"]))
+        avg_entry = np.concatenate(([0.0], log["avg_entry_price"]))
+
+        after = np.searchsorted(index, candles, side="right") - 1
+        before = np.searchsorted(index, candles, side="left") - 1
+        rows = candles - self.index_offset
+        mid = self._close[rows]
+        spread = self._spread[rows]
+
+        # Step 1 mark of the position held before the candle's executions
+        held, held_avg = size[before], avg_entry[before]
+        unrealized = np.zeros(len(candles))
+        long, short = held > 0, held < 0
+        unrealized[long] = (mid[long] - spread[long] / 2.0 - held_avg[long]) * held[long]
+        unrealized[short] = (held_avg[short] - (mid[short] + spread[short] / 2.0)) * np.abs(held[short])
+
+        position = size[after]
+        cash = cash[after]
+        equity = (cash + np.abs(position) * avg_entry[after]) + unrealized
+        return {"index": candles, "cash": cash, "position_size": position,
+                "unrealized_pnl": unrealized, "equity": equity}
+
+    def iter_columns(self, start: Optional[int] = None, stop: Optional[int] = None,
+                     rows: int = 65536) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield columns() for consecutive chunks of at most `rows` candles."""
+        end = self.index_offset + len(self._close)
+        start = self.first_index if start is None else max(start, self.first_index)
+        stop = end if stop is None else min(stop, end)
+        for chunk in range(start, stop, rows):
+            yield self.columns(chunk, min(chunk + rows, stop))
+
+    def to_frame(self, start: Optional[int] = None, stop: Optional[int] = None, step: int = 1,
+                 timestamps: Optional[pd.Index] = None) -> pd.DataFrame:
+        """Return columns() as a DataFrame, as SnapshotStore.to_frame().
+
+        Args:
+            timestamps: Optional index of the candle data; when given, rows
+                are labeled with their candle timestamps (position
+                candle - index_offset) instead of candle indexes.
+        """
+        columns = self.columns(start, stop, step)
+        index = columns.pop("index")
+        frame = pd.DataFrame(columns)
+        if timestamps is not None:
+            frame.index = timestamps[index - self.index_offset]
+        else:
+            frame.index = pd.Index(index, name="index")
+        return frame
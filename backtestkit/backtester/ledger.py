@@ -0,0 +1,176 @@
+# backtester/ledger.py — Trade records and the columnar trade ledger
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Codes used in the ledger's integer columns
+DIRECTION_CODES = {"LONG": 1, "SHORT": -1}
+EXIT_REASON_CODES = {None: 0, "SL": 1, "TP": 2, "CLOSE": 3}
+_DIRECTIONS = {code: name for name, code in DIRECTION_CODES.items()}
+_EXIT_REASONS = {code: name for name, code in EXIT_REASON_CODES.items()}
+
+_COLUMNS = {
+    "direction": np.int8,
+    "entry_price": np.float64,
+    "entry_index": np.int64,
+    "size": np.float64,
+    "sl": np.float64,
+    "tp": np.float64,
+    "exit_price": np.float64,
+    "exit_index": np.int64,
+    "exit_reason": np.int8,
+    "pnl": np.float64,
+}
+
+
+@dataclass
+class Trade:
+    """A completed (or still-open) trade record."""
+    direction: str
+    entry_price: float
+    entry_index: int
+    size: float
+    sl: float
+    tp: float
+    exit_price: Optional[float] = None
+    exit_index: Optional[int] = None
+    exit_reason: Optional[str] = None  # "SL", "TP", "CLOSE", or None if still open
+    pnl: Optional[float] = None
+
+
+class TradeLedger:
+    """Columnar store of trade records addressed by trade id.
+
+    Every trade is one row of parallel NumPy arrays; the trade id is the row
+    number, so each PositionUnit carries the id of its own record and closing
+    it is a direct write instead of a search over all trades. Open trades have
+    exit_reason code 0, NaN exit_price/pnl and exit_index -1.
+
+    Args:
+        capacity: Initial number of rows; grows by doubling.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(max(capacity, 1), dtype=dtype) for name, dtype in _COLUMNS.items()
+        }
+        self._count = 0
+        self._open_count = 0
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> "TradeLedger":
+        """Build a ledger from complete columns (same names and codes as column())."""
+        count = len(columns["pnl"])
+        ledger = cls(capacity=count)
+        for name in _COLUMNS:
+            ledger._columns[name][:count] = columns[name]
+        ledger._count = count
+        ledger._open_count = int(np.count_nonzero(ledger._columns["exit_reason"][:count] == 0))
+        return ledger
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def open_count(self) -> int:
+        """Number of trades without an exit."""
+        return self._open_count
+
+    def open(self, direction: str, entry_price: float, entry_index: int,
+             size: float, sl: float, tp: float) -> int:
+        """Record a new open trade and return its id."""
+        trade_id = self._count
+        if trade_id == len(self._columns["pnl"]):
+            self._grow()
+        cols = self._columns
+        cols["direction"][trade_id] = DIRECTION_CODES[direction]
+        cols["entry_price"][trade_id] = entry_price
+        cols["entry_index"][trade_id] = entry_index
+        cols["size"][trade_id] = size
+        cols["sl"][trade_id] = sl
+        cols["tp"][trade_id] = tp
+        cols["exit_price"][trade_id] = np.nan
+        cols["exit_index"][trade_id] = -1
+        cols["exit_reason"][trade_id] = 0
+        cols["pnl"][trade_id] = np.nan
+        self._count += 1
+        self._open_count += 1
+        return trade_id
+
+    def close(self, trade_id: int, exit_price: float, exit_index: int,
+              reason: str, pnl: float):
+        """Record the exit of an open trade. O(1)."""
+        cols = self._columns
+        if cols["exit_reason"][trade_id] != 0:
+            raise ValueError(f"Trade {trade_id} is already closed")
+        cols["exit_price"][trade_id] = exit_price
+        cols["exit_index"][trade_id] = exit_index
+        cols["exit_reason"][trade_id] = EXIT_REASON_CODES[reason]
+        cols["pnl"][trade_id] = pnl
+        self._open_count -= 1
+
+    def is_open(self, trade_id: int) -> bool:
+        return self._columns["exit_reason"][trade_id] == 0
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a read-only view of one column, trimmed to the recorded trades."""
+        view = self._columns[name][:self._count]
+        view.flags.writeable = False
+        return view
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return read-only views of all columns."""
+        return {name: self.column(name) for name in self._columns}
+
+    def drain_closed(self) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """Remove the closed trades, keeping the open ones in entry order.
+
+        Returns:
+            (closed, new_ids): copies of the closed trades' columns, and the
+            new id of every previous trade id (-1 for the removed ones).
+        """
+        count = self._count
+        is_open = self._columns["exit_reason"][:count] == 0
+        closed = {name: values[:count][~is_open] for name, values in self._columns.items()}
+        for values in self._columns.values():
+            values[:self._open_count] = values[:count][is_open]
+        new_ids = np.where(is_open, np.cumsum(is_open) - 1, -1)
+        self._count = self._open_count
+        return closed, new_ids
+
+    def trade(self, trade_id: int) -> Trade:
+        """Materialize a single Trade record."""
+        return self._materialize(trade_id, trade_id + 1)[0]
+
+    def to_trades(self) -> List[Trade]:
+        """Materialize all records as Trade objects, in entry order."""
+        return self._materialize(0, self._count)
+
+    def _materialize(self, start: int, stop: int) -> List[Trade]:
+        cols = {name: values[start:stop].tolist() for name, values in self._columns.items()}
+        trades = []
+        for row in zip(*cols.values()):
+            (direction, entry_price, entry_index, size, sl, tp,
+             exit_price, exit_index, exit_reason, pnl) = row
+            is_open = exit_reason == 0
+            trades.append(Trade(
+                direction=_DIRECTIONS[direction],
+                entry_price=entry_price,
+                entry_index=entry_index,
+                size=size,
+                sl=sl,
+                tp=tp,
+                exit_price=None if is_open else exit_price,
+                exit_index=None if is_open else exit_index,
+                exit_reason=_EXIT_REASONS[exit_reason],
+                pnl=None if is_open else pnl,
+            ))
+        return trades
+
+    def _grow(self):
+        for name, values in self._columns.items():
+            grown = np.empty(len(values) * 2, dtype=values.dtype)
+            grown[:len(values)] = values
+            self._columns[name] = grown
@@ -0,0 +1,421 @@
+# backtester/lockstep.py — N SL/TP configurations of one signal stream, simulated at once
+
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtester.engine import BacktestResult, _column
+from backtester.execution_modes import calculate_fee, resolve_entry_price, resolve_exit_price
+from backtester.ledger import DIRECTION_CODES, EXIT_REASON_CODES, TradeLedger
+from backtester.snapshots import SnapshotStore
+from common.models import ExecutionMode
+from strategies.signals import Signal, SignalBatch
+
+# Per-trade columns: one row per entry signal, one column per configuration
+_TRADE_COLUMNS = {
+    "size": np.float64,        # units bought (ledger size)
+    "unit_size": np.float64,   # units still held by the position unit
+    "sl": np.float64,
+    "tp": np.float64,
+    "exit_price": np.float64,
+    "exit_index": np.int64,
+    "exit_reason": np.int8,
+    "pnl": np.float64,
+    "opened": bool,            # the entry executed for this configuration
+    "in_book": bool,           # the position unit is still held
+}
+
+_SL, _TP, _CLOSE = EXIT_REASON_CODES["SL"], EXIT_REASON_CODES["TP"], EXIT_REASON_CODES["CLOSE"]
+
+
+class LockstepEngine:
+    """Backtest N SL/TP configurations of one signal stream in lockstep.
+
+    Signal timing is shared by all configurations; only the SL/TP levels of
+    the entries differ. Cash, position_size, avg_entry_price and PnL are
+    length-N arrays and every signal is executed for all configurations
+    with the same operations as BacktestEngine, vectorized over N.
+
+    Between two signal executions only SL/TP exits can happen, and they do
+    not depend on each other. For each open unit the first candle reaching
+    its SL or TP is found for all configurations at once by binary search in
+    the running min(low) / max(high) of the span, so the cost is one pass
+    over the candles plus O(units * N * log span) per signal, not N runs.
+    Exits are applied in candle order (entry order within a candle), and
+    results are bit-identical to running BacktestEngine once per
+    configuration.
+
+    SL/TP levels are given either as percentages of the signal candle's
+    close (sl_pct/tp_pct, one value per configuration; the
+    MACrossoverStrategy formulas, so its signals can be generated once and
+    re-levelled here) or as explicit (N, len(signals)) level arrays.
+
+    Only final state and trades are kept: each result's snapshot store is
+    empty (mode "none").
+
+    Args:
+        data: 1-min OHLC DataFrame.
+        signals: Signal stream shared by all configurations.
+        mode: Execution mode.
+        initial_capital: Starting capital of every configuration.
+        sl_pct: SL distance per configuration (LONG: close * (1 - sl_pct),
+            SHORT: close * (1 + sl_pct)); broadcast against tp_pct.
+        tp_pct: TP distance per configuration (LONG: close * (1 + tp_pct),
+            SHORT: close * (1 - tp_pct)).
+        stop_loss_levels: Instead of the percentages, an array
+            (N, len(signals)) of SL levels per configuration and signal row
+            (CLOSE rows are ignored).
+        take_profit_levels: Same shape, TP levels.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        signals: Union[List[Signal], SignalBatch],
+        mode: ExecutionMode,
+        initial_capital: float,
+        sl_pct=None,
+        tp_pct=None,
+        stop_loss_levels: Optional[np.ndarray] = None,
+        take_profit_levels: Optional[np.ndarray] = None,
+    ):
+        if not isinstance(signals, SignalBatch):
+            signals = SignalBatch.from_signals(signals)
+
+        if sl_pct is not None and tp_pct is not None:
+            if stop_loss_levels is not None or take_profit_levels is not None:
+                raise ValueError("Give either sl_pct/tp_pct or SL/TP level arrays, not both")
+            sl_pct, tp_pct = np.broadcast_arrays(
+                np.atleast_1d(np.asarray(sl_pct, dtype=np.float64)),
+                np.atleast_1d(np.asarray(tp_pct, dtype=np.float64)),
+            )
+            n_configs = len(sl_pct)
+        elif stop_loss_levels is not None and take_profit_levels is not None:
+            stop_loss_levels = np.atleast_2d(np.asarray(stop_loss_levels, dtype=np.float64))
+            take_profit_levels = np.atleast_2d(np.asarray(take_profit_levels, dtype=np.float64))
+            if stop_loss_levels.shape != take_profit_levels.shape:
+                raise ValueError("stop_loss_levels and take_profit_levels must have the same shape")
+            if stop_loss_levels.shape[1] != len(signals):
+                raise ValueError("SL/TP level arrays must have one column per signal")
+            n_configs = stop_loss_levels.shape[0]
+        else:
+            raise ValueError("Give sl_pct and tp_pct, or stop_loss_levels and take_profit_levels")
+
+        self.data = data
+        self.signal_batch = signals
+        self.mode = mode
+        self.initial_capital = initial_capital
+        self.sl_pct = sl_pct
+        self.tp_pct = tp_pct
+        self.stop_loss_levels = stop_loss_levels
+        self.take_profit_levels = take_profit_levels
+        self.n_configs = n_configs
+        self._signal_candles, self._signal_offsets = signals.groups()
+
+        self._open = _column(data, "open")
+        self._high = _column(data, "high")
+        self._low = _column(data, "low")
+        self._close = _column(data, "close")
+        self._spread = _column(data, "spread")
+
+    def run(self, materialize_trades: bool = True) -> List[BacktestResult]:
+        """Run all configurations; returns one BacktestResult per configuration.
+
+        With materialize_trades=False, result.trades stays empty and the
+        trades are only available column-wise in result.ledger, which skips
+        building Trade objects for every configuration.
+        """
+        n_configs = self.n_configs
+        self.cash = np.full(n_configs, float(self.initial_capital))
+        self.position_size = np.zeros(n_configs)
+        self.avg_entry_price = np.zeros(n_configs)
+        self.realized_pnl = np.zeros(n_configs)
+        self.unrealized_pnl = np.zeros(n_configs)
+
+        # Trades: row j is the j-th executed entry signal
+        self._trades: Dict[str, np.ndarray] = {
+            name: np.zeros((16, n_configs), dtype=dtype) for name, dtype in _TRADE_COLUMNS.items()
+        }
+        self._trade_direction: List[int] = []
+        self._trade_entry_price: List[float] = []
+        self._trade_entry_index: List[int] = []
+        self._held: List[int] = []  # trade rows whose unit is in some configuration's book
+        self._checked = 0           # next candle whose SL/TP has not been evaluated
+
+        n = len(self.data)
+        if n > 0:
+            # Same executable groups as the engine: signal candle in [0, n - 1)
+            groups = np.flatnonzero((self._signal_candles >= 0) & (self._signal_candles < n - 1))
+            for group in groups.tolist():
+                execution_candle = int(self._signal_candles[group]) + 1
+                # Step 2 (SL/TP) runs before step 3 (pending signals) on that candle
+                self._advance(execution_candle + 1)
+                self._execute_group(group, execution_candle)
+            self._advance(n)
+
+        return [self._result(k, materialize_trades) for k in range(n_configs)]
+
+    # --- SL/TP spans ---
+
+    def _advance(self, stop: int):
+        """Evaluate SL/TP on candles [checked, stop), marking unrealized PnL at the last candle."""
+        last = len(self.data) - 1
+        if self._checked <= last < stop:
+            # Step 1 of the last candle sees the state before its own exits
+            self._check_span(self._checked, last)
+            self._mark_unrealized(last)
+        self._check_span(self._checked, stop)
+
+    def _check_span(self, start: int, stop: int):
+        if start >= stop:
+            return
+        self._checked = stop
+        if not self._held:
+            return
+
+        span = stop - start
+        run_low = -np.minimum.accumulate(self._low[start:stop])   # non-decreasing
+        run_high = np.maximum.accumulate(self._high[start:stop])  # non-decreasing
+
+        rows = np.asarray(self._held)
+        trades = self._trades
+        in_book = trades["in_book"][rows]
+        sl = trades["sl"][rows]
+        tp = trades["tp"][rows]
+        is_long = (np.asarray(self._trade_direction)[rows] == 1)[:, None]
+
+        # First candle of the span at or below each low level / at or above each high level
+        low_levels = np.where(is_long, sl, tp)
+        high_levels = np.where(is_long, tp, sl)
+        first_low = np.searchsorted(run_low, -low_levels.ravel(), side="left").reshape(sl.shape)
+        first_high = np.searchsorted(run_high, high_levels.ravel(), side="left").reshape(sl.shape)
+        first_sl = np.where(is_long, first_low, first_high)
+        first_tp = np.where(is_long, first_high, first_low)
+        # Worst-case rule: SL wins when both are reached on the same candle
+        exit_at = np.where(in_book, np.minimum(first_sl, first_tp), span)
+        exit_is_sl = first_sl <= first_tp
+
+        # Apply exits in candle order, entry order within a candle (stable sort)
+        order = np.argsort(exit_at, axis=0, kind="stable")
+        for rank in range(len(rows)):
+            unit = order[rank]
+            offset = exit_at[unit, np.arange(self.n_configs)]
+            configs = np.flatnonzero(offset < span)
+            if configs.size == 0:
+                break
+            unit = unit[configs]
+            is_sl = exit_is_sl[unit, configs]
+            level = np.where(is_sl, sl[unit, configs], tp[unit, configs])
+            long = is_long[unit, 0]
+            candle = start + offset[configs]
+            if self.mode == ExecutionMode.SPREAD_OFF:
+                exit_price = level
+            else:
+                half_spread = self._spread[candle] / 2.0
+                exit_price = np.where(long, level - half_spread, level + half_spread)
+            self._close_units(rows[unit], configs, exit_price, candle,
+                              np.where(is_sl, _SL, _TP))
+
+        self._drop_closed_rows()
+
+    def _close_units(self, rows: np.ndarray, configs: np.ndarray, exit_price: np.ndarray,
+                     candle: np.ndarray, reason: np.ndarray):
+        """Close one unit per configuration at an SL/TP price (BacktestEngine._close_unit_at_price)."""
+        trades = self._trades
+        entry_price = np.asarray(self._trade_entry_price)[rows]
+        long = np.asarray(self._trade_direction)[rows] == 1
+        size = trades["unit_size"][rows, configs]
+
+        pnl = np.where(long, (exit_price - entry_price) * size, (entry_price - exit_price) * size)
+        pnl = pnl - calculate_fee(exit_price * size, self.mode)
+        self.cash[configs] += entry_price * size + pnl
+        self.realized_pnl[configs] += pnl
+
+        position = self.position_size[configs]
+        position = np.where(long, position - size, position + size)
+        flat = np.abs(position) < 1e-12
+        self.position_size[configs] = np.where(flat, 0.0, position)
+        self.avg_entry_price[configs] = np.where(flat, 0.0, self.avg_entry_price[configs])
+
+        trades["in_book"][rows, configs] = False
+        self._record_exit(rows, configs, exit_price, candle, reason, pnl)
+
+    # --- Signals ---
+
+    def _execute_group(self, group: int, candle: int):
+        """Execute one candle's signals for every configuration (CLOSE rows come first)."""
+        batch = self.signal_batch
+        mid = float(self._open[candle])
+        spread = float(self._spread[candle])
+        for row in range(int(self._signal_offsets[group]), int(self._signal_offsets[group + 1])):
+            code = int(batch.signal_type[row])
+            size = float(batch.size[row])
+            if code == 0:
+                self._execute_close(size, mid, spread, candle)
+            else:
+                direction = "LONG" if code == 1 else "SHORT"
+                self._execute_entry(direction, size, row, mid, spread, candle)
+
+    def _execute_close(self, size: float, mid: float, spread: float, candle: int):
+        configs = np.flatnonzero(self.position_size != 0.0)
+        if configs.size == 0:
+            return
+        position = self.position_size[configs]
+        avg_entry = self.avg_entry_price[configs]
+        long = position > 0
+        exit_price = np.where(long, resolve_exit_price(mid, spread, "LONG", self.mode),
+                              resolve_exit_price(mid, spread, "SHORT", self.mode))
+
+        # Portfolio.close_position
+        units = np.abs(position) * size
+        pnl = np.where(long, (exit_price - avg_entry) * units, (avg_entry - exit_price) * units)
+        fee = calculate_fee(exit_price * units, self.mode)
+        self.cash[configs] += avg_entry * units + pnl - fee
+        self.realized_pnl[configs] += pnl - fee
+
+        trades = self._trades
+        if size >= 1.0:
+            self.position_size[configs] = 0.0
+            self.avg_entry_price[configs] = 0.0
+            # Every held unit closes at the signal's exit price
+            for row in list(self._held):
+                held = configs[trades["in_book"][row, configs]]
+                if held.size == 0:
+                    continue
+                held_exit = exit_price[np.searchsorted(configs, held)]
+                unit_size = trades["unit_size"][row, held]
+                entry_price = self._trade_entry_price[row]
+                if self._trade_direction[row] == 1:
+                    unit_pnl = (held_exit - entry_price) * unit_size
+                else:
+                    unit_pnl = (entry_price - held_exit) * unit_size
+                unit_pnl = unit_pnl - calculate_fee(held_exit * unit_size, self.mode)
+                trades["in_book"][row, held] = False
+                rows = np.full(held.size, row)
+                self._record_exit(rows, held, held_exit, np.full(held.size, candle),
+                                  np.full(held.size, _CLOSE), unit_pnl)
+        else:
+            self.position_size[configs] = np.where(long, position - units, position + units)
+            # PositionBook.reduce: units left with <= 1e-12 leave the book (their trades stay open)
+            for row in self._held:
+                held = configs[trades["in_book"][row, configs]]
+                remaining = trades["unit_size"][row, held] - trades["unit_size"][row, held] * size
+                trades["unit_size"][row, held] = remaining
+                trades["in_book"][row, held] = remaining > 1e-12
+        self._drop_closed_rows()
+
+    def _execute_entry(self, direction: str, size: float, row: int,
+                       mid: float, spread: float, candle: int):
+        actual_entry = resolve_entry_price(mid, spread, direction, self.mode)
+        allocation = self.cash * size
+        effective_allocation = allocation - calculate_fee(allocation, self.mode)
+        configs = np.flatnonzero((self.cash > 0) & (effective_allocation > 0))
+        if configs.size == 0:
+            return
+
+        position = self.position_size[configs]
+        opposite = position < 0 if direction == "LONG" else position > 0
+        if opposite.any():
+            raise ValueError(
+                f"Cannot open {direction} while holding {'SHORT' if direction == 'LONG' else 'LONG'} "
+                f"position. Strategy must emit a CLOSE signal before reversing direction."
+            )
+
+        # Portfolio.open_position
+        new_units = effective_allocation[configs] / actual_entry
+        signed_units = new_units if direction == "LONG" else -new_units
+        fresh = position == 0.0
+        old_size = np.abs(position)
+        stacked_avg = ((self.avg_entry_price[configs] * old_size + actual_entry * new_units)
+                       / (old_size + new_units))
+        self.avg_entry_price[configs] = np.where(fresh, actual_entry, stacked_avg)
+        self.position_size[configs] = np.where(fresh, signed_units, position + signed_units)
+        self.cash[configs] -= allocation[configs]
+
+        trade = self._new_trade(direction, actual_entry, candle)
+        trades = self._trades
+        trades["size"][trade, configs] = new_units
+        trades["unit_size"][trade, configs] = new_units
+        sl, tp = self._levels(direction, row, configs)
+        trades["sl"][trade, configs] = sl
+        trades["tp"][trade, configs] = tp
+        trades["opened"][trade, configs] = True
+        trades["in_book"][trade, configs] = True
+        self._held.append(trade)
+
+    def _levels(self, direction: str, row: int, configs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """SL and TP levels of signal `row` for `configs`."""
+        if self.sl_pct is None:
+            return self.stop_loss_levels[configs, row], self.take_profit_levels[configs, row]
+        signal_close = float(self._close[int(self.signal_batch.timestamp_index[row])])
+        sl_pct, tp_pct = self.sl_pct[configs], self.tp_pct[configs]
+        if direction == "LONG":
+            return signal_close * (1 - sl_pct), signal_close * (1 + tp_pct)
+        return signal_close * (1 + sl_pct), signal_close * (1 - tp_pct)
+
+    # --- Bookkeeping ---
+
+    def _new_trade(self, direction: str, entry_price: float, candle: int) -> int:
+        trade = len(self._trade_direction)
+        if trade == len(self._trades["pnl"]):
+            for name, values in self._trades.items():
+                grown = np.zeros((len(values) * 2, self.n_configs), dtype=values.dtype)
+                grown[:len(values)] = values
+                self._trades[name] = grown
+        self._trade_direction.append(DIRECTION_CODES[direction])
+        self._trade_entry_price.append(entry_price)
+        self._trade_entry_index.append(candle)
+        trades = self._trades
+        trades["exit_price"][trade] = np.nan
+        trades["exit_index"][trade] = -1
+        trades["pnl"][trade] = np.nan
+        return trade
+
+    def _record_exit(self, rows, configs, exit_price, candle, reason, pnl):
+        trades = self._trades
+        trades["exit_price"][rows, configs] = exit_price
+        trades["exit_index"][rows, configs] = candle
+        trades["exit_reason"][rows, configs] = reason
+        trades["pnl"][rows, configs] = pnl
+
+    def _drop_closed_rows(self):
+        in_book = self._trades["in_book"]
+        self._held = [row for row in self._held if in_book[row].any()]
+
+    def _mark_unrealized(self, candle: int):
+        """Portfolio.update_unrealized for every configuration."""
+        mid = float(self._close[candle])
+        spread = float(self._spread[candle])
+        position = self.position_size
+        long_pnl = (mid - spread / 2.0 - self.avg_entry_price) * position
+        short_pnl = (self.avg_entry_price - (mid + spread / 2.0)) * np.abs(position)
+        self.unrealized_pnl = np.where(position == 0.0, 0.0,
+                                       np.where(position > 0, long_pnl, short_pnl))
+
+    def _result(self, config: int, materialize_trades: bool) -> BacktestResult:
+        trades = self._trades
+        count = len(self._trade_direction)
+        rows = np.flatnonzero(trades["opened"][:count, config])
+        columns = {
+            "direction": np.asarray(self._trade_direction, dtype=np.int8)[rows],
+            "entry_price": np.asarray(self._trade_entry_price, dtype=np.float64)[rows],
+            "entry_index": np.asarray(self._trade_entry_index, dtype=np.int64)[rows],
+        }
+        for name in ("size", "sl", "tp", "exit_price", "exit_index", "exit_reason", "pnl"):
+            columns[name] = trades[name][rows, config]
+        ledger = TradeLedger.from_columns(columns)
+
+        cash = float(self.cash[config])
+        position_notional = abs(float(self.position_size[config])) * float(self.avg_entry_price[config])
+        unrealized = float(self.unrealized_pnl[config])
+        return BacktestResult(
+            trades=ledger.to_trades() if materialize_trades else [],
+            snapshots=SnapshotStore(mode="none"),
+            final_equity=cash + position_notional + unrealized,
+            realized_pnl=float(self.realized_pnl[config]),
+            unrealized_pnl=unrealized,
+            ledger=ledger,
+            candles=len(self.data),
+        )
+
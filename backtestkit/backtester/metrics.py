@@ -1 +1,288 @@
 # backtester/metrics.py — Performance calculations (Phase 8)
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+# 1-min candles per trading year (252 sessions of 390 minutes)
+PERIODS_PER_YEAR = 252 * 390
+
+# Keys of the dict returned by compute_metrics, in spec §11 order
+METRIC_NAMES = (
+    "total_return",
+    "annualized_return",
+    "max_drawdown",
+    "sharpe_ratio",
+    "win_rate",
+    "profit_factor",
+    "avg_trade",
+    "total_trades",
+    "exposure_time",
+)
+
+
+def compute_metrics(result, initial_capital: float) -> Dict[str, float]:
+    """Return the spec §11 metrics of a BacktestResult as a plain dict (METRIC_NAMES keys).
+
+    Equity-based metrics (max drawdown, Sharpe, exposure) come from the
+    result's snapshots (rebuilt from result.equity_curve in snapshot_mode
+    "events") and are NaN when it has none (snapshot_mode "none").
+    """
+    snapshots = snapshot_columns(result)
+    ledger = result.ledger
+    if ledger is not None:
+        pnl, exit_reason = ledger.column("pnl"), ledger.column("exit_reason")
+    else:
+        pnl = np.array([np.nan if t.pnl is None else t.pnl for t in result.trades])
+        exit_reason = np.where(np.isnan(pnl), 0, 1)
+    return metrics_from_arrays(
+        initial_capital=initial_capital,
+        final_equity=result.final_equity,
+        candles=result.candles or len(snapshots["index"]),
+        trade_pnl=pnl[exit_reason != 0],
+        index=snapshots["index"] if len(snapshots["index"]) else None,
+        equity=snapshots["equity"] if len(snapshots["index"]) else None,
+        position_size=snapshots["position_size"] if len(snapshots["index"]) else None,
+    )
+
+
+def snapshot_columns(result) -> Dict[str, np.ndarray]:
+    """Snapshot columns of a BacktestResult, rebuilding them from result.equity_curve if set."""
+    equity_curve = getattr(result, "equity_curve", None)
+    if equity_curve is not None:
+        return equity_curve.columns()
+    return result.snapshots.columns()
+
+
+def metrics_from_arrays(
+    initial_capital: float,
+    final_equity: float,
+    candles: int,
+    trade_pnl: np.ndarray,
+    index: Optional[np.ndarray] = None,
+    equity: Optional[np.ndarray] = None,
+    position_size: Optional[np.ndarray] = None,
+) -> Dict[str, float]:
+    """Compute the spec §11 metrics from columnar arrays in one vectorized pass.
+
+    Snapshot rows may be decimated: row k stands for candles index[k] up to
+    the next row (the last one up to index[0] + candles), with the per-candle
+    return of the skipped candles taken as zero. That is exact for "all" and
+    "on_change" snapshots (values are constant between kept rows) and an
+    approximation for "every_n".
+
+    Args:
+        initial_capital: Starting capital (the first equity peak and return base).
+        final_equity: Final equity of the result.
+        candles: Number of simulated candles.
+        trade_pnl: PnL of every completed trade; win rate, profit factor and
+            avg_trade all come from it, so partial closes (realized but not
+            trades) do not count towards avg_trade.
+        index, equity, position_size: Snapshot columns (None when not recorded).
+
+    Returns:
+        Dict with METRIC_NAMES keys; total_trades is an int, the rest floats.
+    """
+    max_drawdown = sharpe_ratio = exposure_time = math.nan
+    if equity is not None and len(equity):
+        # Running-max drawdown, starting from the initial capital as first peak
+        curve = np.concatenate(([initial_capital], equity))
+        peak = np.maximum.accumulate(curve)
+        max_drawdown = float(np.max((peak - curve) / peak))
+
+        # Per-candle returns; candles between kept rows have a zero return
+        returns = curve[1:] / curve[:-1] - 1.0
+        sharpe_ratio = _sharpe(returns, candles)
+
+        durations = np.diff(index, append=index[0] + candles)
+        exposure_time = float(durations[position_size != 0.0].sum() / candles)
+
+    wins = trade_pnl[trade_pnl > 0]
+    losses = trade_pnl[trade_pnl < 0]
+    return _metric_dict(
+        initial_capital, final_equity, candles,
+        max_drawdown, sharpe_ratio, exposure_time,
+        total_trades=len(trade_pnl), wins=len(wins),
+        # Summed in trade order, as MetricAccumulator.record_trade does
+        gross_profit=sum(wins.tolist()), gross_loss=-sum(losses.tolist()),
+    )
+
+
+class MetricAccumulator:
+    """Running spec §11 metrics, updated by the engine as it records each candle.
+
+    Keeps O(1) state (peak equity and max drawdown, Welford mean and M2 of
+    the per-candle returns, candles with an open position, win/loss
+    aggregates of closed trades), so the full metric set is available
+    without stored snapshots. Values agree with metrics_from_arrays over
+    "all" snapshots up to floating-point rounding (drawdown, exposure and
+    the counts are exact; runs of candles given to extend() are merged into
+    the return moments with Chan's update, so Sharpe can differ in the last
+    bits between engine cores).
+
+    Args:
+        initial_capital: Starting capital (first equity peak and return base).
+    """
+
+    def __init__(self, initial_capital: float):
+        self.initial_capital = initial_capital
+        self.last_equity = initial_capital
+        self.peak = initial_capital
+        self.max_drawdown = 0.0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.exposed = 0
+        self.trades = 0
+        self.wins = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+
+    @classmethod
+    def from_state(cls, initial_capital: float, state: Dict[str, float]) -> "MetricAccumulator":
+        """Rebuild an accumulator from state()."""
+        accumulator = cls(initial_capital)
+        for name in _ACCUMULATOR_FIELDS:
+            setattr(accumulator, name, state[name])
+        return accumulator
+
+    def state(self) -> Dict[str, float]:
+        """Return the running state as plain numbers (for checkpoints)."""
+        return {name: getattr(self, name) for name in _ACCUMULATOR_FIELDS}
+
+    def append(self, equity: float, position_size: float):
+        """Record one candle."""
+        r = equity / self.last_equity - 1.0
+        self.last_equity = equity
+        self.count += 1
+        delta = r - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (r - self.mean)
+
+        if equity > self.peak:
+            self.peak = equity
+        drawdown = (self.peak - equity) / self.peak
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+        if position_size != 0.0:
+            self.exposed += 1
+
+    def extend(self, equity, position_size):
+        """Record a run of consecutive candles.
+
+        equity is an array (or list) with one value per candle;
+        position_size is the same or a scalar constant over the run.
+        """
+        equity = np.asarray(equity, dtype=np.float64)
+        n = len(equity)
+        if n == 0:
+            return
+        previous = np.empty(n)
+        previous[0] = self.last_equity
+        previous[1:] = equity[:-1]
+        returns = equity / previous - 1.0
+        self.last_equity = float(equity[-1])
+
+        # Chan et al. pairwise update of the return moments
+        mean = float(returns.sum()) / n
+        returns -= mean
+        m2 = float(np.dot(returns, returns))
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+        peak = np.maximum.accumulate(equity)
+        np.maximum(peak, self.peak, out=peak)
+        self.peak = float(peak[-1])
+        drawdown = float(((peak - equity) / peak).max())
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+        if np.ndim(position_size):
+            self.exposed += int(np.count_nonzero(np.asarray(position_size) != 0.0))
+        elif position_size != 0.0:
+            self.exposed += n
+
+    def record_trade(self, pnl: float):
+        """Record the PnL of a closed trade."""
+        self.trades += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.gross_loss -= pnl
+
+    def metrics(self, final_equity: float) -> Dict[str, float]:
+        """Return the metrics dict (METRIC_NAMES keys) of the candles recorded so far."""
+        count = self.count
+        sharpe_ratio = exposure_time = max_drawdown = math.nan
+        if count:
+            max_drawdown = self.max_drawdown
+            sharpe_ratio = _annualized_sharpe(self.mean, self.m2, count)
+            exposure_time = self.exposed / count
+        return _metric_dict(
+            self.initial_capital, final_equity, count,
+            max_drawdown, sharpe_ratio, exposure_time,
+            total_trades=self.trades, wins=self.wins,
+            gross_profit=self.gross_profit, gross_loss=self.gross_loss,
+        )
+
+
+_ACCUMULATOR_FIELDS = ("last_equity", "peak", "max_drawdown", "count", "mean", "m2",
+                       "exposed", "trades", "wins", "gross_profit", "gross_loss")
+
+
+def _metric_dict(initial_capital: float, final_equity: float, candles: int,
+                 max_drawdown: float, sharpe_ratio: float, exposure_time: float,
+                 total_trades: int, wins: int, gross_profit: float, gross_loss: float
+                 ) -> Dict[str, float]:
+    total_return = (final_equity - initial_capital) / initial_capital
+    growth = 1.0 + total_return
+    if candles <= 0:
+        annualized_return = 0.0
+    elif growth <= 0:
+        annualized_return = -1.0
+    else:
+        try:
+            annualized_return = growth ** (PERIODS_PER_YEAR / candles) - 1.0
+        except OverflowError:
+            annualized_return = math.inf
+
+    if gross_loss > 0:
+        profit_factor = gross_profit / gross_loss
+    else:
+        profit_factor = math.inf if wins else 0.0
+
+    return {
+        "total_return": total_return,
+        "annualized_return": annualized_return,
+        "max_drawdown": max_drawdown,
+        "sharpe_ratio": sharpe_ratio,
+        "win_rate": wins / total_trades if total_trades else 0.0,
+        "profit_factor": profit_factor,
+        "avg_trade": (gross_profit - gross_loss) / total_trades if total_trades else 0.0,
+        "total_trades": total_trades,
+        "exposure_time": exposure_time,
+    }
+
+
+def _sharpe(returns: np.ndarray, count: int) -> float:
+    """Annualized Sharpe of `count` per-candle returns, of which only `returns` are non-zero."""
+    if count < 2:
+        return 0.0
+    mean = float(returns.sum()) / count
+    deviations = returns - mean
+    m2 = float(np.dot(deviations, deviations)) + (count - len(returns)) * mean * mean
+    return _annualized_sharpe(mean, m2, count)
+
+
+def _annualized_sharpe(mean: float, m2: float, count: int) -> float:
+    """Sharpe from the return mean and sum of squared deviations (sample std).
+
+    0.0 when the standard deviation is zero or undefined.
+    """
+    if count < 2 or m2 <= 0.0:
+        return 0.0
+    return mean / math.sqrt(m2 / (count - 1)) * math.sqrt(PERIODS_PER_YEAR)
@@ -0,0 +1,133 @@
+# backtester/multires.py — Hierarchical multi-resolution SL/TP scan
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from common.market_data import MarketData, column, timestamps
+from common.pyramid import build_pyramid
+
+DEFAULT_TIMEFRAMES = ("60min", "15min", "5min")
+
+# Initial and maximum number of coarsest-level bars checked per array pass
+_MIN_WINDOW = 64
+_MAX_WINDOW = 16384
+
+
+@dataclass
+class _Level:
+    """One resampled level: bar lows/highs and the 1-min rows [row_start, row_end) of each bar."""
+    low: np.ndarray
+    high: np.ndarray
+    row_start: np.ndarray
+    row_end: np.ndarray
+
+
+class MultiResolutionScanner:
+    """First-touch SL/TP lookup that checks coarse bars before 1-min candles.
+
+    Levels come from common.pyramid.build_pyramid (shared through the
+    indicator cache) and are scanned coarsest first. A coarse
+    bar's high is the max of its 1-min highs and its low the min of its
+    1-min lows, so a bar whose range does not reach a level cannot contain a
+    1-min candle that does. The scan only drills into bars that cross a
+    level, and answers come from the 1-min candles themselves: results are
+    identical to a candle-by-candle scan.
+
+    Args:
+        data: 1-min DataFrame with a sorted DatetimeIndex and OHLC + spread
+            columns, or a MarketData.
+        timeframes: Resample frequencies, coarsest first.
+    """
+
+    def __init__(self, data: Union[pd.DataFrame, MarketData],
+                 timeframes: Sequence[str] = DEFAULT_TIMEFRAMES):
+        rows = timestamps(data)
+        if np.any(rows[1:] < rows[:-1]):
+            raise ValueError("Multi-resolution scan requires a sorted DatetimeIndex")
+
+        self.timeframes = tuple(timeframes)
+        self._low = column(data, "low")
+        self._high = column(data, "high")
+
+        pyramid = build_pyramid(data, self.timeframes)
+        self._levels: List[_Level] = []
+        for timeframe in self.timeframes:
+            level = pyramid[timeframe]
+            self._levels.append(_Level(
+                low=column(level.bars, "low"),
+                high=column(level.bars, "high"),
+                row_start=level.first_row,
+                row_end=level.last_row + 1,
+            ))
+
+    def __len__(self) -> int:
+        return len(self._low)
+
+    def first_touch(self, start: int, low_level: float, high_level: float,
+                    stop: Optional[int] = None) -> int:
+        """Return the first index i in [start, stop) with low <= low_level or high >= high_level.
+
+        Same contract as RangeMinMaxIndex.first_touch: returns `stop`
+        (default: len) when no candle in the range reaches either level.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = max(start, 0)
+        if start >= stop:
+            return stop
+        if not self._levels:
+            return self._scan_rows(start, stop, low_level, high_level)
+
+        # Coarsest level: check bars in growing windows
+        top = self._levels[0]
+        first_bar = int(np.searchsorted(top.row_end, start, side="right"))
+        last_bar = int(np.searchsorted(top.row_start, stop, side="left"))
+        window = _MIN_WINDOW
+        while first_bar < last_bar:
+            end_bar = min(first_bar + window, last_bar)
+            found = self._scan_bars(0, first_bar, end_bar, start, stop, low_level, high_level)
+            if found < stop:
+                return found
+            first_bar = end_bar
+            window = min(window * 2, _MAX_WINDOW)
+        return stop
+
+    def _scan_level(self, depth: int, start: int, stop: int,
+                    low_level: float, high_level: float) -> int:
+        """Return the first touching row in [start, stop) using levels from `depth` down."""
+        if depth == len(self._levels):
+            return self._scan_rows(start, stop, low_level, high_level)
+        level = self._levels[depth]
+        first_bar = int(np.searchsorted(level.row_end, start, side="right"))
+        last_bar = int(np.searchsorted(level.row_start, stop, side="left"))
+        return self._scan_bars(depth, first_bar, last_bar, start, stop, low_level, high_level)
+
+    def _scan_bars(self, depth: int, first_bar: int, last_bar: int, start: int, stop: int,
+                   low_level: float, high_level: float) -> int:
+        """Drill into the bars [first_bar, last_bar) of a level whose range crosses a level.
+
+        Bars cut by [start, stop) may cross only outside the range, so every
+        crossing bar is tried in order until one yields a row.
+        """
+        level = self._levels[depth]
+        crossing = np.flatnonzero(
+            (level.low[first_bar:last_bar] <= low_level)
+            | (level.high[first_bar:last_bar] >= high_level)
+        )
+        for offset in crossing.tolist():
+            bar = first_bar + offset
+            row_from = max(int(level.row_start[bar]), start)
+            row_to = min(int(level.row_end[bar]), stop)
+            found = self._scan_level(depth + 1, row_from, row_to, low_level, high_level)
+            if found < row_to:
+                return found
+        return stop
+
+    def _scan_rows(self, start: int, stop: int, low_level: float, high_level: float) -> int:
+        """Check 1-min candles [start, stop) directly."""
+        hits = np.flatnonzero(
+            (self._low[start:stop] <= low_level) | (self._high[start:stop] >= high_level)
+        )
+        return start + int(hits[0]) if hits.size else stop
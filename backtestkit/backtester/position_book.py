@@ -0,0 +1,182 @@
+# backtester/position_book.py — Array-backed book of open position units
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backtester.sl_tp import PositionUnit
+from common.models import ExecutionMode
+
+_DIRECTIONS = {"LONG": 1, "SHORT": -1}
+_NAMES = {1: "LONG", -1: "SHORT"}
+_FIELDS = ("direction", "entry_price", "size", "sl", "tp", "trade_id")
+
+
+class PositionBook:
+    """Open position units stored as parallel NumPy arrays.
+
+    Holds the same fields as PositionUnit (direction, entry_price, size, sl,
+    tp, trade_id), one slot per stacked entry, in entry order. SL/TP for all
+    units is evaluated with one vectorized comparison per candle and closed
+    units are dropped by compaction, so holding hundreds of layers stays cheap.
+
+    The book also caches its touch levels: a candle can only trigger some
+    unit if low <= touch_low or high >= touch_high.
+
+    Args:
+        capacity: Initial number of slots; grows by doubling.
+    """
+
+    def __init__(self, capacity: int = 16):
+        capacity = max(capacity, 1)
+        self.direction = np.empty(capacity, dtype=np.int8)
+        self.entry_price = np.empty(capacity)
+        self.size = np.empty(capacity)
+        self.sl = np.empty(capacity)
+        self.tp = np.empty(capacity)
+        self.trade_id = np.empty(capacity, dtype=np.int64)
+        self._count = 0
+        self._touch_levels = (-math.inf, math.inf)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> "PositionBook":
+        """Build a book from columns as returned by columns()."""
+        count = len(columns["size"])
+        book = cls(capacity=count)
+        for name in _FIELDS:
+            getattr(book, name)[:count] = columns[name]
+        book._count = count
+        book._update_touch_levels()
+        return book
+
+    def __len__(self) -> int:
+        return self._count
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return copies of the open units' columns (direction as +1/-1 codes)."""
+        return {name: getattr(self, name)[:self._count].copy() for name in _FIELDS}
+
+    def touch_levels(self) -> Tuple[float, float]:
+        """Return (touch_low, touch_high); (-inf, +inf) when the book is empty."""
+        return self._touch_levels
+
+    def add(self, direction: str, entry_price: float, size: float,
+            sl: float, tp: float, trade_id: int = -1):
+        """Append a unit."""
+        slot = self._count
+        if slot == len(self.size):
+            self._grow()
+        self.direction[slot] = _DIRECTIONS[direction]
+        self.entry_price[slot] = entry_price
+        self.size[slot] = size
+        self.sl[slot] = sl
+        self.tp[slot] = tp
+        self.trade_id[slot] = trade_id
+        self._count += 1
+        self._update_touch_levels()
+
+    def unit(self, slot: int) -> PositionUnit:
+        """Materialize the unit at `slot` as a PositionUnit (a copy)."""
+        return PositionUnit(
+            direction=_NAMES[int(self.direction[slot])],
+            entry_price=float(self.entry_price[slot]),
+            size=float(self.size[slot]),
+            sl=float(self.sl[slot]),
+            tp=float(self.tp[slot]),
+            trade_id=int(self.trade_id[slot]),
+        )
+
+    def units(self) -> List[PositionUnit]:
+        """Materialize the open units as PositionUnit objects (copies)."""
+        n = self._count
+        return [
+            PositionUnit(direction=_NAMES[d], entry_price=e, size=s, sl=sl, tp=tp, trade_id=t)
+            for d, e, s, sl, tp, t in zip(
+                self.direction[:n].tolist(), self.entry_price[:n].tolist(),
+                self.size[:n].tolist(), self.sl[:n].tolist(), self.tp[:n].tolist(),
+                self.trade_id[:n].tolist())
+        ]
+
+    def evaluate(self, high: float, low: float, spread: float,
+                 mode: ExecutionMode) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Evaluate SL/TP for every unit against one candle.
+
+        Same rules as check_sl_tp, applied to all units at once: intrabar
+        hits from high/low, SL wins when both levels are hit, exits at the
+        level with spread/2 applied (no spread in SPREAD_OFF).
+
+        Returns:
+            (slots, is_sl, exit_prices) for the triggered units, in slot order.
+        """
+        n = self._count
+        is_long = self.direction[:n] == 1
+        sl = self.sl[:n]
+        tp = self.tp[:n]
+        sl_hit = np.where(is_long, low <= sl, high >= sl)
+        tp_hit = np.where(is_long, high >= tp, low <= tp)
+        slots = np.flatnonzero(sl_hit | tp_hit)
+
+        is_sl = sl_hit[slots]
+        level = np.where(is_sl, sl[slots], tp[slots])
+        if mode == ExecutionMode.SPREAD_OFF:
+            exit_prices = level
+        else:
+            half_spread = spread / 2.0
+            exit_prices = np.where(is_long[slots], level - half_spread, level + half_spread)
+        return slots, is_sl, exit_prices
+
+    def remove(self, slots: np.ndarray):
+        """Drop the units at `slots`, keeping the rest in entry order."""
+        if len(slots) == 0:
+            return
+        keep = np.ones(self._count, dtype=bool)
+        keep[slots] = False
+        self._compact(keep)
+
+    def reduce(self, fraction: float):
+        """Close `fraction` of every unit; units left with <= 1e-12 are dropped."""
+        n = self._count
+        closed_size = self.size[:n] * fraction
+        remaining = self.size[:n] - closed_size
+        self.size[:n] = remaining
+        keep = remaining > 1e-12
+        if not keep.all():
+            self._compact(keep)
+
+    def remap_trade_ids(self, new_ids: np.ndarray):
+        """Replace every unit's trade id t with new_ids[t] (after TradeLedger.drain_closed)."""
+        n = self._count
+        self.trade_id[:n] = new_ids[self.trade_id[:n]]
+
+    def clear(self):
+        self._count = 0
+        self._touch_levels = (-math.inf, math.inf)
+
+    def _compact(self, keep: np.ndarray):
+        kept = int(keep.sum())
+        for name in _FIELDS:
+            values = getattr(self, name)
+            values[:kept] = values[:self._count][keep]
+        self._count = kept
+        self._update_touch_levels()
+
+    def _update_touch_levels(self):
+        """Recompute touch levels; NaN levels never trigger, so they are ignored."""
+        n = self._count
+        if n == 0:
+            self._touch_levels = (-math.inf, math.inf)
+            return
+        is_long = self.direction[:n] == 1
+        low_levels = np.where(is_long, self.sl[:n], self.tp[:n])
+        high_levels = np.where(is_long, self.tp[:n], self.sl[:n])
+        touch_low = float(np.fmax.reduce(low_levels, initial=-math.inf))
+        touch_high = float(np.fmin.reduce(high_levels, initial=math.inf))
+        self._touch_levels = (touch_low, touch_high)
+
+    def _grow(self):
+        for name in _FIELDS:
+            values = getattr(self, name)
+            grown = np.empty(len(values) * 2, dtype=values.dtype)
+            grown[:len(values)] = values
+            setattr(self, name, grown)
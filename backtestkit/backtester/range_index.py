@@ -0,0 +1,254 @@
+# backtester/range_index.py — Range-min/max index for first-touch SL/TP lookup
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Ranges resolved together by the bulk queries (bounds their scratch arrays)
+_BULK_ROWS = 8192
+
+
+class RangeMinMaxIndex:
+    """Tiered block-min/max index over the low and high columns.
+
+    Level 0 is the raw low/high arrays. Level k holds the min of low and the
+    max of high over consecutive blocks of `block_size` entries of level k-1,
+    until a level fits in one block. Memory overhead is about 1/(block_size-1)
+    of the data.
+
+    A first-touch query walks up the levels until a block reaches one of the
+    levels, then walks back down into that block, checking at most one block
+    of entries per level: O(block_size * log_block_size(n)) instead of one
+    Python call per candle.
+
+    Args:
+        low: Candle lows.
+        high: Candle highs.
+        block_size: Fan-out of each level (>= 2).
+    """
+
+    def __init__(self, low: np.ndarray, high: np.ndarray, block_size: int = 64):
+        if block_size < 2:
+            raise ValueError("block_size must be at least 2")
+        low = np.ascontiguousarray(low, dtype=np.float64)
+        high = np.ascontiguousarray(high, dtype=np.float64)
+        if low.shape != high.shape or low.ndim != 1:
+            raise ValueError("low and high must be 1-D arrays of equal length")
+
+        self.block_size = block_size
+        self._lows = [low]
+        self._highs = [high]
+        while len(self._lows[-1]) > block_size:
+            self._lows.append(_block_reduce(self._lows[-1], block_size, np.fmin, np.inf))
+            self._highs.append(_block_reduce(self._highs[-1], block_size, np.fmax, -np.inf))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, block_size: int = 64) -> "RangeMinMaxIndex":
+        """Build the index from a DataFrame with low/high columns."""
+        return cls(df["low"].to_numpy(dtype=np.float64),
+                   df["high"].to_numpy(dtype=np.float64), block_size)
+
+    def __len__(self) -> int:
+        return len(self._lows[0])
+
+    def range_min(self, start: int, stop: int) -> float:
+        """Return min(low[start:stop]). Empty ranges return +inf."""
+        return self._reduce(self._lows, start, stop, np.fmin, np.inf)
+
+    def range_max(self, start: int, stop: int) -> float:
+        """Return max(high[start:stop]). Empty ranges return -inf."""
+        return self._reduce(self._highs, start, stop, np.fmax, -np.inf)
+
+    def range_argmin(self, starts, stops) -> Tuple[np.ndarray, np.ndarray]:
+        """Return min(low[start:stop]) and the index of its first occurrence, for many ranges.
+
+        Vectorized over the ranges. Empty ranges give (+inf, -1).
+        """
+        return self._bulk(self._lows, starts, stops, np.argmin, np.less, np.inf)
+
+    def range_argmax(self, starts, stops) -> Tuple[np.ndarray, np.ndarray]:
+        """Return max(high[start:stop]) and the index of its first occurrence, for many ranges.
+
+        Vectorized over the ranges. Empty ranges give (-inf, -1).
+        """
+        return self._bulk(self._highs, starts, stops, np.argmax, np.greater, -np.inf)
+
+    def first_touch(self, start: int, low_level: float, high_level: float,
+                    stop: Optional[int] = None) -> int:
+        """Return the first index i in [start, stop) with low <= low_level or high >= high_level.
+
+        Pass -inf / +inf to ignore one side. Returns `stop` (default: len)
+        when no candle in the range reaches either level.
+        """
+        n = len(self)
+        stop = n if stop is None else min(stop, n)
+        start = max(start, 0)
+        if start >= stop:
+            return stop
+
+        block = self.block_size
+        top = len(self._lows) - 1
+
+        # Walk up: scan the rest of the current block, then move to the next
+        # block one level higher.
+        level = 0
+        pos = start
+        span = 1  # candles covered by one entry at this level
+        while True:
+            if pos * span >= stop:
+                return stop
+            level_len = len(self._lows[level])
+            end = level_len if level == top else min((pos // block + 1) * block, level_len)
+            hit = self._first_hit(level, pos, end, low_level, high_level)
+            if hit >= 0:
+                pos = hit
+                break
+            if level == top:
+                return stop
+            pos = pos // block + 1
+            level += 1
+            span *= block
+
+        # Walk down: the block at `pos` contains a touch; find its first child that does.
+        while level > 0:
+            level -= 1
+            child = pos * block
+            end = min(child + block, len(self._lows[level]))
+            pos = self._first_hit(level, child, end, low_level, high_level)
+
+        return pos if pos < stop else stop
+
+    def first_sl_tp_hit(self, direction: str, sl: float, tp: float, start: int,
+                        stop: Optional[int] = None) -> Tuple[int, Optional[str]]:
+        """Return (index, "SL" | "TP") of the first candle that hits SL or TP.
+
+        Uses the same intrabar rules as check_sl_tp, including the worst-case
+        rule: if both levels are hit on the same candle, "SL" is reported.
+        Returns (stop, None) when neither level is hit in [start, stop).
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if direction == "LONG":
+            index = self.first_touch(start, sl, tp, stop)
+        else:  # SHORT
+            index = self.first_touch(start, tp, sl, stop)
+        if index >= stop:
+            return stop, None
+
+        low = self._lows[0][index]
+        high = self._highs[0][index]
+        sl_hit = low <= sl if direction == "LONG" else high >= sl
+        return index, "SL" if sl_hit else "TP"
+
+    def _first_hit(self, level: int, start: int, end: int,
+                   low_level: float, high_level: float) -> int:
+        """Return the first entry in [start, end) of a level reaching a level, or -1."""
+        hits = np.flatnonzero(
+            (self._lows[level][start:end] <= low_level)
+            | (self._highs[level][start:end] >= high_level)
+        )
+        return start + int(hits[0]) if hits.size else -1
+
+    def _reduce(self, levels, start: int, stop: int, func, identity: float) -> float:
+        """Reduce values[start:stop] using whole blocks from the coarsest level possible."""
+        block = self.block_size
+        start = max(start, 0)
+        stop = min(stop, len(levels[0]))
+        result = identity
+        level = 0
+        while start < stop:
+            if level + 1 == len(levels) or stop - start < 2 * block:
+                return float(func(result, func.reduce(levels[level][start:stop], initial=identity)))
+            # Fold the partial blocks at both ends, then continue one level up
+            head = min(-(-start // block) * block, stop)
+            tail = max(stop // block * block, head)
+            result = func(result, func.reduce(levels[level][start:head], initial=identity))
+            result = func(result, func.reduce(levels[level][tail:stop], initial=identity))
+            start, stop = head // block, tail // block
+            level += 1
+        return float(result)
+
+    def _bulk(self, levels, starts, stops, arg, better, identity: float
+              ) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(levels[0])
+        starts = np.clip(np.asarray(starts, dtype=np.int64), 0, n)
+        stops = np.clip(np.asarray(stops, dtype=np.int64), 0, n)
+        values = np.empty(len(starts))
+        positions = np.empty(len(starts), dtype=np.int64)
+        for k in range(0, len(starts), _BULK_ROWS):
+            rows = slice(k, k + _BULK_ROWS)
+            values[rows], positions[rows] = self._locate_many(
+                levels, starts[rows], stops[rows], arg, better, identity)
+        return values, positions
+
+    def _locate_many(self, levels, starts, stops, arg, better, identity: float
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+        """Extreme of values[start:stop] and its first index, for arrays of ranges.
+
+        Same decomposition as _reduce, applied to all ranges one level at a
+        time: the partial blocks at both ends of a range are read at each
+        level on the way up (at most one block each), and the rest is read
+        at the level where it spans fewer than two blocks. Parts are folded
+        in candle order, keeping only strictly better values, so the first
+        occurrence wins. The winning entry is then followed down to level 0,
+        one block of children per level.
+        """
+        block = self.block_size
+        best = np.full(len(starts), identity)
+        best_level = np.zeros(len(starts), dtype=np.int64)
+        best_pos = np.full(len(starts), -1, dtype=np.int64)
+
+        def fold(rows, level, lo, hi, width):
+            values = levels[level]
+            positions = lo[:, None] + np.arange(width)
+            window = np.where(positions < hi[:, None],
+                              values[np.minimum(positions, len(values) - 1)], identity)
+            k = arg(window, axis=1)
+            found = window[np.arange(len(rows)), k]
+            improved = better(found, best[rows])
+            rows = rows[improved]
+            best[rows] = found[improved]
+            best_level[rows] = level
+            best_pos[rows] = lo[improved] + k[improved]
+
+        # Walk up, folding head parts and the final middle part; tails are
+        # folded afterwards, from the coarsest level down (candle order)
+        rows = np.flatnonzero(starts < stops)
+        lo, hi = starts[rows], stops[rows]
+        tails = []
+        level = 0
+        while len(rows):
+            short = (hi - lo < 2 * block) | (level + 1 == len(levels))
+            if short.any():
+                fold(rows[short], level, lo[short], hi[short], 2 * block)
+            rows, lo, hi = rows[~short], lo[~short], hi[~short]
+            head = np.minimum(-(-lo // block) * block, hi)
+            tail = np.maximum(hi // block * block, head)
+            fold(rows, level, lo, head, block)
+            tails.append((rows, level, tail, hi))
+            lo, hi = head // block, tail // block
+            level += 1
+        for rows, level, lo, hi in reversed(tails):
+            fold(rows, level, lo, hi, block)
+
+        # Walk down: first child entry holding the extreme, one level at a time
+        for level in range(len(levels) - 1, 0, -1):
+            rows = np.flatnonzero(best_level == level)
+            if not len(rows):
+                continue
+            children = levels[level - 1]
+            positions = best_pos[rows, None] * block + np.arange(block)
+            window = np.where(positions < len(children),
+                              children[np.minimum(positions, len(children) - 1)], identity)
+            best_pos[rows] = positions[:, 0] + np.argmax(window == best[rows, None], axis=1)
+            best_level[rows] = level - 1
+        return best, best_pos
+
+
+def _block_reduce(values: np.ndarray, block: int, func, fill: float) -> np.ndarray:
+    """Reduce consecutive blocks of `values`, padding the last block with `fill`."""
+    n_blocks = -(-len(values) // block)
+    pad = n_blocks * block - len(values)
+    if pad:
+        values = np.concatenate([values, np.full(pad, fill)])
+    return func.reduce(values.reshape(n_blocks, block), axis=1)
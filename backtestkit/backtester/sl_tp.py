@@ -19,12 +19,14 @@ class PositionUnit:
         size: Number of units in this position layer
         sl: Stop loss price level
         tp: Take profit price level
+        trade_id: Id of this unit's record in the engine's TradeLedger (-1 if none)
     """
     direction: str
     entry_price: float
     size: float
     sl: float
     tp: float
+    trade_id: int = -1
 
 
 @dataclass
@@ -0,0 +1,295 @@
+# backtester/snapshots.py — Per-candle state snapshots, stored column-wise
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_MODES = ("all", "every_n", "on_change", "none", "events")
+
+# Buffered single-row appends are flushed to the arrays in blocks of this size
+_FLUSH_ROWS = 4096
+
+_FIELDS = ("cash", "position_size", "unrealized_pnl", "equity")
+
+
+@dataclass(slots=True)
+class Snapshot:
+    """Per-candle state snapshot."""
+    index: int
+    cash: float
+    position_size: float
+    unrealized_pnl: float
+    equity: float
+
+
+class SnapshotStore:
+    """Columnar store of per-candle snapshots with optional decimation.
+
+    The engine offers every candle, in order, through append() (one row) or
+    extend() (a run of consecutive rows). Which rows are kept depends on the
+    mode:
+        "all":       every candle
+        "every_n":   candles whose index is a multiple of `every`
+        "on_change": candles whose cash/position/unrealized/equity differ
+                     from the previous candle (the first candle is always kept)
+        "none":      nothing
+        "events":    nothing (the engine keeps a CashEventLog instead and
+                     rebuilds the rows on demand, see EquityCurve)
+
+    Kept rows live in growable NumPy arrays (index, cash, position_size,
+    unrealized_pnl, equity), about 40 bytes per row. The store also behaves
+    as a read-only sequence of Snapshot objects, materialized on access.
+
+    Args:
+        mode: One of SNAPSHOT_MODES.
+        every: Decimation step for "every_n".
+        capacity: Expected number of kept rows (arrays grow beyond it).
+        start_index: Candle index of the first row that will be offered.
+    """
+
+    def __init__(self, mode: str = "all", every: int = 1, capacity: int = 1024,
+                 start_index: int = 0):
+        if mode not in SNAPSHOT_MODES:
+            raise ValueError(f"Unknown snapshot mode: {mode!r} (expected one of {SNAPSHOT_MODES})")
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        self.mode = mode
+        self.every = every
+        self._next_index = start_index
+        self._count = 0
+
+        capacity = 0 if mode in ("none", "events") else max(capacity, 1)
+        self._index = np.empty(capacity, dtype=np.int64)
+        self._columns = {name: np.empty(capacity) for name in _FIELDS}
+
+        # Pending single-row appends: one list per field, indexes implied
+        self._buffer_start = start_index
+        self._buffer = {name: [] for name in _FIELDS}
+        # Last offered row, for "on_change"
+        self._last_row: Optional[tuple] = None
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], mode: str = "all", every: int = 1,
+                     next_index: int = 0, last_row: Optional[Tuple[float, ...]] = None,
+                     capacity: int = 0) -> "SnapshotStore":
+        """Rebuild a store from its kept rows and recording position.
+
+        Args:
+            columns: "index" plus one array per field, as returned by columns().
+            mode, every: Recording mode of the original store.
+            next_index: Candle index of the next row to be offered.
+            last_row: Last offered row (see the last_row property), for "on_change".
+            capacity: Extra rows to preallocate for later recording.
+        """
+        count = len(columns["index"])
+        store = cls(mode=mode, every=every, capacity=count + capacity, start_index=next_index)
+        if count:
+            store._index[:count] = columns["index"]
+            for name in _FIELDS:
+                store._columns[name][:count] = columns[name]
+        store._count = count
+        store._last_row = None if last_row is None else tuple(float(v) for v in last_row)
+        return store
+
+    # --- Recording ---
+
+    @property
+    def next_index(self) -> int:
+        """Candle index of the next row to be offered."""
+        return self._next_index
+
+    def append(self, cash: float, position_size: float,
+               unrealized_pnl: float, equity: float):
+        """Offer the snapshot of the next candle."""
+        buffer = self._buffer
+        buffer["cash"].append(cash)
+        buffer["position_size"].append(position_size)
+        buffer["unrealized_pnl"].append(unrealized_pnl)
+        buffer["equity"].append(equity)
+        self._next_index += 1
+        if len(buffer["cash"]) >= _FLUSH_ROWS:
+            self.flush()
+
+    def extend(self, cash, position_size, unrealized_pnl, equity):
+        """Offer snapshots for a run of consecutive candles.
+
+        Each argument is an array (or list) with one value per candle; a
+        scalar is broadcast over the run, whose length is taken from the
+        longest argument.
+        """
+        self.flush()
+        values = [np.asarray(v, dtype=np.float64) for v in (cash, position_size,
+                                                            unrealized_pnl, equity)]
+        length = max(v.size for v in values)
+        start = self._next_index
+        self._next_index += length
+        self._buffer_start = self._next_index
+        self._write(start, [np.broadcast_to(v, (length,)) for v in values])
+
+    def flush(self):
+        """Move buffered appends into the arrays."""
+        buffer = self._buffer
+        count = len(buffer["cash"])
+        if count == 0:
+            return
+        start = self._buffer_start
+        values = [np.array(buffer[name], dtype=np.float64) for name in _FIELDS]
+        for rows in buffer.values():
+            rows.clear()
+        self._buffer_start = self._next_index
+        self._write(start, values)
+
+    def drain(self) -> Dict[str, np.ndarray]:
+        """Remove the kept rows and return them (copies, as columns()).
+
+        Recording continues where it was: later rows keep their candle
+        indexes and "on_change" still compares with the last offered row.
+        """
+        rows = {name: values.copy() for name, values in self.columns().items()}
+        self._count = 0
+        return rows
+
+    def _write(self, start: int, values: List[np.ndarray]):
+        """Apply the mode's row selection to candles [start, start + len) and store the rest."""
+        length = len(values[0])
+        if length == 0 or self.mode in ("none", "events"):
+            return
+        index = np.arange(start, start + length, dtype=np.int64)
+
+        if self.mode == "every_n":
+            keep = index % self.every == 0
+        elif self.mode == "on_change":
+            changed = np.zeros(length, dtype=bool)
+            for v in values:
+                changed[1:] |= v[1:] != v[:-1]
+            first = tuple(float(v[0]) for v in values)
+            changed[0] = self._last_row is None or first != self._last_row
+            self._last_row = tuple(float(v[-1]) for v in values)
+            keep = changed
+        else:
+            keep = None
+
+        if keep is not None:
+            index = index[keep]
+            values = [v[keep] for v in values]
+
+        kept = len(index)
+        if self._count + kept > len(self._index):
+            self._grow(self._count + kept)
+        end = self._count + kept
+        self._index[self._count:end] = index
+        for name, v in zip(_FIELDS, values):
+            self._columns[name][self._count:end] = v
+        self._count = end
+
+    def _grow(self, needed: int):
+        capacity = max(needed, len(self._index) * 2)
+        index = np.empty(capacity, dtype=np.int64)
+        index[:self._count] = self._index[:self._count]
+        self._index = index
+        for name, values in self._columns.items():
+            grown = np.empty(capacity)
+            grown[:self._count] = values[:self._count]
+            self._columns[name] = grown
+
+    # --- Columnar access ---
+
+    def _column(self, name: str) -> np.ndarray:
+        # Flush first: it can grow (replace) the arrays
+        self.flush()
+        values = self._index if name == "index" else self._columns[name]
+        view = values[:self._count]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def index(self) -> np.ndarray:
+        """Candle index of each kept row."""
+        return self._column("index")
+
+    @property
+    def cash(self) -> np.ndarray:
+        return self._column("cash")
+
+    @property
+    def position_size(self) -> np.ndarray:
+        return self._column("position_size")
+
+    @property
+    def unrealized_pnl(self) -> np.ndarray:
+        return self._column("unrealized_pnl")
+
+    @property
+    def equity(self) -> np.ndarray:
+        return self._column("equity")
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return read-only views of "index" and every field column."""
+        return {"index": self.index, **{name: getattr(self, name) for name in _FIELDS}}
+
+    @property
+    def last_row(self) -> Optional[Tuple[float, ...]]:
+        """Last row offered in "on_change" mode (None before the first one or in other modes)."""
+        self.flush()
+        return self._last_row
+
+    def to_frame(self, timestamps: Optional[pd.Index] = None) -> pd.DataFrame:
+        """Return the kept rows as a DataFrame.
+
+        Args:
+            timestamps: Optional index of the candle data (e.g. data.index);
+                when given, rows are labeled with their candle timestamps
+                instead of candle indexes.
+        """
+        index = self.index
+        frame = pd.DataFrame({name: getattr(self, name) for name in _FIELDS})
+        if timestamps is not None:
+            frame.index = timestamps[index]
+        else:
+            frame.index = pd.Index(index, name="index")
+        return frame
+
+    # --- Sequence of Snapshot ---
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._count
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[Snapshot, List[Snapshot]]:
+        self.flush()
+        if isinstance(item, slice):
+            return self._materialize(*item.indices(self._count))
+        if item < 0:
+            item += self._count
+        if not 0 <= item < self._count:
+            raise IndexError("snapshot index out of range")
+        return self._materialize(item, item + 1)[0]
+
+    def __iter__(self) -> Iterator[Snapshot]:
+        self.flush()
+        for start in range(0, self._count, _FLUSH_ROWS):
+            yield from self._materialize(start, min(start + _FLUSH_ROWS, self._count))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SnapshotStore):
+            return (np.array_equal(self.index, other.index)
+                    and all(np.array_equal(getattr(self, name), getattr(other, name))
+                            for name in _FIELDS))
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def _materialize(self, start: int, stop: int, step: int = 1) -> List[Snapshot]:
+        rows = slice(start, stop, step)
+        return [
+            Snapshot(index=i, cash=c, position_size=p, unrealized_pnl=u, equity=e)
+            for i, c, p, u, e in zip(
+                self._index[rows].tolist(),
+                self._columns["cash"][rows].tolist(),
+                self._columns["position_size"][rows].tolist(),
+                self._columns["unrealized_pnl"][rows].tolist(),
+                self._columns["equity"][rows].tolist(),
+            )
+        ]
@@ -0,0 +1,191 @@
+# backtester/streaming.py — Block-by-block backtests over larger-than-memory data
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backtester.checkpoint import EngineCheckpoint
+from backtester.engine import BacktestEngine
+from common.market_data import COLUMNS, MarketData, column
+from common.models import ExecutionMode
+from strategies.base_strategy import BaseStrategy
+from strategies.signals import Signal, SignalBatch
+
+# Receives one chunk of rows as a dict of equal-length column arrays
+Sink = Callable[[Dict[str, np.ndarray]], None]
+
+Block = Union[pd.DataFrame, MarketData]
+
+
+@dataclass
+class StreamResult:
+    """Summary of a StreamingEngine run (trades, snapshots and events went to the sinks)."""
+    candles: int
+    trade_count: int
+    final_equity: float
+    realized_pnl: float
+    unrealized_pnl: float
+    checkpoint: Optional[EngineCheckpoint] = None
+    metrics: Optional[Dict[str, float]] = None  # spec §11 metrics over the whole stream
+
+
+class StreamingEngine:
+    """BacktestEngine over a stream of candle blocks, with flat memory.
+
+    Each block is simulated by a BacktestEngine that resumes from the
+    previous block's checkpoint (index_offset = candles before the block),
+    so signals pending on a block's last candle and the open position units
+    carry over the boundary. After every block, closed trades and kept
+    snapshot rows are handed to the sinks and dropped; only the open state
+    (portfolio, open units and their trades, pending signals) is carried.
+    Results are identical to one BacktestEngine run over all the candles.
+
+    Trade chunks hold the TradeLedger columns plus "trade_id", the trade's
+    position in entry order over the whole run (chunks are not ordered by
+    it: a trade is emitted when it closes; trades still open at the end are
+    emitted last, with exit_reason code 0). Snapshot chunks hold
+    SnapshotStore.columns(). With snapshot_mode "events", event chunks hold
+    CashEventLog.columns(): every event once, in candle order (the last
+    event of each block is carried and emitted later, the final one at the
+    end of the stream), so the concatenated chunks rebuild the whole curve
+    with EquityCurve. A sink can be as simple as list.append.
+
+    Args:
+        mode: Execution mode.
+        initial_capital: Starting capital.
+        trade_sink: Receives closed trade chunks (None: trades are dropped).
+        snapshot_sink: Receives snapshot chunks (None: snapshots are dropped).
+        event_sink: Receives cash-change event chunks in snapshot_mode
+            "events" (None: events are dropped).
+        **engine_kwargs: BacktestEngine options (core, sl_tp_scan,
+            snapshot_mode, snapshot_every).
+    """
+
+    def __init__(self, mode: ExecutionMode, initial_capital: float,
+                 trade_sink: Optional[Sink] = None, snapshot_sink: Optional[Sink] = None,
+                 event_sink: Optional[Sink] = None, **engine_kwargs):
+        self.mode = mode
+        self.initial_capital = initial_capital
+        self.trade_sink = trade_sink
+        self.snapshot_sink = snapshot_sink
+        self.event_sink = event_sink
+        self.engine_kwargs = engine_kwargs
+
+    def run(self, blocks: Iterable[Block],
+            signals: Union[SignalBatch, List[Signal], BaseStrategy, Iterable]) -> StreamResult:
+        """Simulate the blocks in order.
+
+        Args:
+            blocks: Consecutive candle blocks (DataFrames as yielded by
+                iter_csv, or MarketData slices, e.g. from iter_blocks).
+            signals: Signal indexes are absolute candle indexes. One of
+                - a SignalBatch or list of Signal for the whole stream,
+                - a strategy implementing on_bar(), fed every candle,
+                - an iterable yielding the signals of each block, in step
+                  with `blocks`.
+        """
+        signal_source = _signal_source(signals)
+        checkpoint = None
+        engine = None
+        result = None
+        offset = 0
+        trade_ids = _TradeIds()
+        for block in blocks:
+            batch = signal_source(block, offset)
+            engine = BacktestEngine(block, batch, self.mode, self.initial_capital,
+                                    resume_from=checkpoint, index_offset=offset, **self.engine_kwargs)
+            result = engine.run()
+            offset += len(block)
+
+            snapshots = engine.snapshots.drain()
+            if self.snapshot_sink is not None and len(snapshots["index"]):
+                self.snapshot_sink(snapshots)
+            if engine.events is not None:
+                self._emit_events(engine.events.drain())
+            closed, new_ids = engine.ledger.drain_closed()
+            self._emit_trades(trade_ids.drain(new_ids), closed)
+            engine.book.remap_trade_ids(new_ids)
+            checkpoint = engine.checkpoint()
+
+        if engine is None:
+            return StreamResult(0, 0, self.initial_capital, 0.0, 0.0)
+        # Trades still open at the end of the stream
+        open_trades = {name: values.copy() for name, values in engine.ledger.columns().items()}
+        self._emit_trades(trade_ids.open_ids, open_trades)
+        if engine.events is not None:
+            self._emit_events({name: values.copy() for name, values in engine.events.columns().items()})
+        portfolio = engine.portfolio
+        return StreamResult(offset, trade_ids.count, portfolio.equity, portfolio.realized_pnl,
+                            portfolio.unrealized_pnl, checkpoint, result.metrics)
+
+    def _emit_trades(self, ids: np.ndarray, trades: Dict[str, np.ndarray]):
+        if self.trade_sink is not None and len(ids):
+            self.trade_sink({"trade_id": ids, **trades})
+
+    def _emit_events(self, events: Dict[str, np.ndarray]):
+        if self.event_sink is not None and len(events["index"]):
+            self.event_sink(events)
+
+
+def iter_blocks(data: Block, block_rows: int) -> Iterator[Block]:
+    """Yield consecutive row blocks of a DataFrame or MarketData (views for MarketData)."""
+    if block_rows < 1:
+        raise ValueError("block_rows must be >= 1")
+    for start in range(0, len(data), block_rows):
+        stop = start + block_rows
+        yield data[start:stop] if isinstance(data, MarketData) else data.iloc[start:stop]
+
+
+class _TradeIds:
+    """Run-wide ids (entry order) of the trades kept in a drained ledger."""
+
+    def __init__(self):
+        self.open_ids = np.empty(0, dtype=np.int64)
+        self.count = 0
+
+    def drain(self, new_ids: np.ndarray) -> np.ndarray:
+        """Return the ids of the removed trades and keep those of the open ones."""
+        added = len(new_ids) - len(self.open_ids)
+        ids = np.concatenate([self.open_ids, self.count + np.arange(added, dtype=np.int64)])
+        self.count += added
+        self.open_ids = ids[new_ids >= 0]
+        return ids[new_ids < 0]
+
+
+def _signal_source(signals) -> Callable[[Block, int], SignalBatch]:
+    """Return f(block, offset) giving the signals of one block."""
+    if isinstance(signals, BaseStrategy):
+        strategy = signals
+        strategy.reset()
+
+        def from_strategy(block: Block, offset: int) -> SignalBatch:
+            values = [column(block, name).tolist() for name in COLUMNS]
+            return SignalBatch.from_signals([
+                signal for row in zip(*values)
+                for signal in strategy.on_bar(dict(zip(COLUMNS, row)))
+            ])
+        return from_strategy
+
+    if isinstance(signals, list) and all(isinstance(s, Signal) for s in signals):
+        signals = SignalBatch.from_signals(signals)
+    if isinstance(signals, SignalBatch):
+        batch = signals
+
+        def from_batch(block: Block, offset: int) -> SignalBatch:
+            rows = slice(*np.searchsorted(batch.timestamp_index, [offset, offset + len(block)]))
+            return SignalBatch(batch.timestamp_index[rows], batch.signal_type[rows],
+                               batch.stop_loss_level[rows], batch.take_profit_level[rows],
+                               batch.size[rows])
+        return from_batch
+
+    per_block = iter(signals)
+
+    def from_iterable(block: Block, offset: int) -> SignalBatch:
+        try:
+            batch = next(per_block)
+        except StopIteration:
+            raise ValueError("Signal source ended before the candle blocks") from None
+        return batch if isinstance(batch, SignalBatch) else SignalBatch.from_signals(batch)
+    return from_iterable
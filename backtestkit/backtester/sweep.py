@@ -0,0 +1,223 @@
+# backtester/sweep.py — Process-pool parameter sweeps over shared-memory OHLC
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtester.engine import BacktestEngine
+from backtester.metrics import METRIC_NAMES, compute_metrics
+from common.market_data import MarketData
+from common.models import ExecutionMode
+from strategies.ma_crossover import MACrossoverStrategy
+
+OHLC_COLUMNS = ("open", "high", "low", "close", "spread")
+
+# Columns of every result row after the strategy parameters
+RESULT_COLUMNS = ("final_equity", "realized_pnl", "trade_count") + METRIC_NAMES
+
+
+@dataclass(frozen=True)
+class SharedOHLCSpec:
+    """Picklable description of an OHLC block in shared memory.
+
+    The block holds the timestamps (int64 nanoseconds, UTC for tz-aware
+    indexes) followed by one float64 row per OHLC column, so a worker can
+    rebuild the DataFrame around views of the block without copying.
+    """
+    name: str
+    length: int
+    tz: Optional[str]
+    index_name: Optional[str]
+
+
+class SharedOHLC:
+    """OHLC data copied once into a multiprocessing.shared_memory block.
+
+    Use as a context manager in the process that owns the data; the block
+    is unlinked on exit. Workers call attach(spec) to get a DataFrame whose
+    columns are read-only views of the block.
+
+    Args:
+        df: DataFrame with a DatetimeIndex and open/high/low/close/spread columns.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("SharedOHLC requires a DatetimeIndex")
+        missing = set(OHLC_COLUMNS) - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+        n = len(df)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(_block_bytes(n), 1))
+        index, values = _views(self._shm, n)
+        index[:] = df.index.as_unit("ns").asi8
+        for row, name in enumerate(OHLC_COLUMNS):
+            values[row] = df[name].to_numpy(dtype=np.float64)
+        tz = None if df.index.tz is None else str(df.index.tz)
+        self.spec = SharedOHLCSpec(self._shm.name, n, tz, df.index.name)
+
+    def close(self):
+        """Release and unlink the shared block (idempotent)."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "SharedOHLC":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def attach(spec: SharedOHLCSpec) -> Tuple[pd.DataFrame, shared_memory.SharedMemory]:
+        """Map a shared block and wrap it in a DataFrame.
+
+        Returns the DataFrame and the SharedMemory handle, which must stay
+        referenced for as long as the DataFrame is used.
+        """
+        shm = _open_shared_memory(spec.name)
+        index, values = _views(shm, spec.length)
+        index.flags.writeable = False
+        values.flags.writeable = False
+
+        timestamps = pd.DatetimeIndex(index.view("M8[ns]"), name=spec.index_name)
+        if spec.tz is not None:
+            timestamps = timestamps.tz_localize("UTC").tz_convert(spec.tz)
+        # (columns, rows) is pandas' own block layout, so the transpose is not copied
+        df = pd.DataFrame(values.T, index=timestamps, columns=list(OHLC_COLUMNS), copy=False)
+        return df, shm
+
+    @staticmethod
+    def attach_market_data(spec: SharedOHLCSpec) -> Tuple[MarketData, shared_memory.SharedMemory]:
+        """Map a shared block and wrap it in a MarketData (no copies, no DataFrame).
+
+        Returns the MarketData and the SharedMemory handle, which must stay
+        referenced for as long as the MarketData is used.
+        """
+        shm = _open_shared_memory(spec.name)
+        index, values = _views(shm, spec.length)
+        index.flags.writeable = False
+        values.flags.writeable = False
+        data = MarketData(index, *values, tz=spec.tz, index_name=spec.index_name)
+        return data, shm
+
+
+def run_sweep(
+    data: pd.DataFrame,
+    params: Iterable[Dict],
+    mode: ExecutionMode,
+    initial_capital: float,
+    processes: Optional[int] = None,
+    chunksize: int = 16,
+    strategy_cls: type = MACrossoverStrategy,
+    **engine_kwargs,
+) -> pd.DataFrame:
+    """Backtest every parameter combination on one dataset in a process pool.
+
+    The OHLC data is placed in shared memory once; each worker maps it,
+    builds one MarketData for its whole lifetime (its fingerprint is
+    memoized, so the strategies it runs share indicator cache entries
+    without rehashing) and returns one compact row per combination instead
+    of the full BacktestResult. Strategies receive that MarketData, and
+    generate_batch() is used when the strategy has it.
+
+    Args:
+        data: 1-min OHLC DataFrame (as returned by load_csv).
+        params: Keyword arguments for strategy_cls, one dict per combination
+            (e.g. fast_period, slow_period, sl_pct, tp_pct).
+        mode: Execution mode for every run.
+        initial_capital: Starting capital for every run.
+        processes: Worker processes (default: os.cpu_count()).
+        chunksize: Combinations sent to a worker per task.
+        strategy_cls: Picklable BaseStrategy subclass built from each dict.
+        **engine_kwargs: Extra BacktestEngine options (core, sl_tp_scan, ...).
+            Snapshots default to "none": the metrics come from the engine's
+            running accumulators.
+
+    Returns:
+        DataFrame with the parameter columns followed by RESULT_COLUMNS,
+        one row per combination in input order.
+    """
+    params = [dict(p) for p in params]
+    if chunksize < 1:
+        raise ValueError("chunksize must be >= 1")
+    if not params:
+        return pd.DataFrame(columns=list(RESULT_COLUMNS))
+    engine_kwargs.setdefault("snapshot_mode", "none")
+
+    with SharedOHLC(data) as shared:
+        with ProcessPoolExecutor(
+            max_workers=processes or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(shared.spec, strategy_cls, mode, initial_capital, engine_kwargs),
+        ) as pool:
+            rows = list(pool.map(_run_one, params, chunksize=chunksize))
+
+    return pd.DataFrame(rows)
+
+
+def result_row(result, initial_capital: float) -> Dict[str, float]:
+    """Reduce a BacktestResult to the compact metrics returned by a sweep.
+
+    trade_count counts every trade (open ones included); the metrics are
+    the engine's running ones (result.metrics), or compute_metrics for
+    results without them.
+    """
+    metrics = result.metrics
+    if metrics is None:
+        metrics = compute_metrics(result, initial_capital)
+    return {
+        "final_equity": result.final_equity,
+        "realized_pnl": result.realized_pnl,
+        "trade_count": len(result.trades),
+        **metrics,
+    }
+
+
+# --- Worker side ---
+
+# Per-process state set by _init_worker
+_worker: Dict = {}
+
+
+def _init_worker(spec: SharedOHLCSpec, strategy_cls: type, mode: ExecutionMode,
+                 initial_capital: float, engine_kwargs: Dict):
+    data, shm = SharedOHLC.attach_market_data(spec)
+    _worker.update(data=data, shm=shm, strategy_cls=strategy_cls, mode=mode,
+                   initial_capital=initial_capital, engine_kwargs=engine_kwargs)
+
+
+def _run_one(params: Dict) -> Dict:
+    data = _worker["data"]
+    strategy = _worker["strategy_cls"](**params)
+    generate = getattr(strategy, "generate_batch", strategy.generate)
+    engine = BacktestEngine(data, generate(data), _worker["mode"],
+                            _worker["initial_capital"], **_worker["engine_kwargs"])
+    result = engine.run()
+    return {**params, **result_row(result, _worker["initial_capital"])}
+
+
+def _block_bytes(n: int) -> int:
+    return 8 * n * (1 + len(OHLC_COLUMNS))
+
+
+def _views(shm: shared_memory.SharedMemory, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (timestamps int64[n], values float64[len(OHLC_COLUMNS), n]) over the block."""
+    index = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((len(OHLC_COLUMNS), n), dtype=np.float64, buffer=shm.buf, offset=8 * n)
+    return index, values
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach without registering the block with this process's resource tracker (3.13+)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
@@ -0,0 +1,83 @@
+# backtester/trade_stats.py — Per-trade path statistics (MAE/MFE) from range queries
+
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backtester.ledger import TradeLedger
+from backtester.range_index import RangeMinMaxIndex
+from common.market_data import MarketData, column
+
+# Columns added to the trade columns by trade_path_stats
+PATH_STAT_COLUMNS = ("mae", "mfe", "time_to_mfe", "bars_held")
+
+
+def trade_path_stats(
+    trades: Union[TradeLedger, Dict[str, np.ndarray]],
+    data: Union[pd.DataFrame, MarketData],
+    index: Optional[RangeMinMaxIndex] = None,
+    index_offset: int = 0,
+) -> Dict[str, np.ndarray]:
+    """Attach excursion statistics to every trade, computed in bulk.
+
+    A trade's path is the candles from its entry candle up to (excluding)
+    its exit candle, plus its exit price; open trades run to the last
+    candle of `data`. The extreme low/high of every path and the candle
+    where it is first reached come from one vectorized range query per
+    side over a RangeMinMaxIndex, so the cost does not grow with holding
+    time. Prices are candle mids (the data's high/low), spread excluded.
+
+    Added columns (PATH_STAT_COLUMNS), one value per trade:
+        mae: Maximum adverse excursion as a fraction of the entry price
+            (LONG: 1 - lowest low / entry; SHORT: highest high / entry - 1).
+            Negative when the price never went against the trade.
+        mfe: Maximum favorable excursion, same units (comparable to
+            sl_pct / tp_pct).
+        time_to_mfe: Candles from entry until the MFE was first reached.
+        bars_held: Candles from entry to exit (to the end of data if open).
+
+    Args:
+        trades: A TradeLedger, or trade columns as returned by
+            TradeLedger.columns() (e.g. a StreamingEngine trade chunk).
+        data: Candles the trades were simulated on.
+        index: RangeMinMaxIndex over data's low/high (built if None).
+        index_offset: Candle index of data's first row (as in BacktestEngine).
+
+    Returns:
+        The trade columns followed by PATH_STAT_COLUMNS.
+    """
+    columns = trades.columns() if isinstance(trades, TradeLedger) else trades
+    if index is None:
+        index = RangeMinMaxIndex(column(data, "low"), column(data, "high"))
+    n = len(index)
+
+    is_open = columns["exit_reason"] == 0
+    entry_price = columns["entry_price"]
+    starts = columns["entry_index"] - index_offset
+    stops = np.where(is_open, n, columns["exit_index"] - index_offset)
+    if len(starts) and (starts.min() < 0 or stops.max() > n):
+        raise ValueError("Trades reach outside the candle data")
+
+    low, low_at = index.range_argmin(starts, stops)
+    high, high_at = index.range_argmax(starts, stops)
+    # The exit price counts as the last point of a closed trade's path
+    exit_price = np.where(is_open, np.nan, columns["exit_price"])
+    exit_low = exit_price < low
+    exit_high = exit_price > high
+    low, low_at = np.where(exit_low, exit_price, low), np.where(exit_low, stops, low_at)
+    high, high_at = np.where(exit_high, exit_price, high), np.where(exit_high, stops, high_at)
+
+    is_long = columns["direction"] == 1
+    with np.errstate(invalid="ignore"):
+        mae = np.where(is_long, 1.0 - low / entry_price, high / entry_price - 1.0)
+        mfe = np.where(is_long, high / entry_price - 1.0, 1.0 - low / entry_price)
+    time_to_mfe = np.where(is_long, high_at, low_at) - starts
+
+    return {
+        **columns,
+        "mae": mae,
+        "mfe": mfe,
+        "time_to_mfe": time_to_mfe,
+        "bars_held": stops - starts,
+    }
@@ -1,24 +1,88 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
 import pandas as pd
 
+from common.market_data import MarketData
+
 REQUIRED_COLUMNS = {"open", "high", "low", "close", "spread"}
 
+# Bump when the cache layout changes; older entries are then rebuilt
+CACHE_VERSION = 1
+
+# Rows per block when streaming a CSV (iter_csv, cache builds)
+DEFAULT_CHUNK_ROWS = 500_000
+
+_HASH_CHUNK = 1 << 22
+
+_DAY_NS = pd.Timedelta("1D").value
 
-def load_csv(path: str) -> pd.DataFrame:
+
+def load_csv(path: str, cache_dir: Optional[str] = None,
+             chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
     """Load a 1-minute OHLC CSV file into a DataFrame.
 
     Expected columns: timestamp, open, high, low, close, spread.
     The timestamp column becomes a DatetimeIndex.
 
+    With cache_dir, the validated data is also written there as one .npy
+    file per column (timestamps as int64 epoch nanoseconds). Later loads of
+    the same file memory-map those arrays and skip parsing and validation;
+    the columns of a cached load are read-only. The cache entry is tied to
+    the file's path, size, mtime and content hash, and is rebuilt when the
+    source changes (a touched but unchanged file is re-hashed, not re-parsed).
+    Entries are built by streaming the file in blocks of chunk_rows rows
+    (see iter_csv), so building one never holds the whole file in memory.
+
     Raises ValueError if required columns are missing or data is invalid.
     """
+    if cache_dir is not None:
+        return _load_cached(path, cache_dir, chunk_rows)
+    return _read_and_validate(path)
+
+
+def iter_csv(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream a 1-minute OHLC CSV file as validated DataFrame blocks.
+
+    Same parsing and checks as load_csv, applied to blocks of at most
+    chunk_rows rows, so peak memory is bounded by the block size. Every
+    check is row-wise, so block boundaries cannot hide or create a
+    violation. Missing required columns are reported before any row is read.
+
+    Raises ValueError (when the offending block is reached) like load_csv.
+    """
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be >= 1")
+    _check_columns(pd.read_csv(path, index_col=0, nrows=0))
+    with pd.read_csv(path, parse_dates=True, index_col=0, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            _prepare_and_validate(chunk)
+            yield chunk
+
+
+def _read_and_validate(path: str) -> pd.DataFrame:
     df = pd.read_csv(path, parse_dates=True, index_col=0)
-    df.index = pd.to_datetime(df.index)
-    df.index.name = "timestamp"
+    _prepare_and_validate(df)
+    return df
+
 
+def _check_columns(df: pd.DataFrame):
     missing = REQUIRED_COLUMNS - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
+
+def _prepare_and_validate(df: pd.DataFrame):
+    """Turn the first column into the DatetimeIndex and run the data checks (in place)."""
+    df.index = pd.to_datetime(df.index)
+    df.index.name = "timestamp"
+
+    _check_columns(df)
+
     if df.isna().any().any():
         raise ValueError("Dataset contains NaN values")
 
@@ -31,19 +95,21 @@ def load_csv(path: str) -> pd.DataFrame:
     if not (df["low"] <= df[["open", "close"]].min(axis=1)).all():
         raise ValueError("OHLC sanity check failed: low > min(open, close)")
 
-    return df
-
 
-def resample(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+def resample(df: Union[pd.DataFrame, MarketData], timeframe: str) -> Union[pd.DataFrame, MarketData]:
     """Resample a 1-minute OHLC DataFrame to a larger timeframe.
 
     Args:
-        df: DataFrame with DatetimeIndex and OHLC + spread columns.
+        df: DataFrame with DatetimeIndex and OHLC + spread columns, or MarketData.
         timeframe: Pandas-compatible frequency string (e.g. '5min', '15min', '30min', '60min').
 
     Returns:
-        Resampled DataFrame with standard OHLC aggregation.
+        Resampled DataFrame with standard OHLC aggregation (a MarketData for
+        MarketData input, aggregated on the arrays without a DataFrame).
     """
+    if isinstance(df, MarketData):
+        return _resample_market_data(df, timeframe)
+
     agg_rules = {
         "open": "first",
         "high": "max",
@@ -54,3 +120,263 @@ def resample(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
     resampled = df.resample(timeframe).agg(agg_rules)
     resampled.dropna(inplace=True)
     return resampled
+
+
+def _resample_market_data(data: MarketData, timeframe: str) -> MarketData:
+    """resample() on arrays: bins are runs of equal floor(timestamp / step).
+
+    Matches the DataFrame path bit for bit for naive/UTC data and
+    frequencies that divide a day (bins then start at epoch multiples of the
+    step, as pandas' bins anchored at midnight do; spread means use pandas'
+    compensated summation, see _bin_means). Other inputs go through a
+    DataFrame.
+    """
+    step = pd.Timedelta(timeframe).value
+    if not _epoch_aligned(data.tz, step):
+        return MarketData.from_frame(resample(data.to_frame(), timeframe))
+
+    if len(data) == 0:
+        return data
+    bins, starts, ends = _bin_bounds(data.timestamp, step)
+    return MarketData(
+        bins,
+        data["open"][starts],
+        np.maximum.reduceat(data["high"], starts),
+        np.minimum.reduceat(data["low"], starts),
+        data["close"][ends - 1],
+        _bin_means(data["spread"], starts, ends),
+        tz=data.tz,
+        index_name=data.index_name,
+    )
+
+
+def _epoch_aligned(tz: Optional[str], step: int) -> bool:
+    """Whether pandas' bins of width `step` (ns) start at epoch multiples of it.
+
+    True for naive/UTC data and widths that divide a day, where the bins
+    anchored at midnight are the runs of equal floor(timestamp / step).
+    """
+    return tz in (None, "UTC") and step > 0 and _DAY_NS % step == 0
+
+
+def _bin_bounds(timestamp: np.ndarray, step: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bins of sorted int64 `timestamp` for an epoch-aligned width `step`.
+
+    Returns the start time of every non-empty bin and its first and
+    past-the-end positions in `timestamp`.
+    """
+    bins = timestamp // step * step
+    starts = np.flatnonzero(np.concatenate([[True], bins[1:] != bins[:-1]]))
+    ends = np.append(starts[1:], len(bins))
+    return bins[starts], starts, ends
+
+
+def _bin_means(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Mean of values[start:end] per bin, bit-identical to pandas' groupby mean.
+
+    Uses the same Kahan-compensated running sum over the bin's non-NaN
+    values, in row order, vectorized across bins: one step per row of the
+    longest bin. Bins are ordered longest first, so each step updates a
+    prefix of them.
+    """
+    lengths = ends - starts
+    order = np.argsort(-lengths, kind="stable")
+    first = starts[order]
+    # Bins still running at step k: the first active[k] of them
+    active = np.searchsorted(-lengths[order], -np.arange(int(lengths.max(initial=0))), side="left")
+    has_nan = bool(np.isnan(values).any())
+    has_inf = bool(np.isinf(values).any())
+    sums = np.zeros(len(starts))
+    carry = np.zeros(len(starts))
+    counts = np.zeros(len(starts), dtype=np.int64) if has_nan else lengths[order]
+    y = np.empty(len(starts))
+    t = np.empty(len(starts))
+    for k, m in enumerate(active):
+        value = values[first[:m] + k]
+        if has_nan:
+            valid = ~np.isnan(value)
+            counts[:m] += valid
+            value[~valid] = 0.0
+        y_, t_, total, c = y[:m], t[:m], sums[:m], carry[:m]
+        np.subtract(value, c, out=y_)
+        np.add(total, y_, out=t_)
+        if has_nan:
+            c[valid] = (t_ - total - y_)[valid]
+            total[valid] = t_[valid]
+        else:
+            np.subtract(t_, total, out=c)
+            c -= y_
+            total[:] = t_
+        if has_inf:
+            # An infinite value gives a NaN compensation; pandas resets it to 0
+            c[np.isnan(c)] = 0.0
+    means = np.empty(len(starts))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means[order] = np.where(counts > 0, sums / counts, np.nan)
+    return means
+
+
+def _load_cached(path: str, cache_dir: str, chunk_rows: int) -> pd.DataFrame:
+    """load_csv through the .npy column cache."""
+    source = os.path.abspath(path)
+    stat = os.stat(source)
+    entry = os.path.join(cache_dir, hashlib.blake2b(source.encode(), digest_size=8).hexdigest())
+    meta_path = os.path.join(entry, "meta.json")
+
+    meta = _read_json(meta_path)
+    if meta is not None and meta.get("version") == CACHE_VERSION and meta.get("source") == source:
+        fresh = meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns
+        if not fresh and meta["size"] == stat.st_size and meta["content_hash"] == _file_hash(source):
+            # Touched but unchanged: keep the arrays, record the new mtime
+            meta["mtime_ns"] = stat.st_mtime_ns
+            _write_json(meta_path, meta)
+            fresh = True
+        if fresh:
+            try:
+                return _read_entry(entry, meta)
+            except (OSError, ValueError):
+                pass  # damaged entry: rebuild below
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source": source,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": _file_hash(source),
+    }
+    if not _build_entry(entry, iter_csv(source, chunk_rows), meta):
+        # Empty file or non-numeric columns: nothing to map
+        return _read_and_validate(source)
+    return _read_entry(entry, _read_json(meta_path))
+
+
+def _read_entry(entry: str, meta: dict) -> pd.DataFrame:
+    timestamps = np.load(os.path.join(entry, "timestamp.npy"), mmap_mode="r")
+    index = pd.DatetimeIndex(timestamps.view("M8[ns]"), name=meta["index_name"])
+    if meta["tz"] is not None:
+        index = index.tz_localize("UTC").tz_convert(meta["tz"])
+    index = index.as_unit(meta["unit"])
+    # np.asarray drops the memmap subclass but keeps the mapping (no copy)
+    columns = {
+        name: np.asarray(np.load(os.path.join(entry, f"col{k}.npy"), mmap_mode="r"))
+        for k, name in enumerate(meta["columns"])
+    }
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _build_entry(entry: str, chunks: Iterable[pd.DataFrame], meta: dict) -> bool:
+    """Stream validated blocks into a new cache entry; False if the data cannot be cached.
+
+    The entry is assembled in a temporary directory and moved into place
+    once complete, so readers never see a partial entry.
+    """
+    tmp = f"{entry}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    writers: Dict[str, _ColumnWriter] = {}
+    try:
+        rows = 0
+        for chunk in chunks:
+            if not writers:
+                if any(chunk[name].dtype.kind not in "biuf" for name in chunk.columns):
+                    shutil.rmtree(tmp)
+                    return False
+                writers["timestamp"] = _ColumnWriter(os.path.join(tmp, "timestamp"))
+                for k, name in enumerate(chunk.columns):
+                    writers[name] = _ColumnWriter(os.path.join(tmp, f"col{k}"))
+                meta.update(
+                    columns=[str(name) for name in chunk.columns],
+                    index_name=chunk.index.name,
+                    tz=None if chunk.index.tz is None else str(chunk.index.tz),
+                    unit=chunk.index.unit,
+                )
+            writers["timestamp"].append(chunk.index.as_unit("ns").asi8)
+            for name in chunk.columns:
+                writers[name].append(chunk[name].to_numpy())
+            rows += len(chunk)
+        if not writers:
+            shutil.rmtree(tmp)
+            return False
+
+        for writer in writers.values():
+            writer.finish(rows)
+        _write_json(os.path.join(tmp, "meta.json"), meta)
+    except BaseException:
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # another process installed it first
+    return True
+
+
+class _ColumnWriter:
+    """Appends blocks of one column to a raw file, then turns it into a .npy file.
+
+    The dtype is promoted if a later block needs it (e.g. an int column
+    that turns out to hold floats); already written rows are converted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dtype: Optional[np.dtype] = None
+        self._raw = open(f"{path}.raw", "wb")
+
+    def append(self, values: np.ndarray):
+        dtype = values.dtype if self.dtype is None else np.result_type(self.dtype, values.dtype)
+        if self.dtype is not None and dtype != self.dtype:
+            self._promote(dtype)
+        self.dtype = dtype
+        self._raw.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def close(self):
+        self._raw.close()
+
+    def finish(self, rows: int):
+        self._raw.close()
+        header = {"descr": np.lib.format.dtype_to_descr(self.dtype),
+                  "fortran_order": False, "shape": (rows,)}
+        with open(f"{self.path}.npy", "wb") as out, open(f"{self.path}.raw", "rb") as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(raw, out, _HASH_CHUNK)
+        os.remove(f"{self.path}.raw")
+
+    def _promote(self, dtype: np.dtype):
+        self._raw.close()
+        block = _HASH_CHUNK // self.dtype.itemsize
+        with open(f"{self.path}.raw", "rb") as raw, open(f"{self.path}.raw2", "wb") as out:
+            while True:
+                values = np.fromfile(raw, dtype=self.dtype, count=block)
+                if not values.size:
+                    break
+                out.write(values.astype(dtype).tobytes())
+        os.replace(f"{self.path}.raw2", f"{self.path}.raw")
+        self._raw = open(f"{self.path}.raw", "ab")
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,144 @@
+import json
+import os
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("open", "high", "low", "close", "spread")
+
+
+class MarketData:
+    """1-min OHLC + spread as read-only NumPy arrays, without a DataFrame.
+
+    Holds int64 epoch-nanosecond timestamps (UTC for tz-aware data) and one
+    float64 array per column. Arrays opened with load() are np.memmap views
+    of .npy files, so every process that opens the same directory shares one
+    page-cached copy. Slicing by rows (data[a:b]) or by date range
+    (between()) returns views, never copies.
+
+    BacktestEngine, resample, MultiResolutionScanner, IndicatorCache and
+    MACrossoverStrategy accept a MarketData wherever they take a DataFrame.
+
+    Args:
+        timestamp: Sorted int64 epoch nanoseconds.
+        open, high, low, close, spread: float64 arrays of the same length.
+        tz: Time zone of the timestamps (None for naive).
+        index_name: Name given to the DatetimeIndex by index/to_frame().
+    """
+
+    def __init__(self, timestamp: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, spread: np.ndarray,
+                 tz: Optional[str] = None, index_name: Optional[str] = "timestamp"):
+        arrays = {"open": open, "high": high, "low": low, "close": close, "spread": spread}
+        self.timestamp = _read_only(np.asarray(timestamp, dtype=np.int64))
+        self._arrays: Dict[str, np.ndarray] = {
+            name: _read_only(np.asarray(values, dtype=np.float64)) for name, values in arrays.items()
+        }
+        if any(len(values) != len(self.timestamp) for values in self._arrays.values()):
+            raise ValueError("All columns must have the same length as timestamp")
+        self.tz = tz
+        self.index_name = index_name
+        self._index: Optional[pd.DatetimeIndex] = None
+
+    # --- Construction / storage ---
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MarketData":
+        """Wrap a DataFrame's columns (no copy when they are float64 already)."""
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("MarketData requires a DatetimeIndex")
+        missing = set(COLUMNS) - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        return cls(
+            df.index.as_unit("ns").asi8,
+            *(df[name].to_numpy(dtype=np.float64) for name in COLUMNS),
+            tz=None if df.index.tz is None else str(df.index.tz),
+            index_name=df.index.name,
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "MarketData":
+        """Memory-map a directory written by save()."""
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = [np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+                  for name in ("timestamp",) + COLUMNS]
+        return cls(*arrays, tz=meta["tz"], index_name=meta["index_name"])
+
+    def save(self, directory: str):
+        """Write one .npy file per column plus meta.json."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ("timestamp",) + COLUMNS:
+            np.save(os.path.join(directory, f"{name}.npy"), self[name], allow_pickle=False)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"tz": self.tz, "index_name": self.index_name}, f)
+
+    # --- Access ---
+
+    @property
+    def columns(self):
+        return COLUMNS
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, item: Union[str, slice]):
+        """data["close"] -> array; data[a:b] -> MarketData of rows a:b (views)."""
+        if isinstance(item, slice):
+            if item.step not in (None, 1):
+                raise ValueError("MarketData row slices must be contiguous")
+            return MarketData(self.timestamp[item], *(self._arrays[name][item] for name in COLUMNS),
+                              tz=self.tz, index_name=self.index_name)
+        if item == "timestamp":
+            return self.timestamp
+        return self._arrays[item]
+
+    def between(self, start=None, end=None) -> "MarketData":
+        """Rows with start <= timestamp < end (views). Bounds are anything pd.Timestamp accepts."""
+        first = 0 if start is None else int(np.searchsorted(self.timestamp, self._ns(start), "left"))
+        last = len(self) if end is None else int(np.searchsorted(self.timestamp, self._ns(end), "left"))
+        return self[first:max(first, last)]
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Timestamps as a DatetimeIndex (built on first access)."""
+        if self._index is None:
+            index = pd.DatetimeIndex(self.timestamp.view("M8[ns]"), name=self.index_name)
+            if self.tz is not None:
+                index = index.tz_localize("UTC").tz_convert(self.tz)
+            self._index = index
+        return self._index
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialize as a DataFrame (columns stay views of the arrays)."""
+        return pd.DataFrame({name: self._arrays[name] for name in COLUMNS},
+                            index=self.index, copy=False)
+
+    def _ns(self, value) -> int:
+        stamp = pd.Timestamp(value)
+        if self.tz is not None:
+            stamp = stamp.tz_localize(self.tz) if stamp.tzinfo is None else stamp.tz_convert(self.tz)
+        return stamp.as_unit("ns").value
+
+
+def column(data: Union[pd.DataFrame, MarketData], name: str) -> np.ndarray:
+    """Return a column of a DataFrame or MarketData as a contiguous float64 array."""
+    if isinstance(data, MarketData):
+        return np.ascontiguousarray(data[name])
+    return np.ascontiguousarray(data[name].to_numpy(dtype=np.float64))
+
+
+def timestamps(data: Union[pd.DataFrame, MarketData]) -> np.ndarray:
+    """Return the timestamps of a DataFrame or MarketData as int64 epoch nanoseconds."""
+    if isinstance(data, MarketData):
+        return data.timestamp
+    return data.index.as_unit("ns").asi8
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    if values.flags.writeable:
+        values = values.view()
+        values.flags.writeable = False
+    return values
@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from common.data_loader import _bin_bounds, _bin_means, _epoch_aligned, resample
+from common.indicators import IndicatorCache, default_cache
+from common.market_data import MarketData, column, timestamps
+
+DEFAULT_TIMEFRAMES = ("5min", "15min", "30min", "60min")
+
+
+@dataclass
+class PyramidLevel:
+    """One resampled timeframe and the 1-min rows behind each of its bars.
+
+    Attributes:
+        timeframe: Frequency string of the level.
+        bars: Resampled bars, same content as resample(data, timeframe)
+            (a DataFrame for DataFrame input, a MarketData for MarketData).
+        first_row: First 1-min row of each bar.
+        last_row: Last 1-min row of each bar (inclusive).
+    """
+    timeframe: str
+    bars: Union[pd.DataFrame, MarketData]
+    first_row: np.ndarray
+    last_row: np.ndarray
+
+
+@dataclass
+class _Bars:
+    """Working arrays of one level; spread is averaged from the 1-min rows when the level is built."""
+    step: Optional[int]  # bin width in ns, None if the bins are not epoch-aligned
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    first_row: np.ndarray
+    last_row: np.ndarray
+
+
+class ResamplePyramid:
+    """Several resample() timeframes of one 1-min dataset, built in one pass.
+
+    Timeframes are built finest first. The finest level is aggregated from
+    the 1-min arrays and every coarser level from the previous one's bars
+    (open of the first bar, max high, min low, close of the last bar),
+    whenever its width is a multiple of the previous width. Levels keep the
+    first/last 1-min row of every bar; spread is the mean of the bar's 1-min
+    spreads over those rows, with resample()'s compensated summation, so
+    every level is bit-identical to resample().
+
+    Array aggregation needs bins that start at epoch multiples of the width,
+    as pandas' midnight-anchored bins do for naive/UTC data and widths that
+    divide a day. Other timeframes or time zones are built with resample()
+    directly.
+
+    Args:
+        data: 1-min DataFrame (DatetimeIndex, OHLC + spread) or MarketData.
+        timeframes: Frequency strings, in any order.
+    """
+
+    def __init__(self, data: Union[pd.DataFrame, MarketData],
+                 timeframes: Sequence[str] = DEFAULT_TIMEFRAMES):
+        self.timeframes: Tuple[str, ...] = tuple(
+            sorted(set(timeframes), key=lambda timeframe: pd.Timedelta(timeframe)))
+        self.levels: Dict[str, PyramidLevel] = {}
+
+        rows = timestamps(data)
+        n = len(rows)
+        tz = data.tz if isinstance(data, MarketData) else (
+            None if data.index.tz is None else str(data.index.tz))
+        spread = column(data, "spread")
+        base = _Bars(
+            step=None, timestamp=rows,
+            open=column(data, "open"), high=column(data, "high"),
+            low=column(data, "low"), close=column(data, "close"),
+            first_row=np.arange(n), last_row=np.arange(n),
+        )
+
+        previous = base
+        for timeframe in self.timeframes:
+            step = pd.Timedelta(timeframe).value
+            if not _epoch_aligned(tz, step):
+                self.levels[timeframe] = _resampled_level(data, timeframe, rows)
+                continue
+            source = previous if previous.step and step % previous.step == 0 else base
+            bars = _aggregate(source, step) if n else base
+            self.levels[timeframe] = _as_level(data, timeframe, bars, spread, tz)
+            previous = bars
+
+    def __getitem__(self, timeframe: str) -> PyramidLevel:
+        return self.levels[timeframe]
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    @property
+    def nbytes(self) -> int:
+        total = 0
+        for level in self.levels.values():
+            total += level.first_row.nbytes + level.last_row.nbytes
+            bars = level.bars
+            total += (bars.memory_usage(index=True).sum() if isinstance(bars, pd.DataFrame)
+                      else bars.timestamp.nbytes * (1 + len(bars.columns)))
+        return int(total)
+
+
+def build_pyramid(data: Union[pd.DataFrame, MarketData],
+                  timeframes: Sequence[str] = DEFAULT_TIMEFRAMES,
+                  cache: Optional[IndicatorCache] = None) -> ResamplePyramid:
+    """Return the ResamplePyramid of `data`, cached by data fingerprint and timeframes.
+
+    Uses the shared IndicatorCache unless `cache` is given, so repeated runs
+    on the same data skip the resampling.
+    """
+    cache = default_cache() if cache is None else cache
+    key = tuple(sorted(set(timeframes), key=lambda timeframe: pd.Timedelta(timeframe)))
+    return cache.lookup(data, None, "pyramid", key, lambda: ResamplePyramid(data, key))
+
+
+def _aggregate(source: _Bars, step: int) -> _Bars:
+    """Group consecutive bars of `source` with the same floor(timestamp / step)."""
+    bins, starts, ends = _bin_bounds(source.timestamp, step)
+    return _Bars(
+        step=step,
+        timestamp=bins,
+        open=source.open[starts],
+        high=np.maximum.reduceat(source.high, starts),
+        low=np.minimum.reduceat(source.low, starts),
+        close=source.close[ends - 1],
+        first_row=source.first_row[starts],
+        last_row=source.last_row[ends - 1],
+    )
+
+
+def _as_level(data, timeframe: str, bars: _Bars, spread: np.ndarray,
+              tz: Optional[str]) -> PyramidLevel:
+    market = MarketData(bars.timestamp, bars.open, bars.high, bars.low, bars.close,
+                        _bin_means(spread, bars.first_row, bars.last_row + 1), tz=tz,
+                        index_name=data.index_name if isinstance(data, MarketData) else data.index.name)
+    if isinstance(data, MarketData):
+        out = market
+    else:
+        out = market.to_frame()
+        out.index = out.index.as_unit(data.index.unit)
+    return PyramidLevel(timeframe, out, bars.first_row, bars.last_row)
+
+
+def _resampled_level(data, timeframe: str, rows: np.ndarray) -> PyramidLevel:
+    bars = resample(data, timeframe)
+    bar_start = timestamps(bars)
+    bar_end = bar_start + pd.Timedelta(timeframe).value
+    return PyramidLevel(
+        timeframe, bars,
+        first_row=np.searchsorted(rows, bar_start, side="left"),
+        last_row=np.searchsorted(rows, bar_end, side="left") - 1,
+    )
@@ -1,20 +1,38 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Mapping, Union
 
 import pandas as pd
 
-from strategies.signals import Signal
+from strategies.signals import Signal, SignalBatch
 
 
 class BaseStrategy(ABC):
     @abstractmethod
-    def generate(self, df: pd.DataFrame) -> List[Signal]:
+    def generate(self, df: pd.DataFrame) -> Union[List[Signal], SignalBatch]:
         """Generate trading signals from OHLC data.
 
         Args:
-            df: DataFrame with DatetimeIndex and columns: open, high, low, close, spread.
+            df: DataFrame with DatetimeIndex and columns: open, high, low, close, spread
+                (strategies may also accept a common.market_data.MarketData).
 
         Returns:
-            List of Signal objects ordered by timestamp_index.
+            List of Signal objects ordered by timestamp_index, or a SignalBatch
+            (preferred for strategies that emit many signals).
         """
         ...
+
+    def on_bar(self, bar: Mapping[str, float]) -> List[Signal]:
+        """Process the next candle of a stream and return the signals it triggers.
+
+        Streaming counterpart of generate(): feeding the candles of df one by
+        one (bar 0 first) returns, bar by bar, exactly the signals generate(df)
+        emits at that candle index. Call reset() before starting a new stream.
+
+        Args:
+            bar: The candle's fields (open, high, low, close, spread), e.g. a
+                row of df or a dict.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming")
+
+    def reset(self):
+        """Forget the state of the on_bar() stream."""
@@ -1,10 +1,13 @@
-from typing import List, Optional
+from typing import List, Mapping, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from common.indicators import IndicatorCache, RollingSMA, data_fingerprint, default_cache
+from common.market_data import MarketData, column
 from common.models import SignalType
 from strategies.base_strategy import BaseStrategy
-from strategies.signals import Signal
+from strategies.signals import SIGNAL_TYPE_CODES, Signal, SignalBatch
 
 
 class MACrossoverStrategy(BaseStrategy):
@@ -14,13 +17,17 @@ class MACrossoverStrategy(BaseStrategy):
         slow_period: int = 30,
         sl_pct: float = 0.02,
         tp_pct: float = 0.02,
+        indicator_cache: Optional[IndicatorCache] = None,
     ):
         self.fast_period = fast_period
         self.slow_period = slow_period
         self.sl_pct = sl_pct
         self.tp_pct = tp_pct
+        # Shared by default, so instances in a parameter sweep reuse each other's MAs
+        self.indicator_cache = indicator_cache if indicator_cache is not None else default_cache()
+        self.reset()
 
-    def generate(self, df: pd.DataFrame) -> List[Signal]:
+    def generate(self, df: Union[pd.DataFrame, MarketData]) -> List[Signal]:
         """Generate LONG/SHORT signals based on fast/slow MA crossover.
 
         Crossover (fast crosses above slow) -> LONG
@@ -33,64 +40,93 @@ class MACrossoverStrategy(BaseStrategy):
         All signals use size=1.0 (100% of available cash).
         SL/TP levels are computed relative to the close price at the signal candle.
         """
+        return self.generate_batch(df).to_signals()
+
+    def generate_batch(self, df: Union[pd.DataFrame, MarketData]) -> SignalBatch:
+        """Vectorized signal generation; same signals as generate(), as a SignalBatch.
+
+        Crossovers are found with array comparisons on the shifted MAs (a NaN
+        on either candle compares False, so warm-up candles never cross), and
+        a CLOSE row is placed before every entry whose direction differs from
+        the previous entry's. Moving averages come from the indicator cache.
+        """
         if len(df) < self.slow_period:
+            return SignalBatch.from_signals([])
+
+        # Hash the data once for both lookups
+        fingerprint = data_fingerprint(df, ["close"])
+        fast_ma = self.indicator_cache.sma(df, "close", self.fast_period, fingerprint)
+        slow_ma = self.indicator_cache.sma(df, "close", self.slow_period, fingerprint)
+        prev_fast, prev_slow = fast_ma[:-1], slow_ma[:-1]
+        curr_fast, curr_slow = fast_ma[1:], slow_ma[1:]
+
+        # Cross above: fast was <= slow, now fast > slow -> LONG
+        cross_above = (prev_fast <= prev_slow) & (curr_fast > curr_slow)
+        # Cross below: fast was >= slow, now fast < slow -> SHORT
+        cross_below = ~cross_above & (prev_fast >= prev_slow) & (curr_fast < curr_slow)
+
+        entry_index = np.flatnonzero(cross_above | cross_below) + 1
+        is_long = cross_above[entry_index - 1]
+        signal_close = column(df, "close")[entry_index]
+        sl = np.where(is_long, signal_close * (1 - self.sl_pct), signal_close * (1 + self.sl_pct))
+        tp = np.where(is_long, signal_close * (1 + self.tp_pct), signal_close * (1 - self.tp_pct))
+
+        # Reversals: CLOSE first at the same candle index, then the new direction
+        reversal = np.zeros(len(entry_index), dtype=bool)
+        reversal[1:] = is_long[1:] != is_long[:-1]
+        entry_row = np.arange(len(entry_index)) + np.cumsum(reversal)
+        close_row = entry_row[reversal] - 1
+
+        rows = len(entry_index) + int(reversal.sum())
+        timestamp_index = np.empty(rows, dtype=np.int64)
+        signal_type = np.zeros(rows, dtype=np.int8)  # CLOSE rows keep code 0
+        stop_loss_level = np.zeros(rows)
+        take_profit_level = np.zeros(rows)
+
+        timestamp_index[entry_row] = entry_index
+        timestamp_index[close_row] = entry_index[reversal]
+        signal_type[entry_row] = np.where(is_long, SIGNAL_TYPE_CODES[SignalType.LONG],
+                                          SIGNAL_TYPE_CODES[SignalType.SHORT])
+        stop_loss_level[entry_row] = sl
+        take_profit_level[entry_row] = tp
+
+        # All signals use size=1.0 (100% of available cash / of the position)
+        return SignalBatch(timestamp_index, signal_type, stop_loss_level,
+                           take_profit_level, np.ones(rows))
+
+    def reset(self):
+        self._fast = RollingSMA(self.fast_period)
+        self._slow = RollingSMA(self.slow_period)
+        self._prev_fast = self._prev_slow = float("nan")
+        self._last_long: Optional[bool] = None  # direction of the previous entry
+
+    def on_bar(self, bar: Mapping[str, float]) -> List[Signal]:
+        """Streaming generate(): the signals at this candle, in O(1) time and memory.
+
+        Both MAs are RollingSMA ring buffers, which reproduce the cached SMAs
+        bit for bit, so a replay of df returns exactly generate(df).
+        """
+        index = self._fast.count
+        close = float(bar["close"])
+        fast, slow = self._fast.update(close), self._slow.update(close)
+        prev_fast, prev_slow = self._prev_fast, self._prev_slow
+        self._prev_fast, self._prev_slow = fast, slow
+
+        # Same comparisons as generate_batch (NaN compares False)
+        if prev_fast <= prev_slow and fast > slow:
+            is_long = True
+        elif prev_fast >= prev_slow and fast < slow:
+            is_long = False
+        else:
             return []
 
-        close = df["close"]
-        fast_ma = close.rolling(window=self.fast_period).mean()
-        slow_ma = close.rolling(window=self.slow_period).mean()
-
-        signals: List[Signal] = []
-        last_direction: Optional[SignalType] = None
-
-        for i in range(1, len(df)):
-            if pd.isna(fast_ma.iloc[i - 1]) or pd.isna(slow_ma.iloc[i - 1]):
-                continue
-            if pd.isna(fast_ma.iloc[i]) or pd.isna(slow_ma.iloc[i]):
-                continue
-
-            prev_fast = fast_ma.iloc[i - 1]
-            prev_slow = slow_ma.iloc[i - 1]
-            curr_fast = fast_ma.iloc[i]
-            curr_slow = slow_ma.iloc[i]
-
-            signal_close = close.iloc[i]
-            new_direction: Optional[SignalType] = None
-
-            # Cross above: fast was <= slow, now fast > slow -> LONG
-            if prev_fast <= prev_slow and curr_fast > curr_slow:
-                new_direction = SignalType.LONG
-                sl = signal_close * (1 - self.sl_pct)
-                tp = signal_close * (1 + self.tp_pct)
-
-            # Cross below: fast was >= slow, now fast < slow -> SHORT
-            elif prev_fast >= prev_slow and curr_fast < curr_slow:
-                new_direction = SignalType.SHORT
-                sl = signal_close * (1 + self.sl_pct)
-                tp = signal_close * (1 - self.tp_pct)
-
-            if new_direction is None:
-                continue
-
-            # If reversing, emit CLOSE first at the same candle index
-            if last_direction is not None and last_direction != new_direction:
-                signals.append(Signal(
-                    timestamp_index=i,
-                    signal_type=SignalType.CLOSE,
-                    stop_loss_level=0.0,
-                    take_profit_level=0.0,
-                    size=1.0,
-                ))
-
-            # Emit the directional signal
-            signals.append(Signal(
-                timestamp_index=i,
-                signal_type=new_direction,
-                stop_loss_level=sl,
-                take_profit_level=tp,
-                size=1.0,
-            ))
-
-            last_direction = new_direction
-
+        signals = []
+        if self._last_long is not None and self._last_long != is_long:
+            signals.append(Signal(index, SignalType.CLOSE, 0.0, 0.0, 1.0))
+        self._last_long = is_long
+        if is_long:
+            sl, tp = close * (1 - self.sl_pct), close * (1 + self.tp_pct)
+        else:
+            sl, tp = close * (1 + self.sl_pct), close * (1 - self.tp_pct)
+        signals.append(Signal(index, SignalType.LONG if is_long else SignalType.SHORT, sl, tp, 1.0))
         return signals
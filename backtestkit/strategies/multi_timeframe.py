@@ -0,0 +1,72 @@
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from common.indicators import IndicatorCache, default_cache
+from common.market_data import MarketData, timestamps
+from common.pyramid import build_pyramid
+from strategies.base_strategy import BaseStrategy
+from strategies.signals import Signal, SignalBatch
+
+
+def signal_index_map(data: Union[pd.DataFrame, MarketData], timeframe: str,
+                     cache: Optional[IndicatorCache] = None) -> np.ndarray:
+    """Return the 1-min signal index of every bar of resample(data, timeframe).
+
+    A signal computed on coarse bar k is only known once that bar has
+    closed, at bar_start + timeframe. It maps to the last 1-min row before
+    that time (found with searchsorted on int64 timestamps), so the engine
+    executes it at the open of the first 1-min candle at or after the bar's
+    close: no lookahead, and gaps in the 1-min data are handled.
+
+    Cached per (data fingerprint, timeframe) in the indicator cache.
+    """
+    cache = default_cache() if cache is None else cache
+
+    def compute() -> np.ndarray:
+        bars = build_pyramid(data, [timeframe], cache=cache)[timeframe].bars
+        bar_end = timestamps(bars) + pd.Timedelta(timeframe).value
+        return np.searchsorted(timestamps(data), bar_end, side="left") - 1
+
+    return cache.lookup(data, None, "signal_index_map", timeframe, compute)
+
+
+def map_signals(signals: Union[List[Signal], SignalBatch], data: Union[pd.DataFrame, MarketData],
+                timeframe: str, cache: Optional[IndicatorCache] = None) -> SignalBatch:
+    """Translate signals generated on resample(data, timeframe) to 1-min indexes of `data`.
+
+    Raises ValueError for signal indexes outside the resampled frame.
+    """
+    if not isinstance(signals, SignalBatch):
+        signals = SignalBatch.from_signals(signals)
+    mapping = signal_index_map(data, timeframe, cache)
+    index = signals.timestamp_index
+    if len(index) and (index.min() < 0 or index.max() >= len(mapping)):
+        raise ValueError(f"Signal index outside the {timeframe} bars (0..{len(mapping) - 1})")
+    return SignalBatch(mapping[index], signals.signal_type, signals.stop_loss_level,
+                       signals.take_profit_level, signals.size)
+
+
+class ResampledStrategy(BaseStrategy):
+    """Run a strategy on resampled bars and return signals on the 1-min data.
+
+    generate(df) resamples df to `timeframe` (through the cached pyramid),
+    runs the wrapped strategy on the bars and maps its signals back with
+    map_signals, so the result can be passed to BacktestEngine with df.
+
+    Args:
+        strategy: Strategy to run on the resampled bars.
+        timeframe: Resample frequency (e.g. '15min').
+        cache: Indicator cache for the pyramid and index maps (default: shared).
+    """
+
+    def __init__(self, strategy: BaseStrategy, timeframe: str,
+                 cache: Optional[IndicatorCache] = None):
+        self.strategy = strategy
+        self.timeframe = timeframe
+        self.cache = cache
+
+    def generate(self, df: Union[pd.DataFrame, MarketData]) -> SignalBatch:
+        bars = build_pyramid(df, [self.timeframe], cache=self.cache)[self.timeframe].bars
+        return map_signals(self.strategy.generate(bars), df, self.timeframe, self.cache)
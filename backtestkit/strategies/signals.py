@@ -1,12 +1,102 @@
+import gc
 from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
 
 from common.models import SignalType
 
 
-@dataclass
+@dataclass(slots=True)
 class Signal:
     timestamp_index: int
     signal_type: SignalType
     stop_loss_level: float
     take_profit_level: float
     size: float
+
+
+# Codes used in SignalBatch.signal_type (directions match the trade ledger's codes)
+SIGNAL_TYPE_CODES = {SignalType.CLOSE: 0, SignalType.LONG: 1, SignalType.SHORT: -1}
+_SIGNAL_TYPES = {code: signal_type for signal_type, code in SIGNAL_TYPE_CODES.items()}
+
+
+class SignalBatch:
+    """Signals stored as parallel NumPy arrays.
+
+    Same fields as Signal, one row per signal, with signal_type held as an
+    int8 code (CLOSE 0, LONG 1, SHORT -1). Rows are sorted by timestamp_index
+    and, within a candle, CLOSE signals come before entries; otherwise the
+    input order is kept (stable sort). This is the order in which the
+    engine executes them.
+
+    Args:
+        timestamp_index: Candle index of each signal.
+        signal_type: SIGNAL_TYPE_CODES code of each signal.
+        stop_loss_level: SL price (0.0 for CLOSE).
+        take_profit_level: TP price (0.0 for CLOSE).
+        size: Allocation fraction (entries) or position fraction (CLOSE).
+    """
+
+    def __init__(self, timestamp_index, signal_type, stop_loss_level,
+                 take_profit_level, size):
+        timestamp_index = np.asarray(timestamp_index, dtype=np.int64)
+        signal_type = np.asarray(signal_type, dtype=np.int8)
+        stop_loss_level = np.asarray(stop_loss_level, dtype=np.float64)
+        take_profit_level = np.asarray(take_profit_level, dtype=np.float64)
+        size = np.asarray(size, dtype=np.float64)
+
+        n = len(timestamp_index)
+        if timestamp_index.ndim != 1 or any(
+                a.shape != (n,) for a in (signal_type, stop_loss_level, take_profit_level, size)):
+            raise ValueError("SignalBatch columns must be 1-D arrays of equal length")
+        if not np.isin(signal_type, list(_SIGNAL_TYPES)).all():
+            raise ValueError("Unknown signal type code in SignalBatch")
+
+        order = np.lexsort((signal_type != 0, timestamp_index))
+        self.timestamp_index = timestamp_index[order]
+        self.signal_type = signal_type[order]
+        self.stop_loss_level = stop_loss_level[order]
+        self.take_profit_level = take_profit_level[order]
+        self.size = size[order]
+
+    @classmethod
+    def from_signals(cls, signals: Sequence[Signal]) -> "SignalBatch":
+        """Build a batch from Signal objects."""
+        return cls(
+            [s.timestamp_index for s in signals],
+            [SIGNAL_TYPE_CODES[s.signal_type] for s in signals],
+            [s.stop_loss_level for s in signals],
+            [s.take_profit_level for s in signals],
+            [s.size for s in signals],
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamp_index)
+
+    def to_signals(self) -> List[Signal]:
+        """Materialize the rows as Signal objects, in batch order.
+
+        The cyclic garbage collector is paused meanwhile: Signal objects
+        hold no references to containers, and with hundreds of thousands of
+        rows its collections took over half the time.
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return list(map(Signal, self.timestamp_index.tolist(),
+                            map(_SIGNAL_TYPES.__getitem__, self.signal_type.tolist()),
+                            self.stop_loss_level.tolist(), self.take_profit_level.tolist(),
+                            self.size.tolist()))
+        finally:
+            if enabled:
+                gc.enable()
+
+    def groups(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (candles, offsets): the distinct signal candles, ascending,
+        and row offsets such that rows offsets[k]:offsets[k + 1] belong to candles[k].
+        """
+        index = self.timestamp_index
+        starts = np.flatnonzero(np.diff(index)) + 1
+        offsets = np.concatenate(([0], starts, [len(index)])) if len(index) else np.zeros(1, np.int64)
+        return index[offsets[:-1]], offsets.astype(np.int64)
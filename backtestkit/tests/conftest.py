@@ -0,0 +1,109 @@
+"""Shared fixtures and helpers for the engine test modules.
+
+The ``ohlc`` fixture builds a seeded random walk of candles. A module picks its
+own walk with ``pytestmark = pytest.mark.ohlc(seed=..., n=...)``, and a single
+test can override that through indirect parametrization with a dict of the same
+keyword arguments. ``gappy_df`` works the same way with ``pytest.mark.gappy_ohlc``.
+Helpers are plain functions: import them with ``from tests.conftest import ...``.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.engine import BacktestEngine
+from common.models import ExecutionMode
+from strategies.ma_crossover import MACrossoverStrategy
+
+INITIAL_CAPITAL = 10_000.0
+
+
+def random_walk_ohlc(seed=21, n=3000, freq="1min", start="2024-01-15 09:30", index_name=None,
+                     gap=None, spread=None):
+    """n seeded random-walk candles.
+
+    gap=(start, stop) drops those positions from a longer timestamp range, so the
+    index has a hole of stop - start candles; spread=None draws a random spread
+    per candle, a number uses that constant spread.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100.0 + np.cumsum(rng.normal(0, 0.3, n))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    wick = rng.uniform(0.0, 0.4, n)
+    hole = 0 if gap is None else gap[1] - gap[0]
+    timestamps = pd.date_range(start, periods=n + hole, freq=freq, name=index_name)
+    if gap is not None:
+        timestamps = timestamps.delete(slice(*gap))
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + wick,
+        "low": np.minimum(open_, close) - wick,
+        "close": close,
+        "spread": rng.uniform(0.05, 0.2, n) if spread is None else np.full(n, spread),
+    }, index=timestamps)
+
+
+def gappy_ohlc(seed, periods, gap, drop=0.1, start="2024-01-15 09:30"):
+    """Seeded 1-min candles over periods minutes with a share drop of them missing
+    at random and every minute in gap=(start, stop) missing, like a session break."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=periods, freq="1min", name="timestamp")
+    keep = rng.random(len(timestamps)) > drop
+    keep[slice(*gap)] = False
+    timestamps = timestamps[keep]
+    n = len(timestamps)
+    close = 100.0 + np.cumsum(rng.normal(0, 0.3, n))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + 0.2,
+        "low": np.minimum(open_, close) - 0.2,
+        "close": close,
+        "spread": rng.uniform(0.05, 0.2, n),
+    }, index=timestamps)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "ohlc(**kwargs): random_walk_ohlc() arguments for the ohlc fixture")
+    config.addinivalue_line("markers", "gappy_ohlc(**kwargs): gappy_ohlc() arguments for the gappy_df fixture")
+
+
+@pytest.fixture
+def ohlc(request):
+    """Seeded random-walk candles; see random_walk_ohlc() for the arguments."""
+    marker = request.node.get_closest_marker("ohlc")
+    kwargs = dict(marker.kwargs) if marker else {}
+    kwargs.update(getattr(request, "param", {}))
+    return random_walk_ohlc(**kwargs)
+
+
+@pytest.fixture
+def gappy_df(request):
+    """Seeded candles with missing minutes; see gappy_ohlc() for the arguments."""
+    kwargs = dict(request.node.get_closest_marker("gappy_ohlc").kwargs)
+    kwargs.update(getattr(request, "param", {}))
+    return gappy_ohlc(**kwargs)
+
+
+def ma_strategy():
+    """The MA crossover the engine tests run unless they need something else."""
+    return MACrossoverStrategy(fast_period=5, slow_period=20, sl_pct=0.01, tp_pct=0.01)
+
+
+def run_backtest(data, mode=ExecutionMode.SPREAD_ON, signals=None, **kwargs):
+    """Run BacktestEngine over data, with ma_strategy() signals unless given."""
+    signals = ma_strategy().generate_batch(data) if signals is None else signals
+    return BacktestEngine(data, signals, mode, INITIAL_CAPITAL, **kwargs).run()
+
+
+def assert_identical_results(r1, r2):
+    """Two BacktestResults match field for field, with no tolerance."""
+    assert r1.final_equity == r2.final_equity
+    assert r1.realized_pnl == r2.realized_pnl
+    assert r1.unrealized_pnl == r2.unrealized_pnl
+    assert r1.trades == r2.trades
+    assert r1.snapshots == r2.snapshots
+
+
+def assert_columns_equal(actual, expected):
+    """Every column of expected matches the same column of actual exactly."""
+    for name, values in expected.items():
+        np.testing.assert_array_equal(actual[name], values, err_msg=name)
@@ -0,0 +1,116 @@
+import math
+
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.analytics import ROLLING_COLUMNS, rolling_metrics, sliced_metrics
+from backtester.engine import BacktestEngine
+from backtester.metrics import METRIC_NAMES, PERIODS_PER_YEAR
+from common.models import ExecutionMode
+from tests.conftest import run_backtest
+
+pytestmark = pytest.mark.ohlc(seed=23, freq="1h", start="2024-01-29 09:30")
+
+
+class TestRollingMetrics:
+    def test_matches_pandas_rolling(self, ohlc):
+        result = run_backtest(ohlc)
+        window = 100
+        rolling = rolling_metrics(result, ohlc.index, window, 10_000.0)
+        assert list(rolling.columns) == list(ROLLING_COLUMNS)
+        assert rolling.index.equals(ohlc.index)
+
+        equity = pd.Series(result.snapshots.equity, index=ohlc.index)
+        returns = pd.concat([pd.Series([10_000.0]), equity.reset_index(drop=True)]).pct_change().iloc[1:]
+        returns.index = ohlc.index
+        sharpe = returns.rolling(window).mean() / returns.rolling(window).std() * math.sqrt(PERIODS_PER_YEAR)
+        peak = equity.rolling(window).max()
+        exits = pd.Series(0.0, index=ohlc.index)
+        wins = pd.Series(0.0, index=ohlc.index)
+        for trade in result.trades:
+            if trade.exit_reason is not None:
+                exits.iloc[trade.exit_index] += 1
+                wins.iloc[trade.exit_index] += trade.pnl > 0
+        trades = exits.rolling(window).sum()
+
+        np.testing.assert_allclose(rolling["sharpe_ratio"], sharpe, rtol=1e-7)
+        np.testing.assert_array_equal(rolling["drawdown"], (peak - equity) / peak)
+        np.testing.assert_array_equal(rolling["trades"], trades)
+        np.testing.assert_allclose(rolling["win_rate"], wins.rolling(window).sum() / trades)
+        assert rolling["drawdown"].iloc[:window - 1].isna().all()
+
+    def test_on_change_snapshots(self, ohlc):
+        full = rolling_metrics(run_backtest(ohlc), ohlc.index, 60, 10_000.0)
+        decimated = rolling_metrics(run_backtest(ohlc, snapshot_mode="on_change"), ohlc.index, 60, 10_000.0)
+        pd.testing.assert_frame_equal(decimated, full)
+
+    def test_flat_window_has_zero_sharpe(self, ohlc):
+        result = BacktestEngine(ohlc, [], ExecutionMode.SPREAD_ON, 10_000.0).run()
+        rolling = rolling_metrics(result, ohlc.index, 50, 10_000.0)
+        assert (rolling["sharpe_ratio"].iloc[49:] == 0.0).all()
+        assert (rolling["drawdown"].iloc[49:] == 0.0).all()
+        assert rolling["win_rate"].iloc[49:].isna().all()
+
+    def test_rejects_mismatched_timestamps(self, ohlc):
+        with pytest.raises(ValueError, match="candles"):
+            rolling_metrics(run_backtest(ohlc), ohlc.index[:-1], 50, 10_000.0)
+
+    def test_rejects_missing_snapshots(self, ohlc):
+        with pytest.raises(ValueError, match="snapshots"):
+            rolling_metrics(run_backtest(ohlc, snapshot_mode="none"), ohlc.index, 50, 10_000.0)
+
+
+class TestSlicedMetrics:
+    def test_months_match_separate_evaluation(self, ohlc):
+        result = run_backtest(ohlc)
+        sliced = sliced_metrics(result, ohlc.index, 10_000.0, by="month")
+        assert list(sliced.columns) == list(METRIC_NAMES)
+        assert [str(p) for p in sliced.index] == ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05", "2024-06"]
+
+        equity = pd.Series(result.snapshots.equity, index=ohlc.index)
+        before = equity.shift(1).fillna(10_000.0)
+        closed = [t for t in result.trades if t.exit_reason is not None]
+        for period, row in sliced.iterrows():
+            in_month = ohlc.index.to_period("M") == period
+            month_equity = equity[in_month]
+            assert row["total_return"] == pytest.approx(month_equity.iloc[-1] / before[in_month].iloc[0] - 1.0)
+            curve = month_equity / before[in_month].iloc[0]
+            peak = np.maximum.accumulate(np.concatenate([[1.0], curve]))
+            assert row["max_drawdown"] == pytest.approx(np.max((peak[1:] - curve) / peak[1:]))
+            month_trades = [t.pnl for t in closed if in_month[t.exit_index]]
+            assert row["total_trades"] == len(month_trades)
+            assert row["win_rate"] == pytest.approx(np.mean(np.array(month_trades) > 0))
+        assert sliced["total_trades"].sum() == len(closed)
+
+    def test_sessions_of_tz_aware_index(self, ohlc):
+        """Sessions are calendar days in the index's own time zone."""
+        local = ohlc.tz_localize("UTC").tz_convert("America/New_York")
+        sliced = sliced_metrics(run_backtest(local), local.index, 10_000.0, by="session")
+        assert len(sliced) == len(np.unique(local.index.date))
+
+    def test_sessions_crossing_midnight(self, ohlc):
+        """With session_start, a 18:00-17:00 New York session stays one slice."""
+        result = run_backtest(ohlc)
+        sliced = sliced_metrics(result, ohlc.index, 10_000.0, by="session",
+                                session_start="18:00", tz="America/New_York")
+        local = ohlc.index.tz_localize("UTC").tz_convert("America/New_York").tz_localize(None)
+        days = (local + pd.Timedelta("6h")).to_period("D")
+        assert list(sliced.index) == sorted(set(days))
+        evening = local.get_loc(pd.Timestamp("2024-02-05 19:30"))
+        morning = local.get_loc(pd.Timestamp("2024-02-06 03:30"))
+        assert days[evening] == days[morning] == pd.Period("2024-02-06", "D")
+        closed = [t for t in result.trades if t.exit_reason is not None]
+        for day, row in sliced.iterrows():
+            assert row["total_trades"] == sum(days[t.exit_index] == day for t in closed)
+
+    def test_labels_per_candle(self, ohlc):
+        """Non-contiguous slices: by hour of day."""
+        result = run_backtest(ohlc)
+        sliced = sliced_metrics(result, ohlc.index, 10_000.0, by=ohlc.index.hour)
+        assert list(sliced.index) == list(range(24))
+        assert sliced.index.name == "slice"
+        assert sliced["total_trades"].sum() == sum(t.exit_reason is not None for t in result.trades)
+
+    def test_unknown_slice(self, ohlc):
+        with pytest.raises(ValueError, match="slice"):
+            sliced_metrics(run_backtest(ohlc), ohlc.index, 10_000.0, by="year")
@@ -0,0 +1,121 @@
+import pytest
+import pandas as pd
+from backtester.checkpoint import EngineCheckpoint
+from backtester.engine import BacktestEngine
+from common.market_data import MarketData
+from common.models import ExecutionMode, SignalType
+from strategies.signals import Signal
+from tests.conftest import assert_identical_results, ma_strategy
+
+pytestmark = pytest.mark.ohlc(seed=19)
+
+
+def run_in_steps(data, splits, mode=ExecutionMode.SPREAD_ON, signals_for=None, **kwargs):
+    """Run on growing prefixes of data, resuming from the previous checkpoint each time."""
+    checkpoint = None
+    for stop in list(splits) + [len(data)]:
+        part = data[:stop]
+        signals = signals_for(part) if signals_for else ma_strategy().generate_batch(part)
+        engine = BacktestEngine(part, signals, mode, 10_000.0, resume_from=checkpoint, **kwargs)
+        result = engine.run()
+        checkpoint = engine.checkpoint()
+    return result
+
+
+class TestResumeMatchesFullRun:
+    @pytest.mark.parametrize("core", ["columnar", "pandas", "event"])
+    @pytest.mark.parametrize("snapshot_mode", ["all", "every_n", "on_change", "none", "events"])
+    def test_cores_and_snapshot_modes(self, ohlc, core, snapshot_mode):
+        kwargs = dict(core=core, snapshot_mode=snapshot_mode, snapshot_every=7)
+        full = BacktestEngine(ohlc, ma_strategy().generate_batch(ohlc), ExecutionMode.SPREAD_ON,
+                              10_000.0, **kwargs).run()
+        assert_identical_results(run_in_steps(ohlc, [700, 1500, 2999], **kwargs), full)
+
+    @pytest.mark.parametrize("mode", list(ExecutionMode))
+    def test_execution_modes(self, ohlc, mode):
+        full = BacktestEngine(ohlc, ma_strategy().generate_batch(ohlc), mode, 10_000.0).run()
+        assert_identical_results(run_in_steps(ohlc, [1000, 2000], mode=mode), full)
+
+    @pytest.mark.parametrize("core", ["columnar", "pandas", "event"])
+    def test_pending_signals_and_stacked_units_cross_the_boundary(self, ohlc, core):
+        """Signals on the checkpoint's last candle execute on the first resumed candle."""
+        signals = [
+            Signal(99, SignalType.LONG, 50.0, 200.0, 0.5),
+            Signal(199, SignalType.LONG, 50.0, 200.0, 0.5),
+            Signal(299, SignalType.CLOSE, 0.0, 0.0, 0.5),
+            Signal(399, SignalType.CLOSE, 0.0, 0.0, 1.0),
+            Signal(399, SignalType.SHORT, 200.0, 50.0, 1.0),
+        ]
+        full = BacktestEngine(ohlc, signals, ExecutionMode.SPREAD_ON, 10_000.0, core=core).run()
+        resumed = run_in_steps(ohlc, [100, 200, 300, 400], core=core,
+                               signals_for=lambda part: [s for s in signals if s.timestamp_index < len(part)])
+        assert_identical_results(resumed, full)
+        assert resumed.trades[0].entry_index == 100
+
+    def test_no_new_candles(self, ohlc):
+        first = BacktestEngine(ohlc, ma_strategy().generate_batch(ohlc), ExecutionMode.SPREAD_ON, 10_000.0)
+        expected = first.run()
+        again = BacktestEngine(ohlc, ma_strategy().generate_batch(ohlc), ExecutionMode.SPREAD_ON, 10_000.0,
+                               resume_from=first.checkpoint())
+        assert_identical_results(again.run(), expected)
+
+    def test_appended_candles_only(self, ohlc):
+        """With index_offset, the resumed engine only needs the new candles."""
+        batch = ma_strategy().generate_batch(ohlc)
+        head = BacktestEngine(ohlc[:2000], batch, ExecutionMode.SPREAD_ON, 10_000.0)
+        head.run()
+        tail = BacktestEngine(ohlc[2000:], batch, ExecutionMode.SPREAD_ON, 10_000.0,
+                              resume_from=head.checkpoint(), index_offset=2000).run()
+        full = BacktestEngine(ohlc, batch, ExecutionMode.SPREAD_ON, 10_000.0).run()
+        assert_identical_results(tail, full)
+
+    def test_market_data(self, ohlc):
+        data = MarketData.from_frame(ohlc)
+        full = BacktestEngine(data, ma_strategy().generate_batch(data), ExecutionMode.SPREAD_ON, 10_000.0).run()
+        assert_identical_results(run_in_steps(data, [1234]), full)
+
+
+class TestCheckpointFile:
+    def test_save_load_round_trip(self, ohlc, tmp_path):
+        head = ohlc[:1500]
+        engine = BacktestEngine(head, ma_strategy().generate_batch(head), ExecutionMode.SPREAD_OFF,
+                                10_000.0, snapshot_mode="on_change")
+        engine.run()
+        path = tmp_path / "state.npz"
+        engine.checkpoint().save(path)
+        checkpoint = EngineCheckpoint.load(path)
+
+        resumed = BacktestEngine(ohlc, ma_strategy().generate_batch(ohlc), ExecutionMode.SPREAD_OFF,
+                                 10_000.0, snapshot_mode="on_change", resume_from=checkpoint).run()
+        full = BacktestEngine(ohlc, ma_strategy().generate_batch(ohlc), ExecutionMode.SPREAD_OFF,
+                              10_000.0, snapshot_mode="on_change").run()
+        assert_identical_results(resumed, full)
+
+
+class TestResumeValidation:
+    @pytest.fixture
+    def checkpoint(self, ohlc):
+        engine = BacktestEngine(ohlc[:1000], [], ExecutionMode.SPREAD_ON, 10_000.0)
+        engine.run()
+        return engine.checkpoint()
+
+    def test_rejects_different_history(self, ohlc, checkpoint):
+        shifted = ohlc.set_axis(ohlc.index + pd.Timedelta("1min"))
+        with pytest.raises(ValueError, match="timestamp"):
+            BacktestEngine(shifted, [], ExecutionMode.SPREAD_ON, 10_000.0, resume_from=checkpoint)
+
+    def test_rejects_gap_after_checkpoint(self, ohlc, checkpoint):
+        with pytest.raises(ValueError, match="after the checkpoint"):
+            BacktestEngine(ohlc[1100:], [], ExecutionMode.SPREAD_ON, 10_000.0,
+                           resume_from=checkpoint, index_offset=1100)
+
+    def test_rejects_shorter_data(self, ohlc, checkpoint):
+        with pytest.raises(ValueError, match="candles"):
+            BacktestEngine(ohlc[:500], [], ExecutionMode.SPREAD_ON, 10_000.0, resume_from=checkpoint)
+
+    def test_rejects_different_settings(self, ohlc, checkpoint):
+        with pytest.raises(ValueError, match="mode"):
+            BacktestEngine(ohlc, [], ExecutionMode.SPREAD_OFF, 10_000.0, resume_from=checkpoint)
+        with pytest.raises(ValueError, match="snapshot"):
+            BacktestEngine(ohlc, [], ExecutionMode.SPREAD_ON, 10_000.0, snapshot_mode="none",
+                           resume_from=checkpoint)
@@ -1,8 +1,9 @@
 import pytest
 import pandas as pd
 import numpy as np
+import os
 from pathlib import Path
-from common.data_loader import load_csv, resample
+from common.data_loader import iter_csv, load_csv, resample
 
 # --- Constants ---
 
@@ -301,3 +302,106 @@ class TestResample:
         # The key check is it doesn't crash and produces valid output
         assert isinstance(df_5m, pd.DataFrame)
         assert df_5m.isna().sum().sum() == 0
+
+
+# --- Binary column cache ---
+
+@pytest.fixture
+def small_csv(tmp_path):
+    """A valid 50-row OHLC CSV with an extra integer column."""
+    n = 50
+    close = 100.0 + np.arange(n) * 0.25
+    df = pd.DataFrame({
+        "open": close - 0.1, "high": close + 0.5, "low": close - 0.5,
+        "close": close, "spread": [0.1] * n, "volume": np.arange(n) * 10,
+    }, index=pd.date_range("2024-01-15 09:30", periods=n, freq="1min"))
+    path = tmp_path / "small.csv"
+    df.to_csv(path)
+    return path
+
+
+class TestLoadCSVCache:
+    def test_cached_load_matches_csv(self, small_csv, tmp_path):
+        """First and later cached loads equal the plain load, dtypes included."""
+        expected = load_csv(str(small_csv))
+        cache_dir = str(tmp_path / "cache")
+        pd.testing.assert_frame_equal(load_csv(str(small_csv), cache_dir=cache_dir), expected)
+        pd.testing.assert_frame_equal(load_csv(str(small_csv), cache_dir=cache_dir), expected,
+                                      check_freq=False)
+
+    def test_second_load_skips_parsing(self, small_csv, tmp_path, monkeypatch):
+        """A fresh cache entry is memory-mapped without calling read_csv."""
+        cache_dir = str(tmp_path / "cache")
+        load_csv(str(small_csv), cache_dir=cache_dir)
+        monkeypatch.setattr(pd, "read_csv", lambda *a, **k: pytest.fail("read_csv called"))
+        df = load_csv(str(small_csv), cache_dir=cache_dir)
+        assert not df["close"].to_numpy().flags.writeable
+
+    def test_modified_source_is_reloaded(self, small_csv, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        load_csv(str(small_csv), cache_dir=cache_dir)
+        df = pd.read_csv(small_csv, index_col=0)
+        df["close"] += 0.125
+        df["high"] += 0.125
+        df.to_csv(small_csv)
+        result = load_csv(str(small_csv), cache_dir=cache_dir)
+        assert result["close"].iloc[0] == pytest.approx(100.125)
+
+    def test_touched_source_reuses_arrays(self, small_csv, tmp_path, monkeypatch):
+        """A new mtime with unchanged content is re-hashed, not re-parsed."""
+        cache_dir = str(tmp_path / "cache")
+        load_csv(str(small_csv), cache_dir=cache_dir)
+        stat = small_csv.stat()
+        os.utime(small_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        monkeypatch.setattr(pd, "read_csv", lambda *a, **k: pytest.fail("read_csv called"))
+        assert len(load_csv(str(small_csv), cache_dir=cache_dir)) == 50
+
+    def test_invalid_file_not_cached(self, tmp_path):
+        df = pd.DataFrame({"open": [1.0], "high": [2.0], "low": [0.5], "close": [1.5],
+                           "spread": [0.0]}, index=pd.date_range("2024-01-01", periods=1))
+        path = tmp_path / "bad.csv"
+        df.to_csv(path)
+        with pytest.raises(ValueError):
+            load_csv(str(path), cache_dir=str(tmp_path / "cache"))
+        with pytest.raises(ValueError):
+            load_csv(str(path), cache_dir=str(tmp_path / "cache"))
+
+
+class TestIterCSV:
+    def test_blocks_concatenate_to_full_load(self, small_csv):
+        blocks = list(iter_csv(str(small_csv), chunk_rows=16))
+        assert [len(b) for b in blocks] == [16, 16, 16, 2]
+        pd.testing.assert_frame_equal(pd.concat(blocks), load_csv(str(small_csv)))
+
+    def test_violation_in_later_block_raises(self, small_csv):
+        df = pd.read_csv(small_csv, index_col=0)
+        df.iloc[40, df.columns.get_loc("spread")] = 0.0
+        df.to_csv(small_csv)
+        blocks = iter_csv(str(small_csv), chunk_rows=16)
+        assert len(next(blocks)) == 16
+        with pytest.raises(ValueError, match="spread"):
+            list(blocks)
+
+    def test_missing_column_raises_before_rows(self, small_csv):
+        pd.read_csv(small_csv, index_col=0).drop(columns="low").to_csv(small_csv)
+        with pytest.raises(ValueError, match="Missing required columns"):
+            next(iter_csv(str(small_csv)))
+
+    def test_streamed_cache_matches_plain_load(self, small_csv, tmp_path):
+        """Cache entries built from small blocks equal a plain load, with dtype promotion."""
+        df = pd.read_csv(small_csv, index_col=0)
+        df["volume"] = df["volume"].astype(object)
+        df.iloc[45, df.columns.get_loc("volume")] = 0.5   # int in early blocks, float later
+        df.to_csv(small_csv)
+        expected = load_csv(str(small_csv))
+        cached = load_csv(str(small_csv), cache_dir=str(tmp_path / "cache"), chunk_rows=8)
+        pd.testing.assert_frame_equal(cached, expected)
+
+    def test_failed_build_leaves_no_entry(self, small_csv, tmp_path):
+        df = pd.read_csv(small_csv, index_col=0)
+        df.iloc[40, df.columns.get_loc("high")] = 0.0
+        df.to_csv(small_csv)
+        cache_dir = tmp_path / "cache"
+        with pytest.raises(ValueError):
+            load_csv(str(small_csv), cache_dir=str(cache_dir), chunk_rows=16)
+        assert list(cache_dir.iterdir()) == []
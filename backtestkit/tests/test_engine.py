@@ -1,8 +1,11 @@
 import pytest
+import numpy as np
 import pandas as pd
 from backtester.engine import BacktestEngine
 from common.models import ExecutionMode, SignalType
-from strategies.signals import Signal
+from strategies.ma_crossover import MACrossoverStrategy
+from strategies.signals import Signal, SignalBatch
+from tests.conftest import assert_identical_results
 
 
 @pytest.fixture
@@ -19,6 +22,41 @@ def simple_5_candle_df():
     return pd.DataFrame(data, index=timestamps)
 
 
+@pytest.fixture
+def random_walk_df():
+    """2000 candles of a seeded random walk — enough for many trades and SL/TP hits."""
+    rng = np.random.default_rng(7)
+    n = 2000
+    close = np.round(100.0 + np.cumsum(rng.normal(0, 0.2, n)), 2)
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) + np.round(np.abs(rng.normal(0, 0.1, n)), 2)
+    low = np.minimum(open_, close) - np.round(np.abs(rng.normal(0, 0.1, n)), 2)
+    spread = np.round(rng.uniform(0.01, 0.05, n), 3)
+    timestamps = pd.date_range("2024-01-15 09:30", periods=n, freq="1min")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "spread": spread},
+        index=timestamps,
+    )
+
+
+def stacking_signals():
+    """Stacked LONG entries, a partial close, a reversal and a SHORT stack."""
+    return [
+        Signal(timestamp_index=10, signal_type=SignalType.LONG,
+               stop_loss_level=95.0, take_profit_level=105.0, size=0.5),
+        Signal(timestamp_index=20, signal_type=SignalType.LONG,
+               stop_loss_level=99.0, take_profit_level=101.0, size=0.5),
+        Signal(timestamp_index=30, signal_type=SignalType.CLOSE,
+               stop_loss_level=0.0, take_profit_level=0.0, size=0.5),
+        Signal(timestamp_index=300, signal_type=SignalType.CLOSE,
+               stop_loss_level=0.0, take_profit_level=0.0, size=1.0),
+        Signal(timestamp_index=300, signal_type=SignalType.SHORT,
+               stop_loss_level=110.0, take_profit_level=90.0, size=0.5),
+        Signal(timestamp_index=400, signal_type=SignalType.SHORT,
+               stop_loss_level=103.0, take_profit_level=97.0, size=1.0),
+    ]
+
+
 class TestSignalDelay:
     def test_signal_executes_next_candle(self, simple_5_candle_df):
         """Signal at candle 0 must execute at candle 1 open, not candle 0."""
@@ -116,6 +154,43 @@ class TestClose:
         assert result.snapshots[4].position_size == 0.0
 
 
+class TestTradeLedger:
+    def test_units_linked_to_their_trades(self, simple_5_candle_df):
+        """Each open position unit points at its own ledger record."""
+        signals = [
+            Signal(timestamp_index=0, signal_type=SignalType.LONG,
+                   stop_loss_level=95.0, take_profit_level=115.0, size=0.5),
+            Signal(timestamp_index=1, signal_type=SignalType.LONG,
+                   stop_loss_level=96.0, take_profit_level=116.0, size=0.5),
+        ]
+        engine = BacktestEngine(
+            data=simple_5_candle_df, signals=signals,
+            mode=ExecutionMode.SPREAD_OFF, initial_capital=10000.0
+        )
+        result = engine.run()
+        assert [u.trade_id for u in engine.position_units] == [0, 1]
+        assert [t.sl for t in result.trades] == [95.0, 96.0]
+        assert result.ledger.open_count == 2
+
+    def test_sl_after_partial_close_closes_original_trade(self, simple_5_candle_df):
+        """A unit resized by a partial CLOSE still closes its own trade record."""
+        signals = [
+            Signal(timestamp_index=0, signal_type=SignalType.LONG,
+                   stop_loss_level=100.5, take_profit_level=115.0, size=1.0),
+            Signal(timestamp_index=1, signal_type=SignalType.CLOSE,
+                   stop_loss_level=0.0, take_profit_level=0.0, size=0.5),
+        ]
+        engine = BacktestEngine(
+            data=simple_5_candle_df, signals=signals,
+            mode=ExecutionMode.SPREAD_OFF, initial_capital=10000.0
+        )
+        result = engine.run()
+        assert len(result.trades) == 1
+        assert result.trades[0].entry_index == 1
+        assert result.trades[0].exit_reason == "SL"
+        assert result.trades[0].exit_index == 3
+
+
 class TestDeterminism:
     def test_same_result_twice(self, simple_5_candle_df):
         """Running the engine twice with identical input produces identical output."""
@@ -149,3 +224,113 @@ class TestEquitySnapshot:
         )
         result = engine.run()
         assert len(result.snapshots) == len(simple_5_candle_df)
+
+    @pytest.mark.parametrize("core", ["pandas", "columnar", "event"])
+    @pytest.mark.parametrize("snapshot_mode", ["every_n", "on_change"])
+    def test_decimated_snapshots_are_subset(self, random_walk_df, core, snapshot_mode):
+        """Decimated snapshots are exactly the kept rows of the full record."""
+        signals = stacking_signals()
+        full = BacktestEngine(data=random_walk_df, signals=signals,
+                              mode=ExecutionMode.SPREAD_ON, initial_capital=10000.0).run()
+        result = BacktestEngine(data=random_walk_df, signals=signals,
+                                mode=ExecutionMode.SPREAD_ON, initial_capital=10000.0,
+                                core=core, snapshot_mode=snapshot_mode,
+                                snapshot_every=60).run()
+        kept = result.snapshots.index
+        assert 0 < len(kept) < len(random_walk_df)
+        assert np.array_equal(result.snapshots.equity, full.snapshots.equity[kept])
+        assert result.final_equity == full.final_equity
+
+    def test_no_snapshots_mode(self, simple_5_candle_df):
+        """snapshot_mode="none" records nothing; the result is otherwise unchanged."""
+        result = BacktestEngine(data=simple_5_candle_df, signals=[],
+                                mode=ExecutionMode.SPREAD_OFF, initial_capital=10000.0,
+                                snapshot_mode="none").run()
+        assert len(result.snapshots) == 0
+        assert result.final_equity == 10000.0
+
+
+class TestEngineCores:
+    @pytest.mark.parametrize("core", ["columnar", "event"])
+    @pytest.mark.parametrize("mode", list(ExecutionMode))
+    def test_matches_pandas_core_on_strategy_signals(self, random_walk_df, mode, core):
+        """Fast cores reproduce the reference loop bit for bit."""
+        signals = MACrossoverStrategy(fast_period=5, slow_period=20,
+                                      sl_pct=0.002, tp_pct=0.002).generate(random_walk_df)
+        results = [
+            BacktestEngine(data=random_walk_df, signals=signals, mode=mode,
+                           initial_capital=10000.0, core=c).run()
+            for c in ("pandas", core)
+        ]
+        assert len(results[0].trades) > 10
+        assert_identical_results(*results)
+
+    @pytest.mark.parametrize("core", ["columnar", "event"])
+    def test_matches_pandas_core_with_stacking(self, random_walk_df, core):
+        """Stacked units, partial closes and reversals match the reference loop."""
+        results = [
+            BacktestEngine(data=random_walk_df, signals=stacking_signals(),
+                           mode=ExecutionMode.SPREAD_ON, initial_capital=10000.0,
+                           core=c).run()
+            for c in ("pandas", core)
+        ]
+        assert_identical_results(*results)
+
+    def test_event_core_long_hold_hits_tp(self, random_walk_df):
+        """A wide SL/TP reached only after a long idle span is found at the same candle."""
+        signals = [Signal(timestamp_index=5, signal_type=SignalType.SHORT,
+                          stop_loss_level=101.0, take_profit_level=88.0, size=1.0)]
+        results = [
+            BacktestEngine(data=random_walk_df, signals=signals,
+                           mode=ExecutionMode.SPREAD_ON, initial_capital=10000.0,
+                           core=c).run()
+            for c in ("pandas", "event")
+        ]
+        assert results[1].trades[0].exit_index is not None
+        assert results[1].trades[0].exit_index > 400
+        assert_identical_results(*results)
+
+    @pytest.mark.parametrize("core", ["pandas", "columnar", "event"])
+    def test_signal_batch_input_matches_list(self, random_walk_df, core):
+        """A SignalBatch gives the same result as the equivalent Signal list."""
+        signals = MACrossoverStrategy(fast_period=5, slow_period=20,
+                                      sl_pct=0.005, tp_pct=0.01).generate(random_walk_df)
+        signals += stacking_signals()
+        results = [
+            BacktestEngine(data=random_walk_df, signals=s, mode=ExecutionMode.SPREAD_ON,
+                           initial_capital=10000.0, core=core).run()
+            for s in (signals, SignalBatch.from_signals(signals))
+        ]
+        assert_identical_results(*results)
+
+    @pytest.mark.parametrize("scan", ["range_index", "hierarchical"])
+    @pytest.mark.parametrize("mode", list(ExecutionMode))
+    def test_event_core_with_touch_index(self, random_walk_df, mode, scan):
+        """Index-based SL/TP scans give the same result as the reference loop."""
+        signals = MACrossoverStrategy(fast_period=5, slow_period=20,
+                                      sl_pct=0.005, tp_pct=0.01).generate(random_walk_df)
+        signals += stacking_signals()
+        signals.sort(key=lambda s: s.timestamp_index)
+        results = [
+            BacktestEngine(data=random_walk_df, signals=signals, mode=mode,
+                           initial_capital=10000.0, core="pandas").run(),
+            BacktestEngine(data=random_walk_df, signals=signals, mode=mode,
+                           initial_capital=10000.0, core="event",
+                           sl_tp_scan=scan).run(),
+        ]
+        assert_identical_results(*results)
+
+    def test_event_core_no_signals(self, simple_5_candle_df):
+        """With no signals every snapshot is the flat initial state."""
+        result = BacktestEngine(data=simple_5_candle_df, signals=[],
+                                mode=ExecutionMode.SPREAD_OFF, initial_capital=10000.0,
+                                core="event").run()
+        assert len(result.snapshots) == 5
+        assert all(s.equity == 10000.0 and s.position_size == 0.0 for s in result.snapshots)
+
+    def test_unknown_core_rejected(self, simple_5_candle_df):
+        """An unknown core name raises ValueError."""
+        with pytest.raises(ValueError):
+            BacktestEngine(data=simple_5_candle_df, signals=[],
+                           mode=ExecutionMode.SPREAD_OFF, initial_capital=10000.0,
+                           core="turbo")
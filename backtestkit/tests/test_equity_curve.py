@@ -0,0 +1,144 @@
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.analytics import rolling_metrics
+from backtester.checkpoint import EngineCheckpoint
+from backtester.engine import BacktestEngine
+from backtester.equity_curve import CashEventLog, EquityCurve
+from backtester.metrics import compute_metrics
+from common.models import ExecutionMode, SignalType
+from strategies.signals import Signal
+from tests.conftest import assert_columns_equal, ma_strategy, run_backtest
+
+pytestmark = pytest.mark.ohlc(seed=25, n=4000)
+
+
+class TestCashEventLog:
+    def test_records_only_changes(self):
+        log = CashEventLog(1000.0, capacity=1)
+        log.record(0, 1000.0, 0.0, 0.0)
+        log.record(3, 900.0, 1.0, 100.0)
+        log.record(4, 900.0, 1.0, 100.0)
+        log.record(9, 1010.0, 0.0, 0.0)
+        columns = log.columns()
+        assert len(log) == 2
+        assert list(columns["index"]) == [3, 9]
+        assert list(columns["cash"]) == [900.0, 1010.0]
+
+    def test_from_columns_round_trip(self):
+        log = CashEventLog(1000.0)
+        log.record(2, 950.0, -0.5, 100.0)
+        rebuilt = CashEventLog.from_columns(1000.0, log.columns())
+        assert_columns_equal(rebuilt.columns(), log.columns())
+        rebuilt.record(5, 950.0, -0.5, 100.0)
+        assert len(rebuilt) == 1
+
+    def test_drain_keeps_the_last_row(self):
+        log = CashEventLog(1000.0)
+        for index, cash in enumerate([900.0, 950.0, 1010.0]):
+            log.record(index, cash, 0.0, 0.0)
+        drained = log.drain()
+        assert list(drained["index"]) == [0, 1]
+        assert list(log.columns()["cash"]) == [1010.0]
+        assert len(log.drain()["index"]) == 0
+        log.record(5, 1010.0, 0.0, 0.0)
+        assert len(log) == 1
+
+
+class TestReconstruction:
+    @pytest.mark.parametrize("core", ["columnar", "pandas", "event"])
+    @pytest.mark.parametrize("mode", list(ExecutionMode))
+    def test_matches_all_snapshots(self, ohlc, core, mode):
+        expected = run_backtest(ohlc, mode, core=core)
+        result = run_backtest(ohlc, mode, core=core, snapshot_mode="events")
+        assert len(result.snapshots) == 0
+        assert len(result.equity_curve) == len(ohlc)
+        assert_columns_equal(result.equity_curve.columns(), expected.snapshots.columns())
+        assert result.final_equity == expected.final_equity
+        assert result.trades == expected.trades
+
+    def test_short_and_stacked_positions(self, ohlc):
+        signals = [
+            Signal(99, SignalType.LONG, 50.0, 200.0, 0.5),
+            Signal(199, SignalType.LONG, 50.0, 200.0, 0.5),
+            Signal(299, SignalType.CLOSE, 0.0, 0.0, 0.5),
+            Signal(399, SignalType.CLOSE, 0.0, 0.0, 1.0),
+            Signal(399, SignalType.SHORT, 200.0, 50.0, 1.0),
+        ]
+        expected = run_backtest(ohlc, signals=signals)
+        result = run_backtest(ohlc, signals=signals, snapshot_mode="events")
+        assert_columns_equal(result.equity_curve.columns(), expected.snapshots.columns())
+
+    def test_sub_range_and_step(self, ohlc):
+        expected = run_backtest(ohlc).snapshots.to_frame()
+        curve = run_backtest(ohlc, snapshot_mode="events").equity_curve
+        pd.testing.assert_frame_equal(curve.to_frame(1000, 3000, 7), expected.iloc[1000:3000:7])
+        chunks = list(curve.iter_columns(start=500, rows=999))
+        assert [len(c["index"]) for c in chunks] == [999, 999, 999, 503]
+        assert_columns_equal({name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]},
+                             {name: expected.reset_index()[name].to_numpy()[500:] for name in chunks[0]})
+
+    def test_timestamps(self, ohlc):
+        frame = run_backtest(ohlc, snapshot_mode="events").equity_curve.to_frame(10, 20, timestamps=ohlc.index)
+        assert frame.index.equals(ohlc.index[10:20])
+
+    def test_without_trades(self, ohlc):
+        curve = run_backtest(ohlc, signals=[], snapshot_mode="events").equity_curve
+        columns = curve.columns()
+        assert len(curve.events) == 0
+        assert (columns["equity"] == 10_000.0).all()
+        assert (columns["position_size"] == 0.0).all()
+
+
+class TestMetrics:
+    @pytest.mark.parametrize("core", ["columnar", "pandas", "event"])
+    def test_match_all_snapshots(self, ohlc, core):
+        expected = run_backtest(ohlc, core=core)
+        result = run_backtest(ohlc, core=core, snapshot_mode="events")
+        assert result.metrics == pytest.approx(expected.metrics, nan_ok=True)
+        assert compute_metrics(result, 10_000.0) == compute_metrics(expected, 10_000.0)
+
+    def test_rolling_analytics(self, ohlc):
+        expected = rolling_metrics(run_backtest(ohlc), ohlc.index, 60, 10_000.0)
+        result = rolling_metrics(run_backtest(ohlc, snapshot_mode="events"), ohlc.index, 60, 10_000.0)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+class TestResume:
+    def test_resume_in_steps(self, ohlc, tmp_path):
+        checkpoint = None
+        for stop in (1000, 2500, len(ohlc)):
+            part = ohlc[:stop]
+            engine = BacktestEngine(part, ma_strategy().generate_batch(part), ExecutionMode.SPREAD_ON,
+                                    10_000.0, snapshot_mode="events", resume_from=checkpoint)
+            result = engine.run()
+            path = tmp_path / f"state_{stop}.npz"
+            engine.checkpoint().save(path)
+            checkpoint = EngineCheckpoint.load(path)
+        expected = run_backtest(ohlc)
+        assert_columns_equal(result.equity_curve.columns(), expected.snapshots.columns())
+        assert result.metrics == pytest.approx(expected.metrics, nan_ok=True)
+
+    def test_appended_candles_only(self, ohlc):
+        batch = ma_strategy().generate_batch(ohlc)
+        head = BacktestEngine(ohlc[:2000], batch, ExecutionMode.SPREAD_ON, 10_000.0,
+                              snapshot_mode="events")
+        head.run()
+        tail = BacktestEngine(ohlc[2000:], batch, ExecutionMode.SPREAD_ON, 10_000.0,
+                              snapshot_mode="events", resume_from=head.checkpoint(),
+                              index_offset=2000).run()
+        expected = run_backtest(ohlc, signals=batch).snapshots.columns()
+        assert_columns_equal(tail.equity_curve.columns(),
+                             {name: values[2000:] for name, values in expected.items()})
+        assert tail.equity_curve.columns(0, 2000)["index"].size == 0
+
+
+def test_curve_from_log_and_prices():
+    """Unrealized PnL marks the position held before the candle's executions."""
+    log = CashEventLog(1000.0)
+    log.record(1, 900.0, 1.0, 100.0)
+    curve = EquityCurve(log, np.array([100.0, 100.0, 104.0]), np.array([0.0, 0.0, 2.0]))
+    columns = curve.columns()
+    assert list(columns["position_size"]) == [0.0, 1.0, 1.0]
+    assert list(columns["unrealized_pnl"]) == [0.0, 0.0, 3.0]
+    assert list(columns["equity"]) == [1000.0, 1000.0, 1003.0]
@@ -0,0 +1,156 @@
+import pytest
+import numpy as np
+import pandas as pd
+from common.indicators import IndicatorCache, RollingSMA, data_fingerprint
+from common.market_data import MarketData
+from strategies.ma_crossover import MACrossoverStrategy
+
+
+@pytest.fixture
+def walk_df():
+    """Seeded random-walk closes on a DatetimeIndex."""
+    rng = np.random.default_rng(5)
+    n = 3000
+    close = 100.0 + np.cumsum(rng.normal(0, 0.5, n))
+    timestamps = pd.date_range("2024-01-15 09:30", periods=n, freq="1min")
+    return pd.DataFrame({"close": close, "spread": np.full(n, 0.1)}, index=timestamps)
+
+
+class TestSMA:
+    @pytest.mark.parametrize("window", [1, 2, 7, 50, 3000])
+    def test_matches_rolling_mean(self, walk_df, window):
+        """Cached SMA is bit-identical to rolling().mean(), NaN warm-up included."""
+        cache = IndicatorCache()
+        expected = walk_df["close"].rolling(window=window).mean().to_numpy()
+        np.testing.assert_array_equal(cache.sma(walk_df, "close", window), expected)
+
+    def test_window_longer_than_data_is_all_nan(self, walk_df):
+        assert np.isnan(IndicatorCache().sma(walk_df, "close", 5000)).all()
+
+    def test_nan_propagates_through_window(self, walk_df):
+        """A NaN makes every window containing it NaN, like rolling().mean()."""
+        df = walk_df.copy()
+        df.iloc[100, 0] = np.nan
+        expected = df["close"].rolling(window=10).mean().to_numpy()
+        result = IndicatorCache().sma(df, "close", 10)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_rejects_bad_window(self, walk_df):
+        with pytest.raises(ValueError):
+            IndicatorCache().sma(walk_df, "close", 0)
+
+    def test_result_is_read_only(self, walk_df):
+        values = IndicatorCache().sma(walk_df, "close", 5)
+        with pytest.raises(ValueError):
+            values[0] = 1.0
+
+
+class TestRollingSMA:
+    @pytest.mark.parametrize("window", [1, 2, 7, 50])
+    def test_matches_cached_sma_exactly(self, walk_df, window):
+        df = walk_df.copy()
+        df.iloc[[0, 500, 501], 0] = np.nan
+        rolling = RollingSMA(window)
+        values = np.array([rolling.update(x) for x in df["close"]])
+        np.testing.assert_array_equal(values, IndicatorCache().sma(df, "close", window))
+
+    @pytest.mark.parametrize("window", [1, 3, 20])
+    def test_matches_rolling_mean_on_tick_grid(self, window):
+        """Tick-grid prices, negative values and runs of equal values, bit for bit."""
+        rng = np.random.default_rng(11)
+        values = np.repeat(np.round(rng.normal(0, 1, 400), 1), rng.integers(1, 6, 400))
+        rolling = RollingSMA(window)
+        result = np.array([rolling.update(x) for x in values])
+        np.testing.assert_array_equal(result, pd.Series(values).rolling(window).mean().to_numpy())
+
+    def test_rejects_bad_window(self):
+        with pytest.raises(ValueError):
+            RollingSMA(0)
+
+
+class TestCaching:
+    def test_repeat_lookup_is_a_hit(self, walk_df):
+        cache = IndicatorCache()
+        first = cache.sma(walk_df, "close", 20)
+        hits = cache.hits
+        assert cache.sma(walk_df, "close", 20) is first
+        assert cache.hits == hits + 1
+
+    def test_equal_frames_share_entries(self, walk_df):
+        """Entries are keyed by content, not by DataFrame identity."""
+        cache = IndicatorCache()
+        first = cache.sma(walk_df, "close", 20)
+        assert data_fingerprint(walk_df.copy()) == data_fingerprint(walk_df)
+        assert cache.sma(walk_df.copy(), "close", 20) is first
+
+    def test_in_place_changes_are_seen(self, walk_df):
+        """DataFrames are rehashed on every lookup, so edits never return stale entries."""
+        cache = IndicatorCache()
+        df = walk_df.copy()
+        before = cache.sma(df, "close", 20)
+        df.loc[df.index[-5:], "close"] += 1.0
+        np.testing.assert_array_equal(cache.sma(df, "close", 20),
+                                      df["close"].rolling(20).mean().to_numpy())
+        assert not np.array_equal(cache.sma(df, "close", 20), before, equal_nan=True)
+
+    def test_strategy_sees_in_place_changes(self, walk_df):
+        """The shared default cache never serves signals of a frame's old contents."""
+        df = walk_df.copy()
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20)
+        strategy.generate(df)
+        df.loc[df.index[1000:1100], "close"] += 3.0
+        fresh = MACrossoverStrategy(5, 20, indicator_cache=IndicatorCache()).generate(df.copy())
+        assert strategy.generate(df) == fresh
+
+    def test_different_data_different_fingerprint(self, walk_df):
+        other = walk_df.copy()
+        other.iloc[-1, 0] += 1.0
+        assert data_fingerprint(other) != data_fingerprint(walk_df)
+
+    def test_fingerprint_covers_only_requested_columns(self, walk_df):
+        """SMA keys hash the index and the SMA's column, so other columns do not matter."""
+        other = walk_df.assign(spread=0.2)
+        assert data_fingerprint(other, ["close"]) == data_fingerprint(walk_df, ["close"])
+        assert data_fingerprint(other) != data_fingerprint(walk_df)
+        cache = IndicatorCache()
+        assert cache.sma(other, "close", 20) is cache.sma(walk_df, "close", 20)
+
+    def test_market_data_fingerprint_is_memoized(self, walk_df):
+        data = MarketData.from_frame(walk_df.assign(open=walk_df["close"], high=walk_df["close"],
+                                                    low=walk_df["close"]))
+        assert data_fingerprint(data, ["close"]) is data_fingerprint(data, ["close"])
+        assert data_fingerprint(data, ["close"]) != data_fingerprint(data)
+
+    def test_precomputed_fingerprint(self, walk_df):
+        cache = IndicatorCache()
+        fingerprint = data_fingerprint(walk_df, ["close"])
+        assert cache.sma(walk_df, "close", 20, fingerprint) is cache.sma(walk_df, "close", 20)
+
+    def test_lru_eviction_under_budget(self, walk_df):
+        """The budget holds two SMAs; the least recently used one is evicted."""
+        n = len(walk_df)
+        cache = IndicatorCache(max_bytes=2 * n * 8)
+        cache.sma(walk_df, "close", 5)
+        cache.sma(walk_df, "close", 10)
+        cache.sma(walk_df, "close", 5)      # 5 becomes most recently used
+        cache.sma(walk_df, "close", 15)     # evicts 10
+        assert cache.nbytes <= cache.max_bytes
+        misses = cache.misses
+        cache.sma(walk_df, "close", 5)
+        assert cache.misses == misses
+        cache.sma(walk_df, "close", 10)
+        assert cache.misses > misses
+
+    def test_rejects_bad_budget(self):
+        with pytest.raises(ValueError):
+            IndicatorCache(max_bytes=0)
+
+    def test_grid_sweep_computes_each_window_once(self, walk_df):
+        """A fast/slow grid of strategies sharing a cache computes each window once."""
+        cache = IndicatorCache()
+        fast_periods, slow_periods = range(2, 12), range(20, 30)
+        for fast in fast_periods:
+            for slow in slow_periods:
+                MACrossoverStrategy(fast, slow, indicator_cache=cache).generate_batch(walk_df)
+        sma_keys = [key for key in cache._entries if key[2] == "sma"]
+        assert len(sma_keys) == len(fast_periods) + len(slow_periods)
@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+from backtester.ledger import Trade, TradeLedger
+
+
+def open_long(ledger, entry_index=0, entry_price=100.0, size=10.0):
+    return ledger.open(direction="LONG", entry_price=entry_price, entry_index=entry_index,
+                       size=size, sl=98.0, tp=102.0)
+
+
+class TestTradeLedger:
+    def test_open_returns_sequential_ids(self):
+        """Trade ids are row numbers in entry order."""
+        ledger = TradeLedger()
+        assert [open_long(ledger, i) for i in range(3)] == [0, 1, 2]
+        assert len(ledger) == 3
+        assert ledger.open_count == 3
+
+    def test_open_trade_materializes_with_none_exit(self):
+        """An open trade has no exit fields."""
+        ledger = TradeLedger()
+        trade_id = open_long(ledger)
+        assert ledger.trade(trade_id) == Trade(direction="LONG", entry_price=100.0, entry_index=0,
+                                               size=10.0, sl=98.0, tp=102.0)
+        assert ledger.is_open(trade_id)
+
+    def test_close_by_id(self):
+        """Closing writes the exit onto exactly the given trade."""
+        ledger = TradeLedger()
+        first = open_long(ledger, 0)
+        second = open_long(ledger, 1)  # identical prices and size
+        ledger.close(second, exit_price=98.0, exit_index=5, reason="SL", pnl=-20.0)
+        trades = ledger.to_trades()
+        assert trades[first].exit_reason is None
+        assert trades[second].exit_reason == "SL"
+        assert trades[second].exit_index == 5
+        assert trades[second].pnl == -20.0
+        assert ledger.open_count == 1
+
+    def test_close_twice_rejected(self):
+        """A closed trade cannot be closed again."""
+        ledger = TradeLedger()
+        trade_id = open_long(ledger)
+        ledger.close(trade_id, 101.0, 3, "CLOSE", 10.0)
+        with pytest.raises(ValueError):
+            ledger.close(trade_id, 101.0, 4, "CLOSE", 10.0)
+
+    def test_grows_past_capacity(self):
+        """The ledger grows beyond its initial capacity without losing rows."""
+        ledger = TradeLedger(capacity=2)
+        for i in range(100):
+            open_long(ledger, i, entry_price=100.0 + i)
+        assert len(ledger) == 100
+        assert ledger.column("entry_price")[-1] == 199.0
+
+    def test_columns_are_read_only_views(self):
+        """Columns are trimmed to the recorded trades and cannot be written."""
+        ledger = TradeLedger()
+        open_long(ledger)
+        columns = ledger.columns()
+        assert set(columns) >= {"direction", "entry_price", "exit_price", "pnl"}
+        assert len(columns["pnl"]) == 1
+        assert np.isnan(columns["pnl"][0])
+        with pytest.raises(ValueError):
+            columns["pnl"][0] = 1.0
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+from backtester.engine import BacktestEngine
+from backtester.lockstep import LockstepEngine
+from common.models import ExecutionMode, SignalType
+from strategies.ma_crossover import MACrossoverStrategy
+from strategies.signals import Signal, SignalBatch
+
+
+SL_PCT = np.array([0.001, 0.002, 0.005, 0.01, 0.05, 0.002, 0.0005])
+TP_PCT = np.array([0.001, 0.004, 0.005, 0.002, 0.05, 0.0005, 0.01])
+
+
+def assert_same_result(lockstep, single):
+    assert lockstep.final_equity == single.final_equity
+    assert lockstep.realized_pnl == single.realized_pnl
+    assert lockstep.unrealized_pnl == single.unrealized_pnl
+    assert lockstep.trades == single.trades
+
+
+class TestMatchesSingleRuns:
+    @pytest.mark.parametrize("mode", list(ExecutionMode))
+    def test_ma_crossover_grid(self, ohlc, mode):
+        """Every configuration is bit-identical to its own BacktestEngine run."""
+        batch = MACrossoverStrategy(fast_period=5, slow_period=20).generate_batch(ohlc)
+        results = LockstepEngine(ohlc, batch, mode, 10_000.0, sl_pct=SL_PCT, tp_pct=TP_PCT).run()
+        assert len(results) == len(SL_PCT)
+        for result, sl_pct, tp_pct in zip(results, SL_PCT, TP_PCT):
+            strategy = MACrossoverStrategy(fast_period=5, slow_period=20, sl_pct=sl_pct, tp_pct=tp_pct)
+            single = BacktestEngine(ohlc, strategy.generate_batch(ohlc), mode, 10_000.0).run()
+            assert_same_result(result, single)
+
+    def test_stacking_and_partial_close(self, ohlc):
+        """Fractional entries stack, partial CLOSEs shrink units, configurations diverge."""
+        rng = np.random.default_rng(4)
+        signals = []
+        for index in range(10, len(ohlc) - 50, 40):
+            close = float(ohlc["close"].iloc[index])
+            kind = rng.integers(0, 3)
+            if kind == 0:
+                signals.append(Signal(index, SignalType.CLOSE, 0.0, 0.0, float(rng.uniform(0.2, 1.0))))
+            else:
+                signals.append(Signal(index, SignalType.CLOSE, 0.0, 0.0, 1.0))
+                signals.append(Signal(index, SignalType.LONG, close * 0.99, close * 1.01, 0.5))
+                signals.append(Signal(index + 1, SignalType.LONG, close * 0.99, close * 1.01, 0.5))
+        batch = SignalBatch.from_signals(signals)
+
+        scale = np.array([0.2, 0.5, 1.0, 3.0])[:, None]
+        is_long = batch.signal_type == 1
+        close = ohlc["close"].to_numpy()[batch.timestamp_index]
+        sl = np.where(is_long, close * (1 - 0.01 * scale), 0.0)
+        tp = np.where(is_long, close * (1 + 0.01 * scale), 0.0)
+        results = LockstepEngine(ohlc, batch, ExecutionMode.SPREAD_OFF, 10_000.0,
+                                 stop_loss_levels=sl, take_profit_levels=tp).run()
+        for k, result in enumerate(results):
+            config_batch = SignalBatch(batch.timestamp_index, batch.signal_type, sl[k], tp[k], batch.size)
+            single = BacktestEngine(ohlc, config_batch, ExecutionMode.SPREAD_OFF, 10_000.0).run()
+            assert_same_result(result, single)
+
+    def test_signal_on_last_candles(self, ohlc):
+        """Signals at the second-to-last candle execute on the last one; later ones never do."""
+        data = ohlc.iloc[:30]
+        signals = [Signal(27, SignalType.LONG, 0.0, 1e9, 1.0), Signal(28, SignalType.CLOSE, 0.0, 0.0, 1.0),
+                   Signal(29, SignalType.SHORT, 1e9, 0.0, 1.0)]
+        result = LockstepEngine(data, signals, ExecutionMode.SPREAD_ON, 1000.0,
+                                stop_loss_levels=[[0.0, 0.0, 1e9]],
+                                take_profit_levels=[[1e9, 0.0, 0.0]]).run()[0]
+        single = BacktestEngine(data, signals, ExecutionMode.SPREAD_ON, 1000.0).run()
+        assert_same_result(result, single)
+
+
+class TestLockstepEngine:
+    def test_no_signals(self, ohlc):
+        results = LockstepEngine(ohlc, [], ExecutionMode.SPREAD_ON, 500.0,
+                                 sl_pct=[0.01, 0.02], tp_pct=0.01).run()
+        assert [r.final_equity for r in results] == [500.0, 500.0]
+        assert all(r.trades == [] for r in results)
+
+    def test_empty_data(self, ohlc):
+        results = LockstepEngine(ohlc.iloc[:0], [], ExecutionMode.SPREAD_ON, 500.0,
+                                 sl_pct=0.01, tp_pct=0.01).run()
+        assert results[0].final_equity == 500.0
+
+    def test_rejects_mismatched_levels(self, ohlc):
+        signals = [Signal(5, SignalType.LONG, 99.0, 101.0, 1.0)]
+        with pytest.raises(ValueError):
+            LockstepEngine(ohlc, signals, ExecutionMode.SPREAD_ON, 500.0,
+                           stop_loss_levels=[[99.0]], take_profit_levels=[[101.0, 102.0]])
+
+    def test_requires_one_kind_of_levels(self, ohlc):
+        with pytest.raises(ValueError):
+            LockstepEngine(ohlc, [], ExecutionMode.SPREAD_ON, 500.0, sl_pct=0.01)
+
+    def test_trades_only_in_ledger_when_not_materialized(self, ohlc):
+        batch = MACrossoverStrategy(fast_period=5, slow_period=20).generate_batch(ohlc)
+        engine = LockstepEngine(ohlc, batch, ExecutionMode.SPREAD_ON, 500.0, sl_pct=0.01, tp_pct=0.01)
+        full, = engine.run()
+        lean, = engine.run(materialize_trades=False)
+        assert lean.trades == []
+        assert lean.ledger.to_trades() == full.trades
+        assert lean.final_equity == full.final_equity
+
+    def test_opposite_entry_without_close_raises(self, ohlc):
+        signals = [Signal(5, SignalType.LONG, 0.0, 1e9, 0.5), Signal(10, SignalType.SHORT, 1e9, 0.0, 0.5)]
+        engine = LockstepEngine(ohlc, signals, ExecutionMode.SPREAD_ON, 500.0,
+                                stop_loss_levels=[[0.0, 1e9]], take_profit_levels=[[1e9, 0.0]])
+        with pytest.raises(ValueError):
+            engine.run()
@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.engine import BacktestEngine
+from common.data_loader import resample
+from common.market_data import MarketData
+from common.models import ExecutionMode
+from strategies.ma_crossover import MACrossoverStrategy
+
+pytestmark = pytest.mark.ohlc(seed=9, index_name="timestamp", gap=(500, 600))
+
+
+class TestMarketData:
+    def test_frame_round_trip(self, ohlc):
+        """to_frame() gives back the frame, with nanosecond timestamps."""
+        expected = ohlc.set_axis(ohlc.index.as_unit("ns"))
+        pd.testing.assert_frame_equal(MarketData.from_frame(ohlc).to_frame(), expected,
+                                      check_freq=False)
+
+    def test_save_load_is_memory_mapped(self, ohlc, tmp_path):
+        MarketData.from_frame(ohlc).save(str(tmp_path / "md"))
+        data = MarketData.load(str(tmp_path / "md"))
+        assert isinstance(data["close"].base, np.memmap)
+        assert not data["close"].flags.writeable
+        np.testing.assert_array_equal(data.timestamp, ohlc.index.as_unit("ns").asi8)
+        np.testing.assert_array_equal(data["close"], ohlc["close"].to_numpy())
+
+    def test_between_returns_views(self, ohlc):
+        data = MarketData.from_frame(ohlc)
+        part = data.between("2024-01-15 10:00", "2024-01-15 11:00")
+        assert len(part) == 60
+        assert part.index[0] == pd.Timestamp("2024-01-15 10:00")
+        assert np.shares_memory(part["close"], data["close"])
+        assert np.shares_memory(part.timestamp, data.timestamp)
+
+    def test_between_tz_aware(self, ohlc):
+        data = MarketData.from_frame(ohlc.tz_localize("UTC").tz_convert("America/New_York"))
+        part = data.between("2024-01-15 05:00", "2024-01-15 05:30")
+        assert len(part) == 30
+        assert part.index[0] == pd.Timestamp("2024-01-15 10:00", tz="UTC")
+
+    def test_row_slice(self, ohlc):
+        data = MarketData.from_frame(ohlc)
+        np.testing.assert_array_equal(data[10:20]["open"], ohlc["open"].to_numpy()[10:20])
+        with pytest.raises(ValueError):
+            data[::2]
+
+    def test_rejects_mismatched_lengths(self):
+        with pytest.raises(ValueError):
+            MarketData(np.arange(3), *(np.zeros(3),) * 4, np.zeros(2))
+
+    @pytest.mark.parametrize("timeframe", ["5min", "15min", "60min", "1D"])
+    def test_resample_matches_frame(self, ohlc, timeframe):
+        bars = resample(MarketData.from_frame(ohlc), timeframe)
+        assert isinstance(bars, MarketData)
+        expected = resample(ohlc, timeframe)
+        result = bars.to_frame()
+        np.testing.assert_array_equal(bars.timestamp, expected.index.as_unit("ns").asi8)
+        for name in ("open", "high", "low", "close", "spread"):
+            np.testing.assert_array_equal(result[name].to_numpy(), expected[name].to_numpy())
+
+    def test_resample_spread_mean_is_exact(self, ohlc):
+        """Spreads of mixed magnitudes, a NaN and gaps: means equal pandas' bit for bit."""
+        rng = np.random.default_rng(14)
+        df = ohlc.assign(spread=rng.uniform(0.01, 0.3, len(ohlc)) * 10.0 ** rng.integers(-3, 3, len(ohlc)))
+        df.iloc[7, df.columns.get_loc("spread")] = np.nan
+        df = df[rng.random(len(df)) > 0.2]
+        for timeframe in ("15min", "1D"):
+            result = resample(MarketData.from_frame(df), timeframe)["spread"]
+            np.testing.assert_array_equal(result, resample(df, timeframe)["spread"].to_numpy())
+
+
+class TestConsumers:
+    def test_strategy_signals_match(self, ohlc):
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20)
+        assert strategy.generate(MarketData.from_frame(ohlc)) == strategy.generate(ohlc)
+
+    @pytest.mark.parametrize("core,scan", [("columnar", "vectorized"), ("event", "hierarchical"),
+                                           ("pandas", "vectorized")])
+    def test_engine_results_match(self, ohlc, core, scan):
+        data = MarketData.from_frame(ohlc)
+        signals = MACrossoverStrategy(fast_period=5, slow_period=20, sl_pct=0.002,
+                                      tp_pct=0.003).generate_batch(ohlc)
+        expected = BacktestEngine(ohlc, signals, ExecutionMode.SPREAD_ON, 10_000.0, core=core,
+                                  sl_tp_scan=scan).run()
+        result = BacktestEngine(data, signals, ExecutionMode.SPREAD_ON, 10_000.0, core=core,
+                                sl_tp_scan=scan).run()
+        assert result.trades == expected.trades
+        assert result.final_equity == expected.final_equity
+        assert result.snapshots == expected.snapshots
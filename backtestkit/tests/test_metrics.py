@@ -0,0 +1,148 @@
+import math
+
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.engine import BacktestEngine
+from backtester.lockstep import LockstepEngine
+from backtester.metrics import (METRIC_NAMES, PERIODS_PER_YEAR, MetricAccumulator, compute_metrics,
+                                metrics_from_arrays)
+from common.models import ExecutionMode, SignalType
+from strategies.ma_crossover import MACrossoverStrategy
+from strategies.signals import Signal
+from tests.conftest import run_backtest
+
+
+def naive_metrics(result, initial_capital):
+    """Reference implementation over the full per-candle equity curve."""
+    equity = pd.Series(result.snapshots.equity)
+    curve = pd.concat([pd.Series([initial_capital]), equity], ignore_index=True)
+    drawdown = (curve.cummax() - curve) / curve.cummax()
+    returns = curve.pct_change().dropna()
+    closed = [t.pnl for t in result.trades if t.exit_reason is not None]
+    wins = [p for p in closed if p > 0]
+    losses = [p for p in closed if p < 0]
+    total_return = result.final_equity / initial_capital - 1.0
+    return {
+        "total_return": total_return,
+        "annualized_return": (1.0 + total_return) ** (PERIODS_PER_YEAR / len(equity)) - 1.0,
+        "max_drawdown": drawdown.max(),
+        "sharpe_ratio": returns.mean() / returns.std() * math.sqrt(PERIODS_PER_YEAR),
+        "win_rate": len(wins) / len(closed),
+        "profit_factor": sum(wins) / -sum(losses),
+        "avg_trade": sum(closed) / len(closed),
+        "total_trades": len(closed),
+        "exposure_time": float(np.mean(result.snapshots.position_size != 0.0)),
+    }
+
+
+class TestComputeMetrics:
+    def test_matches_naive_computation(self, ohlc):
+        result = run_backtest(ohlc)
+        metrics = compute_metrics(result, 10_000.0)
+        assert tuple(metrics) == METRIC_NAMES
+        assert metrics == pytest.approx(naive_metrics(result, 10_000.0), rel=1e-12)
+        assert metrics["total_trades"] > 20
+
+    def test_on_change_snapshots_give_the_same_metrics(self, ohlc):
+        """Rows dropped by on_change have zero returns and the previous position."""
+        full = compute_metrics(run_backtest(ohlc), 10_000.0)
+        decimated = run_backtest(ohlc, snapshot_mode="on_change")
+        assert len(decimated.snapshots) < len(ohlc)
+        assert compute_metrics(decimated, 10_000.0) == pytest.approx(full, rel=1e-12)
+
+    @pytest.mark.parametrize("core", ["pandas", "event"])
+    def test_cores_agree(self, ohlc, core):
+        assert compute_metrics(run_backtest(ohlc, core=core), 10_000.0) == compute_metrics(run_backtest(ohlc), 10_000.0)
+
+    def test_without_snapshots(self, ohlc):
+        """Equity-based metrics are NaN; trade and return metrics are still exact."""
+        full = compute_metrics(run_backtest(ohlc), 10_000.0)
+        metrics = compute_metrics(run_backtest(ohlc, snapshot_mode="none"), 10_000.0)
+        for name in ("max_drawdown", "sharpe_ratio", "exposure_time"):
+            assert math.isnan(metrics[name])
+            del metrics[name], full[name]
+        assert metrics == full
+
+    def test_lockstep_result(self, ohlc):
+        """Lockstep results record no snapshots, like snapshot_mode "none"."""
+        batch = MACrossoverStrategy(fast_period=5, slow_period=20).generate_batch(ohlc)
+        lockstep = LockstepEngine(ohlc, batch, ExecutionMode.SPREAD_ON, 10_000.0,
+                                  sl_pct=0.01, tp_pct=0.01).run()[0]
+        expected = compute_metrics(run_backtest(ohlc, snapshot_mode="none"), 10_000.0)
+        assert compute_metrics(lockstep, 10_000.0) == pytest.approx(expected, nan_ok=True)
+
+
+class TestMetricsFromArrays:
+    def test_no_trades(self):
+        metrics = metrics_from_arrays(100.0, 100.0, 3, np.empty(0),
+                                      np.arange(3), np.full(3, 100.0), np.zeros(3))
+        assert metrics == {
+            "total_return": 0.0, "annualized_return": 0.0, "max_drawdown": 0.0,
+            "sharpe_ratio": 0.0, "win_rate": 0.0, "profit_factor": 0.0, "avg_trade": 0.0,
+            "total_trades": 0, "exposure_time": 0.0,
+        }
+
+    def test_drawdown_from_initial_capital(self):
+        """The initial capital is the first peak, so an immediate loss is a drawdown."""
+        metrics = metrics_from_arrays(100.0, 95.0, 2, np.array([-5.0]),
+                                      np.arange(2), np.array([90.0, 95.0]), np.array([1.0, 0.0]))
+        assert metrics["max_drawdown"] == pytest.approx(0.1)
+        assert metrics["exposure_time"] == 0.5
+
+    def test_profit_factor_without_losses(self):
+        metrics = metrics_from_arrays(100.0, 110.0, 2, np.array([4.0, 6.0]))
+        assert metrics["profit_factor"] == math.inf
+        assert metrics["win_rate"] == 1.0
+        assert metrics["avg_trade"] == 5.0
+
+    def test_avg_trade_excludes_partial_closes(self, ohlc):
+        """A partial close adds to realized_pnl but is not a trade, so avg_trade ignores it."""
+        signals = [
+            Signal(10, SignalType.LONG, 50.0, 200.0, 1.0),
+            Signal(50, SignalType.CLOSE, 0.0, 0.0, 0.5),
+            Signal(100, SignalType.CLOSE, 0.0, 0.0, 1.0),
+        ]
+        result = run_backtest(ohlc, signals=signals)
+        [trade] = result.trades
+        assert result.realized_pnl != trade.pnl
+        assert compute_metrics(result, 10_000.0)["avg_trade"] == trade.pnl
+        assert result.metrics["avg_trade"] == trade.pnl
+
+
+class TestMetricAccumulator:
+    EXACT = ("total_return", "annualized_return", "max_drawdown", "win_rate", "total_trades",
+             "exposure_time", "avg_trade")
+
+    @pytest.mark.parametrize("core", ["columnar", "pandas", "event"])
+    @pytest.mark.parametrize("snapshot_mode", ["all", "none"])
+    def test_matches_batch_metrics(self, ohlc, core, snapshot_mode):
+        expected = compute_metrics(run_backtest(ohlc), 10_000.0)
+        metrics = run_backtest(ohlc, core=core, snapshot_mode=snapshot_mode).metrics
+        assert metrics == pytest.approx(expected, rel=1e-9)
+        assert {name: metrics[name] for name in self.EXACT} == {name: expected[name] for name in self.EXACT}
+
+    def test_resumed_run(self, ohlc):
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20, sl_pct=0.01, tp_pct=0.01)
+        head = BacktestEngine(ohlc[:1800], strategy.generate_batch(ohlc[:1800]), ExecutionMode.SPREAD_ON,
+                              10_000.0, snapshot_mode="none")
+        head.run()
+        resumed = BacktestEngine(ohlc, strategy.generate_batch(ohlc), ExecutionMode.SPREAD_ON, 10_000.0,
+                                 snapshot_mode="none", resume_from=head.checkpoint()).run()
+        assert resumed.metrics == pytest.approx(run_backtest(ohlc).metrics, rel=1e-9)
+
+    def test_append_and_extend_agree(self):
+        rng = np.random.default_rng(5)
+        equity = 1000.0 * np.cumprod(1.0 + rng.normal(0, 0.01, 500))
+        position = np.where(rng.random(500) < 0.5, 1.0, 0.0)
+        one_by_one, in_runs = MetricAccumulator(1000.0), MetricAccumulator(1000.0)
+        for e, p in zip(equity.tolist(), position.tolist()):
+            one_by_one.append(e, p)
+        for start in range(0, 500, 37):
+            in_runs.extend(equity[start:start + 37], position[start:start + 37])
+        assert in_runs.state() == pytest.approx(one_by_one.state(), rel=1e-12)
+
+    def test_no_candles(self):
+        metrics = MetricAccumulator(100.0).metrics(100.0)
+        assert metrics["total_trades"] == 0
+        assert math.isnan(metrics["sharpe_ratio"])
@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+import pandas as pd
+from common.data_loader import resample
+from common.indicators import IndicatorCache
+from common.market_data import MarketData
+from common.models import ExecutionMode, SignalType
+from backtester.engine import BacktestEngine
+from strategies.ma_crossover import MACrossoverStrategy
+from strategies.multi_timeframe import ResampledStrategy, map_signals, signal_index_map
+from strategies.signals import SIGNAL_TYPE_CODES, SignalBatch
+
+pytestmark = pytest.mark.gappy_ohlc(seed=17, periods=4000, gap=(700, 1000))
+
+
+class TestSignalIndexMap:
+    @pytest.mark.parametrize("timeframe", ["5min", "15min", "60min", "7min"])
+    def test_maps_to_last_row_of_each_bar(self, gappy_df, timeframe):
+        mapping = signal_index_map(gappy_df, timeframe, IndicatorCache())
+        bars = resample(gappy_df, timeframe)
+        assert len(mapping) == len(bars)
+
+        bar_end = bars.index + pd.Timedelta(timeframe)
+        # Signal candle is inside the bar; the execution candle (next row) opens at or after its close
+        assert (gappy_df.index[mapping] >= bars.index).all()
+        assert (gappy_df.index[mapping] < bar_end).all()
+        execution = mapping + 1
+        inside = execution < len(gappy_df)
+        assert (gappy_df.index[execution[inside]] >= bar_end[inside]).all()
+
+    def test_signal_candle_close_is_bar_close(self, gappy_df):
+        mapping = signal_index_map(gappy_df, "15min", IndicatorCache())
+        bars = resample(gappy_df, "15min")
+        np.testing.assert_array_equal(gappy_df["close"].to_numpy()[mapping], bars["close"].to_numpy())
+
+    def test_cached_per_fingerprint_and_timeframe(self, gappy_df):
+        cache = IndicatorCache()
+        first = signal_index_map(gappy_df, "15min", cache)
+        assert signal_index_map(gappy_df.copy(), "15min", cache) is first
+        assert signal_index_map(gappy_df, "5min", cache) is not first
+
+    def test_market_data_matches_frame(self, gappy_df):
+        np.testing.assert_array_equal(
+            signal_index_map(MarketData.from_frame(gappy_df), "30min", IndicatorCache()),
+            signal_index_map(gappy_df, "30min", IndicatorCache()),
+        )
+
+
+class TestMapSignals:
+    def test_remaps_indexes_and_keeps_fields(self, gappy_df):
+        cache = IndicatorCache()
+        batch = SignalBatch([3, 5, 5], [1, 0, -1], [99.0, 0.0, 101.0], [101.0, 0.0, 99.0], [1.0, 1.0, 0.5])
+        mapped = map_signals(batch, gappy_df, "15min", cache)
+        mapping = signal_index_map(gappy_df, "15min", cache)
+        np.testing.assert_array_equal(mapped.timestamp_index, mapping[[3, 5, 5]])
+        np.testing.assert_array_equal(mapped.signal_type, [1, 0, -1])
+        np.testing.assert_array_equal(mapped.size, [1.0, 1.0, 0.5])
+
+    def test_accepts_signal_list(self, gappy_df):
+        batch = SignalBatch([2], [SIGNAL_TYPE_CODES[SignalType.LONG]], [90.0], [110.0], [1.0])
+        mapped = map_signals(batch.to_signals(), gappy_df, "5min", IndicatorCache())
+        assert mapped.to_signals()[0].signal_type == SignalType.LONG
+
+    def test_out_of_range_index_raises(self, gappy_df):
+        bars = len(resample(gappy_df, "60min"))
+        with pytest.raises(ValueError, match="outside"):
+            map_signals(SignalBatch([bars], [1], [90.0], [110.0], [1.0]), gappy_df, "60min", IndicatorCache())
+
+
+class TestResampledStrategy:
+    def test_signals_from_resampled_bars(self, gappy_df):
+        cache = IndicatorCache()
+        inner = MACrossoverStrategy(fast_period=3, slow_period=8, indicator_cache=cache)
+        signals = ResampledStrategy(inner, "15min", cache).generate(gappy_df)
+        expected = inner.generate_batch(resample(gappy_df, "15min"))
+        assert len(signals) == len(expected) > 0
+        np.testing.assert_array_equal(signals.stop_loss_level, expected.stop_loss_level)
+        np.testing.assert_array_equal(signals.timestamp_index,
+                                      signal_index_map(gappy_df, "15min", cache)[expected.timestamp_index])
+
+    def test_runs_on_1min_engine(self, gappy_df):
+        strategy = ResampledStrategy(MACrossoverStrategy(fast_period=3, slow_period=8), "15min")
+        result = BacktestEngine(gappy_df, strategy.generate(gappy_df), ExecutionMode.SPREAD_ON, 10_000).run()
+        assert len(result.trades) > 0
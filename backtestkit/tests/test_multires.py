@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.multires import MultiResolutionScanner
+
+
+@pytest.fixture
+def gappy_df():
+    """Random-walk 1-min candles with ~20% of the minutes missing."""
+    rng = np.random.default_rng(21)
+    n = 6000
+    timestamps = pd.date_range("2024-01-15 09:30", periods=n, freq="1min")
+    keep = np.sort(rng.choice(n, size=int(n * 0.8), replace=False))
+    close = 100.0 + np.cumsum(rng.normal(0, 0.3, n))[keep]
+    high = close + rng.uniform(0, 0.5, len(keep))
+    low = close - rng.uniform(0, 0.5, len(keep))
+    return pd.DataFrame(
+        {"open": close, "high": high, "low": low, "close": close, "spread": 0.1},
+        index=timestamps[keep],
+    )
+
+
+def brute_first_touch(df, start, stop, low_level, high_level):
+    low = df["low"].to_numpy()[start:stop]
+    high = df["high"].to_numpy()[start:stop]
+    hits = np.flatnonzero((low <= low_level) | (high >= high_level))
+    return start + int(hits[0]) if hits.size else stop
+
+
+class TestMultiResolutionScanner:
+    @pytest.mark.parametrize("timeframes", [
+        ("60min", "15min", "5min"),
+        ("30min",),
+        ("60min", "7min"),  # levels need not nest
+        (),
+    ])
+    def test_matches_brute_force(self, gappy_df, timeframes):
+        """Coarse-to-fine lookup returns the same candle as a linear scan."""
+        scanner = MultiResolutionScanner(gappy_df, timeframes)
+        rng = np.random.default_rng(4)
+        low, high = gappy_df["low"].to_numpy(), gappy_df["high"].to_numpy()
+        for _ in range(300):
+            start = int(rng.integers(0, len(gappy_df)))
+            stop = int(rng.integers(start, len(gappy_df) + 1))
+            low_level = low[start] - rng.uniform(0, 15)
+            high_level = high[start] + rng.uniform(0, 15)
+            assert scanner.first_touch(start, low_level, high_level, stop) == \
+                brute_first_touch(gappy_df, start, stop, low_level, high_level)
+
+    def test_one_sided_levels(self, gappy_df):
+        """Infinite levels disable a side; unreachable levels return stop."""
+        scanner = MultiResolutionScanner(gappy_df)
+        assert scanner.first_touch(0, -np.inf, np.inf) == len(gappy_df)
+        target = float(gappy_df["low"].min())
+        expected = int(np.argmin(gappy_df["low"].to_numpy()))
+        assert scanner.first_touch(0, target, np.inf) == expected
+
+    def test_requires_sorted_index(self, gappy_df):
+        """An unsorted index is rejected."""
+        with pytest.raises(ValueError):
+            MultiResolutionScanner(gappy_df.iloc[::-1])
@@ -0,0 +1,98 @@
+import math
+
+import pytest
+import numpy as np
+from backtester.position_book import PositionBook
+from backtester.sl_tp import check_sl_tp
+from common.models import ExecutionMode
+
+
+@pytest.fixture
+def mixed_book():
+    """Book with LONG units at various SL/TP levels."""
+    book = PositionBook(capacity=2)
+    book.add("LONG", entry_price=100.0, size=10.0, sl=98.0, tp=102.0, trade_id=0)
+    book.add("LONG", entry_price=101.0, size=5.0, sl=99.5, tp=104.0, trade_id=1)
+    book.add("LONG", entry_price=100.5, size=2.0, sl=97.0, tp=101.0, trade_id=2)
+    return book
+
+
+class TestEvaluate:
+    @pytest.mark.parametrize("mode", list(ExecutionMode))
+    def test_matches_check_sl_tp(self, mode):
+        """Vectorized evaluation gives the same trigger and exit price as check_sl_tp per unit."""
+        rng = np.random.default_rng(9)
+        for _ in range(50):
+            book = PositionBook()
+            direction = "LONG" if rng.random() < 0.5 else "SHORT"
+            sign = 1 if direction == "LONG" else -1
+            for k in range(int(rng.integers(1, 40))):
+                entry = 100.0 + rng.normal(0, 1)
+                book.add(direction, entry, 1.0 + k,
+                         sl=entry - sign * rng.uniform(0.1, 3), tp=entry + sign * rng.uniform(0.1, 3),
+                         trade_id=k)
+            low = 100.0 - rng.uniform(0, 3)
+            high = 100.0 + rng.uniform(0, 3)
+            candle = {"open": 100.0, "high": high, "low": low, "close": 100.0, "spread": 0.3}
+
+            slots, is_sl, exits = book.evaluate(high, low, 0.3, mode)
+            expected = []
+            for slot, unit in enumerate(book.units()):
+                result = check_sl_tp(unit, candle, mode)
+                if result.triggered is not None:
+                    expected.append((slot, result.triggered == "SL", result.exit_price))
+            assert list(zip(slots.tolist(), is_sl.tolist(), exits.tolist())) == expected
+
+    def test_worst_case_rule(self, mixed_book):
+        """A candle hitting both levels of a unit reports SL."""
+        slots, is_sl, _ = mixed_book.evaluate(high=103.0, low=97.5, spread=0.0,
+                                              mode=ExecutionMode.SPREAD_OFF)
+        assert slots.tolist() == [0, 1, 2]
+        assert is_sl.tolist() == [True, True, False]
+
+    def test_nothing_triggered(self, mixed_book):
+        """A candle inside every unit's band triggers nothing."""
+        slots, _, _ = mixed_book.evaluate(high=100.8, low=99.8, spread=0.0,
+                                          mode=ExecutionMode.SPREAD_OFF)
+        assert len(slots) == 0
+
+
+class TestMaintenance:
+    def test_remove_keeps_entry_order(self, mixed_book):
+        """Compaction drops the given slots and keeps the rest in order."""
+        mixed_book.remove(np.array([1]))
+        assert [u.trade_id for u in mixed_book.units()] == [0, 2]
+        assert len(mixed_book) == 2
+
+    def test_reduce_scales_sizes(self, mixed_book):
+        """A partial close scales every unit's size."""
+        mixed_book.reduce(0.5)
+        assert [u.size for u in mixed_book.units()] == [5.0, 2.5, 1.0]
+
+    def test_reduce_drops_empty_units(self, mixed_book):
+        """Units with nothing left after a partial close are removed."""
+        mixed_book.reduce(1.0 - 1e-14)
+        assert len(mixed_book) == 0
+
+    def test_touch_levels(self, mixed_book):
+        """Touch levels are the tightest SL/TP band across units."""
+        assert mixed_book.touch_levels() == (99.5, 101.0)
+        mixed_book.remove(np.array([1, 2]))
+        assert mixed_book.touch_levels() == (98.0, 102.0)
+        mixed_book.clear()
+        assert mixed_book.touch_levels() == (-math.inf, math.inf)
+
+    def test_touch_levels_short_and_nan(self):
+        """SHORT units swap SL/TP sides; NaN levels are ignored."""
+        book = PositionBook()
+        book.add("SHORT", entry_price=100.0, size=1.0, sl=102.0, tp=97.0)
+        book.add("SHORT", entry_price=100.0, size=1.0, sl=float("nan"), tp=98.0)
+        assert book.touch_levels() == (98.0, 102.0)
+
+    def test_grows_past_capacity(self):
+        """Hundreds of layers fit after doubling."""
+        book = PositionBook(capacity=1)
+        for k in range(300):
+            book.add("LONG", 100.0, 1.0, sl=90.0 - k * 0.01, tp=110.0, trade_id=k)
+        assert len(book) == 300
+        assert book.units()[-1].trade_id == 299
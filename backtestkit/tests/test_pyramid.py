@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+import pandas as pd
+from common.data_loader import resample
+from common.indicators import IndicatorCache
+from common.market_data import MarketData
+from common.pyramid import ResamplePyramid, build_pyramid
+
+pytestmark = pytest.mark.gappy_ohlc(seed=13, periods=3000, gap=(600, 900))
+
+
+def assert_matches_resample(level, data, timeframe):
+    expected = resample(data, timeframe)
+    bars = level.bars
+    assert bars.index.equals(expected.index)
+    for name in ("open", "high", "low", "close", "spread"):
+        np.testing.assert_array_equal(bars[name].to_numpy(), expected[name].to_numpy(), err_msg=name)
+
+
+class TestResamplePyramid:
+    @pytest.mark.parametrize("timeframe", ["5min", "15min", "30min", "60min"])
+    def test_levels_match_resample(self, gappy_df, timeframe):
+        pyramid = ResamplePyramid(gappy_df, ["60min", "5min", "30min", "15min"])
+        assert pyramid.timeframes == ("5min", "15min", "30min", "60min")
+        assert_matches_resample(pyramid[timeframe], gappy_df, timeframe)
+
+    @pytest.mark.parametrize("timeframe", ["5min", "60min", "7min"])
+    def test_row_maps_cover_each_bar(self, gappy_df, timeframe):
+        """first_row/last_row are exactly the 1-min rows inside each bar."""
+        level = ResamplePyramid(gappy_df, ["5min", "60min", "7min"])[timeframe]
+        start = level.bars.index.as_unit("ns").asi8
+        end = start + pd.Timedelta(timeframe).value
+        rows = gappy_df.index.as_unit("ns").asi8
+        np.testing.assert_array_equal(level.first_row, np.searchsorted(rows, start))
+        np.testing.assert_array_equal(level.last_row, np.searchsorted(rows, end) - 1)
+
+    def test_unaligned_timeframe_falls_back_to_resample(self, gappy_df):
+        assert_matches_resample(ResamplePyramid(gappy_df, ["7min"])["7min"], gappy_df, "7min")
+
+    def test_tz_aware_data(self, gappy_df):
+        data = gappy_df.tz_localize("America/New_York")
+        assert_matches_resample(ResamplePyramid(data, ["15min"])["15min"], data, "15min")
+
+    def test_market_data_levels(self, gappy_df):
+        level = ResamplePyramid(MarketData.from_frame(gappy_df), ["15min"])["15min"]
+        assert isinstance(level.bars, MarketData)
+        expected = resample(gappy_df, "15min")
+        np.testing.assert_array_equal(level.bars.timestamp, expected.index.as_unit("ns").asi8)
+        for name in ("high", "spread"):
+            np.testing.assert_array_equal(level.bars[name], expected[name].to_numpy(), err_msg=name)
+
+
+class TestBuildPyramid:
+    def test_cached_by_fingerprint(self, gappy_df):
+        cache = IndicatorCache()
+        first = build_pyramid(gappy_df, ["5min", "60min"], cache=cache)
+        assert build_pyramid(gappy_df.copy(), ["60min", "5min"], cache=cache) is first
+        assert cache.hits == 1
+        assert build_pyramid(gappy_df, ["15min"], cache=cache) is not first
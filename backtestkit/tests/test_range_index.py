@@ -0,0 +1,125 @@
+import pytest
+import numpy as np
+from backtester.range_index import RangeMinMaxIndex
+from backtester.sl_tp import PositionUnit, check_sl_tp
+from common.models import ExecutionMode
+
+
+@pytest.fixture
+def walk():
+    """Seeded random-walk lows/highs long enough for several index levels."""
+    rng = np.random.default_rng(3)
+    low = 100.0 + np.cumsum(rng.normal(0, 0.5, 5000))
+    high = low + rng.uniform(0.0, 1.0, 5000)
+    return low, high
+
+
+def brute_first_touch(low, high, start, stop, low_level, high_level):
+    hits = np.flatnonzero((low[start:stop] <= low_level) | (high[start:stop] >= high_level))
+    return start + int(hits[0]) if hits.size else stop
+
+
+class TestFirstTouch:
+    @pytest.mark.parametrize("block_size", [2, 3, 16, 64])
+    def test_matches_brute_force(self, walk, block_size):
+        """first_touch agrees with a linear scan for random queries."""
+        low, high = walk
+        index = RangeMinMaxIndex(low, high, block_size=block_size)
+        rng = np.random.default_rng(11)
+        for _ in range(300):
+            start = int(rng.integers(0, len(low)))
+            stop = int(rng.integers(start, len(low) + 1))
+            low_level = low[start] - rng.uniform(0, 20)
+            high_level = high[start] + rng.uniform(0, 20)
+            assert index.first_touch(start, low_level, high_level, stop) == \
+                brute_first_touch(low, high, start, stop, low_level, high_level)
+
+    def test_no_touch_returns_stop(self, walk):
+        """Unreachable levels return stop (default: len)."""
+        low, high = walk
+        index = RangeMinMaxIndex(low, high)
+        assert index.first_touch(0, -np.inf, np.inf) == len(low)
+        assert index.first_touch(10, -np.inf, np.inf, stop=100) == 100
+
+    def test_touch_at_start(self):
+        """A touch on the start candle itself is returned."""
+        index = RangeMinMaxIndex(np.array([1.0, 2.0, 3.0]), np.array([2.0, 3.0, 4.0]), 2)
+        assert index.first_touch(1, 2.0, np.inf) == 1
+
+    def test_rejects_bad_block_size(self):
+        """block_size below 2 is rejected."""
+        with pytest.raises(ValueError):
+            RangeMinMaxIndex(np.zeros(3), np.zeros(3), block_size=1)
+
+
+class TestFirstSLTPHit:
+    def test_sl_wins_same_candle(self):
+        """Both levels hit on one candle -> SL (worst-case rule)."""
+        low = np.array([99.5, 97.0, 99.0])
+        high = np.array([100.5, 103.0, 101.0])
+        index = RangeMinMaxIndex(low, high, 2)
+        assert index.first_sl_tp_hit("LONG", sl=98.0, tp=102.0, start=0) == (1, "SL")
+        assert index.first_sl_tp_hit("SHORT", sl=102.0, tp=98.0, start=0) == (1, "SL")
+
+    @pytest.mark.parametrize("direction", ["LONG", "SHORT"])
+    def test_agrees_with_check_sl_tp(self, walk, direction):
+        """The first hit and its type match check_sl_tp applied candle by candle."""
+        low, high = walk
+        index = RangeMinMaxIndex(low, high, 8)
+        sign = 1 if direction == "LONG" else -1
+        for start in range(0, 4000, 97):
+            ref = (low[start] + high[start]) / 2
+            unit = PositionUnit(direction=direction, entry_price=ref, size=1.0,
+                                sl=ref - sign * 3.0, tp=ref + sign * 4.0)
+            expected = (len(low), None)
+            for i in range(start, len(low)):
+                candle = {"open": ref, "high": high[i], "low": low[i], "close": ref, "spread": 0.0}
+                result = check_sl_tp(unit, candle, ExecutionMode.SPREAD_OFF)
+                if result.triggered is not None:
+                    expected = (i, result.triggered)
+                    break
+            assert index.first_sl_tp_hit(direction, unit.sl, unit.tp, start) == expected
+
+
+class TestRangeMinMax:
+    def test_matches_numpy(self, walk):
+        """range_min/range_max equal numpy min/max over the slice."""
+        low, high = walk
+        index = RangeMinMaxIndex(low, high, 4)
+        rng = np.random.default_rng(5)
+        for _ in range(200):
+            start = int(rng.integers(0, len(low) - 1))
+            stop = int(rng.integers(start + 1, len(low) + 1))
+            assert index.range_min(start, stop) == low[start:stop].min()
+            assert index.range_max(start, stop) == high[start:stop].max()
+
+    def test_empty_range(self, walk):
+        """Empty ranges return the reduction identity."""
+        index = RangeMinMaxIndex(*walk)
+        assert index.range_min(5, 5) == np.inf
+        assert index.range_max(5, 5) == -np.inf
+
+
+class TestBulkArgMinMax:
+    @pytest.mark.parametrize("block_size", [2, 3, 16, 64])
+    def test_matches_numpy(self, walk, block_size):
+        """Values and first-occurrence indexes equal numpy's over every slice."""
+        low, high = np.round(walk[0]), np.round(walk[1])  # ties: the first occurrence wins
+        index = RangeMinMaxIndex(low, high, block_size)
+        rng = np.random.default_rng(7)
+        starts = rng.integers(0, len(low), 500)
+        stops = np.minimum(starts + rng.integers(1, len(low), 500), len(low))
+        values, positions = index.range_argmin(starts, stops)
+        for value, position, start, stop in zip(values, positions, starts, stops):
+            assert value == low[start:stop].min()
+            assert position == start + np.argmin(low[start:stop])
+        values, positions = index.range_argmax(starts, stops)
+        for value, position, start, stop in zip(values, positions, starts, stops):
+            assert value == high[start:stop].max()
+            assert position == start + np.argmax(high[start:stop])
+
+    def test_empty_ranges(self, walk):
+        index = RangeMinMaxIndex(*walk)
+        values, positions = index.range_argmin([5, 9], [5, 3])
+        assert values.tolist() == [np.inf, np.inf]
+        assert positions.tolist() == [-1, -1]
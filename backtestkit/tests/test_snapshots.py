@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.snapshots import Snapshot, SnapshotStore
+
+
+def offer(store, rows):
+    """Offer (cash, position_size, unrealized_pnl, equity) rows one at a time."""
+    for row in rows:
+        store.append(*row)
+
+
+ROWS = [
+    (100.0, 0.0, 0.0, 100.0),
+    (100.0, 0.0, 0.0, 100.0),
+    (50.0, 1.0, 0.0, 100.0),
+    (50.0, 1.0, 2.0, 102.0),
+    (50.0, 1.0, 2.0, 102.0),
+    (100.0, 0.0, 0.0, 100.0),
+]
+
+
+class TestSnapshotStore:
+    def test_all_mode_keeps_every_row(self):
+        """Every offered candle is kept, as arrays and as Snapshot objects."""
+        store = SnapshotStore()
+        offer(store, ROWS)
+        assert len(store) == 6
+        assert store.index.tolist() == list(range(6))
+        assert store.equity.tolist() == [r[3] for r in ROWS]
+        assert store[3] == Snapshot(index=3, cash=50.0, position_size=1.0,
+                                    unrealized_pnl=2.0, equity=102.0)
+        assert store[-1].index == 5
+
+    def test_extend_matches_append(self):
+        """A run offered as arrays is stored like the same rows appended one by one."""
+        appended = SnapshotStore()
+        offer(appended, ROWS)
+        extended = SnapshotStore()
+        offer(extended, ROWS[:2])
+        columns = list(zip(*ROWS[2:5]))
+        extended.extend(*[np.array(c) for c in columns])
+        extended.extend(100.0, 0.0, np.zeros(1), 100.0)  # scalars broadcast
+        assert appended == extended
+
+    def test_every_n_keeps_multiples(self):
+        """every_n keeps candles whose index is a multiple of the step."""
+        store = SnapshotStore(mode="every_n", every=4)
+        offer(store, ROWS * 2)
+        assert store.index.tolist() == [0, 4, 8]
+
+    def test_on_change_keeps_state_changes(self):
+        """on_change drops candles identical to the previous one, across flushes."""
+        store = SnapshotStore(mode="on_change")
+        offer(store, ROWS[:3])
+        store.flush()
+        offer(store, ROWS[3:])
+        assert store.index.tolist() == [0, 2, 3, 5]
+
+    def test_none_mode_stores_nothing(self):
+        """none keeps no rows but still tracks the candle position."""
+        store = SnapshotStore(mode="none")
+        offer(store, ROWS)
+        assert len(store) == 0
+        assert store.next_index == 6
+
+    def test_grows_past_capacity(self):
+        """Arrays grow when more rows are kept than preallocated."""
+        store = SnapshotStore(capacity=2)
+        store.extend(np.arange(10.0), 0.0, 0.0, np.arange(10.0))
+        assert store.cash.tolist() == list(np.arange(10.0))
+
+    def test_arrays_are_read_only(self):
+        """Column views cannot be written through."""
+        store = SnapshotStore()
+        offer(store, ROWS)
+        with pytest.raises(ValueError):
+            store.cash[0] = 1.0
+
+    def test_to_frame_with_timestamps(self):
+        """to_frame labels rows with candle timestamps when given."""
+        timestamps = pd.date_range("2024-01-15 09:30", periods=6, freq="1min")
+        store = SnapshotStore(mode="every_n", every=2)
+        offer(store, ROWS)
+        frame = store.to_frame(timestamps)
+        assert list(frame.columns) == ["cash", "position_size", "unrealized_pnl", "equity"]
+        assert list(frame.index) == list(timestamps[[0, 2, 4]])
+
+    def test_unknown_mode_rejected(self):
+        """An unknown mode raises ValueError."""
+        with pytest.raises(ValueError):
+            SnapshotStore(mode="sometimes")
+
+    def test_columns_read_after_growing_flush(self):
+        """Reading a column right after appends that outgrow the arrays sees the flushed rows."""
+        store = SnapshotStore(mode="on_change", capacity=4)
+        for i in range(3000):
+            store.append(1.0, 0.0, float(i // 3), 1.0)
+        np.testing.assert_array_equal(store.index, np.arange(0, 3000, 3))
+        assert len(store) == 1000
+
+    def test_from_columns_continues_recording(self):
+        """A store rebuilt from columns/last_row records like the original."""
+        rows = [(1.0, 0.0, float(i // 4), 1.0) for i in range(40)]
+        full = SnapshotStore(mode="on_change")
+        offer(full, rows)
+        head = SnapshotStore(mode="on_change")
+        offer(head, rows[:22])
+        resumed = SnapshotStore.from_columns(head.columns(), mode="on_change",
+                                             next_index=22, last_row=head.last_row)
+        offer(resumed, rows[22:])
+        assert resumed == full
@@ -2,7 +2,7 @@ import pytest
 import pandas as pd
 import numpy as np
 from strategies.ma_crossover import MACrossoverStrategy
-from strategies.signals import Signal
+from strategies.signals import Signal, SignalBatch
 from common.models import SignalType
 
 @pytest.fixture
@@ -348,6 +348,91 @@ class TestMACrossoverEdgeCases:
         assert trending_up_df.index.equals(original_index)
 
 
+class TestMACrossoverBatch:
+    def test_batch_matches_generate(self, crossover_then_crossunder_df):
+        """generate_batch holds exactly the signals returned by generate."""
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20)
+        batch = strategy.generate_batch(crossover_then_crossunder_df)
+        assert isinstance(batch, SignalBatch)
+        assert batch.to_signals() == strategy.generate(crossover_then_crossunder_df)
+
+    def test_repeated_cross_same_direction_has_no_close(self):
+        """Crossing above again after the MAs meet (without crossing below) emits no CLOSE."""
+        prices = ([100.0] * 10 + [100.0 + i for i in range(1, 6)]
+                  + [105.0] * 10 + [105.0 + i for i in range(1, 6)])
+        n = len(prices)
+        df = pd.DataFrame({
+            "open": prices, "high": prices, "low": prices, "close": prices,
+            "spread": [0.10] * n,
+        }, index=pd.date_range("2024-01-15 09:30", periods=n, freq="1min"))
+        signals = MACrossoverStrategy(fast_period=2, slow_period=4).generate(df)
+        assert [s.signal_type for s in signals] == [SignalType.LONG, SignalType.LONG]
+
+    @pytest.mark.parametrize("seed,tick", [(7, 0.1), (13, 0.05), (39, 0.1), (101, 0.05)])
+    def test_matches_rolling_mean_signals_on_tick_grid(self, seed, tick):
+        """Ties between the MAs resolve as with close.rolling().mean(), signal for signal."""
+        rng = np.random.default_rng(seed)
+        close = np.round((15000.0 + np.cumsum(rng.normal(0, 2.0, 20000))) / tick) * tick
+        df = pd.DataFrame({"close": close, "spread": np.full(len(close), 0.1)},
+                          index=pd.date_range("2024-01-15 09:30", periods=len(close), freq="1min"))
+        fast_ma = df["close"].rolling(window=5).mean().to_numpy()
+        slow_ma = df["close"].rolling(window=20).mean().to_numpy()
+        above = (fast_ma[:-1] <= slow_ma[:-1]) & (fast_ma[1:] > slow_ma[1:])
+        below = ~above & (fast_ma[:-1] >= slow_ma[:-1]) & (fast_ma[1:] < slow_ma[1:])
+        expected = [(i + 1, SignalType.LONG if above[i] else SignalType.SHORT)
+                    for i in np.flatnonzero(above | below)]
+        signals = MACrossoverStrategy(fast_period=5, slow_period=20).generate(df)
+        assert [(s.timestamp_index, s.signal_type) for s in signals
+                if s.signal_type != SignalType.CLOSE] == expected
+
+    def test_too_few_candles_returns_empty_batch(self, trending_up_df):
+        """Data shorter than slow_period gives an empty batch."""
+        batch = MACrossoverStrategy(fast_period=5, slow_period=50).generate_batch(trending_up_df)
+        assert len(batch) == 0
+
+
+def replay(strategy, df):
+    """Feed df to on_bar candle by candle and collect the signals."""
+    strategy.reset()
+    return [signal for _, bar in df.iterrows() for signal in strategy.on_bar(bar)]
+
+
+class TestMACrossoverStreaming:
+    def test_replay_matches_generate(self, crossover_then_crossunder_df):
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20)
+        assert replay(strategy, crossover_then_crossunder_df) == strategy.generate(crossover_then_crossunder_df)
+
+    @pytest.mark.parametrize("fast,slow", [(1, 2), (3, 8), (5, 20), (10, 30)])
+    def test_replay_matches_generate_on_random_walk(self, fast, slow):
+        """Bit-identical signals (indexes, SL/TP levels) on noisy data with many crosses."""
+        rng = np.random.default_rng(18)
+        close = 15000.0 + np.cumsum(rng.normal(0, 3.0, 2000))
+        close[700] = np.nan
+        df = pd.DataFrame({"close": close, "spread": np.full(len(close), 0.1)},
+                          index=pd.date_range("2024-01-15 09:30", periods=len(close), freq="1min"))
+        strategy = MACrossoverStrategy(fast_period=fast, slow_period=slow, sl_pct=0.003, tp_pct=0.005)
+        expected = strategy.generate(df)
+        assert len(expected) > 20
+        assert replay(strategy, df) == expected
+
+    def test_bars_as_dicts(self, trending_up_df):
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20)
+        signals = [s for close in trending_up_df["close"] for s in strategy.on_bar({"close": close})]
+        assert signals == strategy.generate(trending_up_df)
+
+    def test_reset_starts_a_new_stream(self, trending_up_df):
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20)
+        first = replay(strategy, trending_up_df)
+        assert replay(strategy, trending_up_df) == first
+
+    def test_state_does_not_grow_with_history(self):
+        strategy = MACrossoverStrategy(fast_period=3, slow_period=7)
+        for i in range(5000):
+            strategy.on_bar({"close": 100.0 + (i % 17)})
+        assert len(strategy._fast._values) == 3
+        assert len(strategy._slow._values) == 7
+
+
 class TestSignalDataclass:
     """Tests for the Signal dataclass itself."""
 
@@ -387,3 +472,45 @@ class TestSignalDataclass:
         """Size field accepts fractional values (for future partial sizing)."""
         sig = Signal(0, SignalType.LONG, 98.0, 102.0, 0.5)
         assert sig.size == 0.5
+
+
+class TestSignalBatch:
+    def test_sorted_with_close_first(self):
+        """Rows are sorted by index, CLOSE before entries, otherwise in input order."""
+        signals = [
+            Signal(7, SignalType.LONG, 98.0, 102.0, 0.5),
+            Signal(3, SignalType.SHORT, 102.0, 98.0, 1.0),
+            Signal(7, SignalType.SHORT, 103.0, 97.0, 0.25),
+            Signal(7, SignalType.CLOSE, 0.0, 0.0, 1.0),
+        ]
+        batch = SignalBatch.from_signals(signals)
+        assert batch.to_signals() == [signals[1], signals[3], signals[0], signals[2]]
+
+    def test_round_trip(self, crossover_then_crossunder_df):
+        """Strategy output survives conversion to a batch and back."""
+        signals = MACrossoverStrategy(fast_period=5, slow_period=20).generate(
+            crossover_then_crossunder_df)
+        assert SignalBatch.from_signals(signals).to_signals() == signals
+
+    def test_groups(self):
+        """groups() returns each signal candle once with its row range."""
+        batch = SignalBatch([5, 2, 5, 9], [1, 0, 0, -1], [0.0] * 4, [0.0] * 4, [1.0] * 4)
+        candles, offsets = batch.groups()
+        assert candles.tolist() == [2, 5, 9]
+        assert offsets.tolist() == [0, 1, 3, 4]
+
+    def test_empty_batch(self):
+        """An empty batch has no groups."""
+        batch = SignalBatch.from_signals([])
+        assert len(batch) == 0
+        assert batch.groups()[0].size == 0
+
+    def test_mismatched_columns_rejected(self):
+        """Columns of different lengths raise ValueError."""
+        with pytest.raises(ValueError):
+            SignalBatch([1, 2], [1], [0.0, 0.0], [0.0, 0.0], [1.0, 1.0])
+
+    def test_unknown_type_code_rejected(self):
+        """Type codes outside SIGNAL_TYPE_CODES raise ValueError."""
+        with pytest.raises(ValueError):
+            SignalBatch([1], [5], [0.0], [0.0], [1.0])
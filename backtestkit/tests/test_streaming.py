@@ -0,0 +1,151 @@
+import pytest
+import numpy as np
+from backtester.engine import BacktestEngine
+from backtester.equity_curve import CashEventLog, EquityCurve
+from backtester.streaming import StreamingEngine, iter_blocks
+from common.data_loader import iter_csv, load_csv
+from common.market_data import MarketData
+from common.models import ExecutionMode, SignalType
+from strategies.signals import Signal
+from tests.conftest import ma_strategy
+
+pytestmark = pytest.mark.ohlc(seed=20, index_name="timestamp")
+
+
+def stream(blocks, signals, mode=ExecutionMode.SPREAD_ON, **kwargs):
+    """Run a StreamingEngine collecting its sinks; return (result, trades, snapshots)."""
+    trade_chunks, snapshot_chunks = [], []
+    result = StreamingEngine(mode, 10_000.0, trade_sink=trade_chunks.append,
+                             snapshot_sink=snapshot_chunks.append, **kwargs).run(blocks, signals)
+    return result, concat(trade_chunks, "trade_id"), concat(snapshot_chunks, "index")
+
+
+def concat(chunks, order):
+    columns = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    rows = np.argsort(columns[order], kind="stable")
+    return {name: values[rows] for name, values in columns.items()}
+
+
+def assert_matches_full_run(full, result, trades, snapshots):
+    assert result.final_equity == full.final_equity
+    assert result.realized_pnl == full.realized_pnl
+    assert result.unrealized_pnl == full.unrealized_pnl
+    assert result.trade_count == len(full.trades)
+    np.testing.assert_array_equal(trades["trade_id"], np.arange(len(full.trades)))
+    for name, values in full.ledger.columns().items():
+        np.testing.assert_array_equal(trades[name], values)
+    for name, values in full.snapshots.columns().items():
+        np.testing.assert_array_equal(snapshots[name], values)
+
+
+class TestMatchesFullRun:
+    @pytest.mark.parametrize("core", ["columnar", "pandas", "event"])
+    @pytest.mark.parametrize("snapshot_mode", ["all", "every_n", "on_change"])
+    def test_cores_and_snapshot_modes(self, ohlc, core, snapshot_mode):
+        kwargs = dict(core=core, snapshot_mode=snapshot_mode, snapshot_every=7)
+        batch = ma_strategy().generate_batch(ohlc)
+        full = BacktestEngine(ohlc, batch, ExecutionMode.SPREAD_ON, 10_000.0, **kwargs).run()
+        assert_matches_full_run(full, *stream(iter_blocks(ohlc, 250), batch, **kwargs))
+
+    @pytest.mark.parametrize("block_rows", [1, 7, 1000, 5000])
+    def test_block_sizes(self, ohlc, block_rows):
+        batch = ma_strategy().generate_batch(ohlc)
+        full = BacktestEngine(ohlc, batch, ExecutionMode.SPREAD_OFF, 10_000.0).run()
+        result, trades, snapshots = stream(iter_blocks(ohlc, block_rows), batch, ExecutionMode.SPREAD_OFF)
+        assert result.candles == len(ohlc)
+        assert_matches_full_run(full, result, trades, snapshots)
+
+    def test_metrics(self, ohlc):
+        batch = ma_strategy().generate_batch(ohlc)
+        full = BacktestEngine(ohlc, batch, ExecutionMode.SPREAD_ON, 10_000.0).run()
+        result = StreamingEngine(ExecutionMode.SPREAD_ON, 10_000.0, snapshot_mode="none").run(
+            iter_blocks(ohlc, 400), batch)
+        assert result.metrics == pytest.approx(full.metrics, rel=1e-9)
+        assert result.metrics["total_trades"] == full.metrics["total_trades"] > 0
+
+    @pytest.mark.parametrize("block_rows", [1, 250])
+    def test_events_mode(self, ohlc, block_rows):
+        """Event chunks rebuild the full run's snapshots; metrics still cover the whole stream."""
+        batch = ma_strategy().generate_batch(ohlc)
+        full = BacktestEngine(ohlc, batch, ExecutionMode.SPREAD_ON, 10_000.0).run()
+        event_chunks = []
+        result = StreamingEngine(ExecutionMode.SPREAD_ON, 10_000.0, event_sink=event_chunks.append,
+                                 snapshot_mode="events").run(iter_blocks(ohlc, block_rows), batch)
+        events = CashEventLog.from_columns(10_000.0, concat(event_chunks, "index"))
+        curve = EquityCurve(events, ohlc["close"].to_numpy(), ohlc["spread"].to_numpy())
+        for name, values in full.snapshots.columns().items():
+            np.testing.assert_array_equal(curve.columns()[name], values)
+        assert result.metrics == pytest.approx(full.metrics, rel=1e-9)
+
+    def test_pending_signals_and_open_units_cross_blocks(self, ohlc):
+        signals = [
+            Signal(99, SignalType.LONG, 50.0, 200.0, 0.5),
+            Signal(199, SignalType.LONG, 50.0, 200.0, 0.5),
+            Signal(299, SignalType.CLOSE, 0.0, 0.0, 0.5),
+            Signal(399, SignalType.CLOSE, 0.0, 0.0, 1.0),
+            Signal(399, SignalType.SHORT, 200.0, 50.0, 1.0),
+        ]
+        full = BacktestEngine(ohlc, signals, ExecutionMode.SPREAD_ON, 10_000.0).run()
+        result, trades, snapshots = stream(iter_blocks(ohlc, 100), signals)
+        assert_matches_full_run(full, result, trades, snapshots)
+        assert trades["entry_index"][0] == 100
+
+    def test_memory_mapped_blocks(self, ohlc, tmp_path):
+        MarketData.from_frame(ohlc).save(tmp_path / "m1")
+        data = MarketData.load(tmp_path / "m1")
+        batch = ma_strategy().generate_batch(data)
+        full = BacktestEngine(data, batch, ExecutionMode.SPREAD_ON, 10_000.0).run()
+        assert_matches_full_run(full, *stream(iter_blocks(data, 640), batch))
+
+    def test_csv_chunks(self, ohlc, tmp_path):
+        path = tmp_path / "m1.csv"
+        ohlc.to_csv(path)
+        data = load_csv(path)
+        batch = ma_strategy().generate_batch(data)
+        full = BacktestEngine(data, batch, ExecutionMode.SPREAD_ON, 10_000.0).run()
+        assert_matches_full_run(full, *stream(iter_csv(path, chunk_rows=512), batch))
+
+
+class TestSignalSources:
+    def test_streaming_strategy(self, ohlc):
+        """A strategy's on_bar() is fed every candle of every block."""
+        full = BacktestEngine(ohlc, ma_strategy().generate_batch(ohlc), ExecutionMode.SPREAD_ON, 10_000.0).run()
+        assert_matches_full_run(full, *stream(iter_blocks(ohlc, 333), ma_strategy()))
+
+    def test_per_block_iterable(self, ohlc):
+        batch = ma_strategy().generate_batch(ohlc)
+        full = BacktestEngine(ohlc, batch, ExecutionMode.SPREAD_ON, 10_000.0).run()
+        per_block = ([s for s in batch.to_signals() if start <= s.timestamp_index < start + 500]
+                     for start in range(0, len(ohlc), 500))
+        assert_matches_full_run(full, *stream(iter_blocks(ohlc, 500), per_block))
+
+    def test_iterable_shorter_than_blocks_raises(self, ohlc):
+        with pytest.raises(ValueError, match="Signal source"):
+            StreamingEngine(ExecutionMode.SPREAD_ON, 10_000.0).run(iter_blocks(ohlc, 500), iter([[]]))
+
+
+class TestFlatMemory:
+    def test_carried_state_stays_small(self, ohlc):
+        """Only open trades and no snapshot rows are carried between blocks."""
+        result, trades, _ = stream(iter_blocks(ohlc, 200), ma_strategy())
+        checkpoint = result.checkpoint
+        assert len(trades["pnl"]) > 20
+        assert len(checkpoint.trades["pnl"]) <= 1
+        assert len(checkpoint.snapshots["index"]) == 0
+        assert len(checkpoint.positions["size"]) == len(checkpoint.trades["pnl"])
+
+    def test_carried_events_stay_small(self, ohlc):
+        """In snapshot_mode "events" only the last cash-change event is carried."""
+        result = StreamingEngine(ExecutionMode.SPREAD_ON, 10_000.0, snapshot_mode="events").run(
+            iter_blocks(ohlc, 200), ma_strategy())
+        assert result.trade_count > 20
+        assert len(result.checkpoint.events["index"]) == 1
+
+    def test_no_blocks(self):
+        result = StreamingEngine(ExecutionMode.SPREAD_ON, 10_000.0).run([], [])
+        assert (result.candles, result.trade_count, result.final_equity) == (0, 0, 10_000.0)
+
+    def test_rejects_non_consecutive_blocks(self, ohlc):
+        blocks = [ohlc.iloc[:100], ohlc.iloc[50:200]]
+        with pytest.raises(ValueError, match="continue"):
+            StreamingEngine(ExecutionMode.SPREAD_ON, 10_000.0).run(blocks, [])
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+from backtester.engine import BacktestEngine
+from backtester.sweep import RESULT_COLUMNS, SharedOHLC, result_row, run_sweep
+from common.market_data import MarketData
+from common.models import ExecutionMode
+from strategies.ma_crossover import MACrossoverStrategy
+
+pytestmark = pytest.mark.ohlc(seed=7, n=2000, index_name="timestamp", spread=0.1)
+
+
+GRID = [
+    {"fast_period": fast, "slow_period": slow, "sl_pct": 0.01, "tp_pct": 0.02}
+    for fast in (3, 5, 8) for slow in (20, 40)
+]
+
+
+class TestSharedOHLC:
+    def test_attach_round_trip(self, ohlc):
+        """The attached frame equals the original and is read-only."""
+        with SharedOHLC(ohlc) as shared:
+            df, shm = SharedOHLC.attach(shared.spec)
+            pd.testing.assert_frame_equal(df, ohlc, check_freq=False, check_index_type=False)
+            assert not df["close"].to_numpy().flags.writeable
+            del df
+            shm.close()
+
+    def test_tz_aware_index(self, ohlc):
+        ohlc = ohlc.tz_localize("America/New_York")
+        with SharedOHLC(ohlc) as shared:
+            df, shm = SharedOHLC.attach(shared.spec)
+            assert df.index.equals(ohlc.index)
+            assert str(df.index.tz) == "America/New_York"
+            del df
+            shm.close()
+
+    def test_attach_market_data(self, ohlc):
+        """Workers' MarketData equals MarketData.from_frame and is read-only."""
+        ohlc = ohlc.tz_localize("America/New_York")
+        with SharedOHLC(ohlc) as shared:
+            data, shm = SharedOHLC.attach_market_data(shared.spec)
+            expected = MarketData.from_frame(ohlc)
+            np.testing.assert_array_equal(data.timestamp, expected.timestamp)
+            for name in expected.columns:
+                np.testing.assert_array_equal(data[name], expected[name])
+            assert data.tz == expected.tz
+            assert not data["close"].flags.writeable
+            del data
+            shm.close()
+
+    def test_rejects_missing_columns(self, ohlc):
+        with pytest.raises(ValueError):
+            SharedOHLC(ohlc.drop(columns="spread"))
+
+
+class TestRunSweep:
+    def test_matches_serial_runs(self, ohlc):
+        """Pool results equal running strategy + engine directly, in input order."""
+        results = run_sweep(ohlc, GRID, ExecutionMode.SPREAD_ON, 10_000.0, processes=2, chunksize=2)
+        assert list(results.columns) == list(GRID[0]) + list(RESULT_COLUMNS)
+        assert len(results) == len(GRID)
+        for row, params in zip(results.to_dict("records"), GRID):
+            strategy = MACrossoverStrategy(**params)
+            result = BacktestEngine(ohlc, strategy.generate(ohlc), ExecutionMode.SPREAD_ON,
+                                    10_000.0).run()
+            expected = {**params, **result_row(result, 10_000.0)}
+            assert row == pytest.approx(expected)
+            assert row["trade_count"] == len(result.trades)
+
+    def test_empty_params(self, ohlc):
+        results = run_sweep(ohlc, [], ExecutionMode.SPREAD_ON, 10_000.0)
+        assert results.empty
+
+    def test_engine_options_forwarded(self, ohlc):
+        with pytest.raises(ValueError):
+            run_sweep(ohlc, GRID[:1], ExecutionMode.SPREAD_ON, 10_000.0, processes=1,
+                      core="no-such-core")
+
+
+class TestResultRow:
+    def test_drawdown_and_win_rate(self, ohlc):
+        strategy = MACrossoverStrategy(fast_period=5, slow_period=20)
+        result = BacktestEngine(ohlc, strategy.generate(ohlc), ExecutionMode.SPREAD_ON,
+                                10_000.0).run()
+        row = result_row(result, 10_000.0)
+        equity = np.append(10_000.0, result.snapshots.equity)
+        peak = np.maximum.accumulate(equity)
+        assert row["max_drawdown"] == pytest.approx(np.max(1 - equity / peak))
+        closed = [t.pnl for t in result.trades if t.pnl is not None]
+        assert row["win_rate"] == pytest.approx(np.mean([p > 0 for p in closed]))
+        assert row["final_equity"] == result.final_equity
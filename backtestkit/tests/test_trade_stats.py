@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+from backtester.engine import BacktestEngine
+from backtester.streaming import StreamingEngine, iter_blocks
+from backtester.trade_stats import PATH_STAT_COLUMNS, trade_path_stats
+from common.models import ExecutionMode, SignalType
+from strategies.ma_crossover import MACrossoverStrategy
+from strategies.signals import Signal
+
+pytestmark = pytest.mark.ohlc(seed=24)
+
+
+def engine(ohlc, signals=None, **kwargs):
+    if signals is None:
+        signals = MACrossoverStrategy(fast_period=5, slow_period=40, sl_pct=0.01,
+                                      tp_pct=0.02).generate_batch(ohlc)
+    return BacktestEngine(ohlc, signals, ExecutionMode.SPREAD_ON, 10_000.0, **kwargs)
+
+
+def naive_stats(trade, ohlc):
+    """Slice-and-min reference for one Trade."""
+    stop = len(ohlc) if trade.exit_index is None else trade.exit_index
+    lows = list(ohlc["low"].iloc[trade.entry_index:stop])
+    highs = list(ohlc["high"].iloc[trade.entry_index:stop])
+    if trade.exit_index is not None:
+        lows.append(trade.exit_price)
+        highs.append(trade.exit_price)
+    low, high = min(lows), max(highs)
+    if trade.direction == "LONG":
+        return 1.0 - low / trade.entry_price, high / trade.entry_price - 1.0, int(np.argmax(highs))
+    return high / trade.entry_price - 1.0, 1.0 - low / trade.entry_price, int(np.argmin(lows))
+
+
+class TestTradePathStats:
+    def test_matches_naive_slices(self, ohlc):
+        eng = engine(ohlc)
+        result = eng.run()
+        stats = trade_path_stats(result.ledger, ohlc)
+        assert list(stats)[-4:] == list(PATH_STAT_COLUMNS)
+        assert len(result.trades) > 20
+        for k, trade in enumerate(result.trades):
+            mae, mfe, time_to_mfe = naive_stats(trade, ohlc)
+            assert stats["mae"][k] == mae
+            assert stats["mfe"][k] == mfe
+            assert stats["time_to_mfe"][k] == time_to_mfe
+            exit_index = len(ohlc) if trade.exit_index is None else trade.exit_index
+            assert stats["bars_held"][k] == exit_index - trade.entry_index
+
+    def test_stop_loss_exits_are_adverse(self, ohlc):
+        """A trade stopped out has an MAE of at least its stop distance."""
+        result = engine(ohlc).run()
+        stats = trade_path_stats(result.ledger, ohlc)
+        stopped = stats["exit_reason"] == 1
+        assert stopped.any()
+        assert (stats["mae"][stopped] >= 0.01 - 1e-9).all()
+        assert (stats["time_to_mfe"] <= stats["bars_held"]).all()
+
+    def test_engine_reuses_its_range_index(self, ohlc):
+        eng = engine(ohlc, core="event", sl_tp_scan="range_index")
+        eng.run()
+        stats = eng.trade_path_stats()
+        expected = trade_path_stats(eng.ledger, ohlc)
+        for name in PATH_STAT_COLUMNS:
+            np.testing.assert_array_equal(stats[name], expected[name])
+
+    def test_open_trade_runs_to_the_end(self, ohlc):
+        eng = engine(ohlc, [Signal(2900, SignalType.LONG, 0.0, 1e9, 1.0)])
+        eng.run()
+        stats = eng.trade_path_stats()
+        assert stats["bars_held"].tolist() == [99]
+        assert stats["mae"][0] == 1.0 - ohlc["low"].iloc[2901:].min() / stats["entry_price"][0]
+
+    def test_streamed_trade_chunks(self, ohlc):
+        """Sink chunks carry absolute indexes; stats match the in-memory run."""
+        chunks = []
+        signals = engine(ohlc).signal_batch
+        StreamingEngine(ExecutionMode.SPREAD_ON, 10_000.0, trade_sink=chunks.append).run(
+            iter_blocks(ohlc, 700), signals)
+        full = trade_path_stats(engine(ohlc).run().ledger, ohlc)
+        for chunk in chunks:
+            stats = trade_path_stats(chunk, ohlc)
+            for name in PATH_STAT_COLUMNS:
+                np.testing.assert_array_equal(stats[name], full[name][chunk["trade_id"]])
+
+    def test_rejects_trades_outside_data(self, ohlc):
+        result = engine(ohlc).run()
+        with pytest.raises(ValueError, match="outside"):
+            trade_path_stats(result.ledger, ohlc.iloc[:1000])